@@ -23,7 +23,9 @@ from __future__ import annotations
 
 import argparse
 import os
+from itertools import repeat
 from pathlib import Path
+from typing import Any, Iterator
 
 
 def cmd_process(args: argparse.Namespace) -> None:
@@ -33,7 +35,7 @@ def cmd_process(args: argparse.Namespace) -> None:
 
     import src.paths as paths
     from src.augmentation import augment_svgs, export_yolo_datasets
-    from src.classifier import classify
+    from src.classifier import ClassificationResult, classify, classify_many
     from src.constants import SCHEMA_VERSION
     from src.export import (
         dedup_input,
@@ -41,12 +43,15 @@ def cmd_process(args: argparse.Namespace) -> None:
         migrate_legacy_completed,
         migrate_to_source_hierarchy,
     )
+    from src.hash_cache import HashCache
+    from src.image_writer import ImageWriterSpec
     from src.metadata import (
         build_metadata,
         processed_dir_for,
         resolve_stem,
         _normalize_stem,
     )
+    from src.snap_points import detect_snap_points_with_method
     from src.svg_utils import _minify_svg
     from src.utils import _metadata_quality, _slugify, _svg_sha256
     from src.paths import Paths
@@ -83,7 +88,37 @@ def cmd_process(args: argparse.Namespace) -> None:
         return
 
     if args.dedup_input:
-        dedup_input(Paths.INPUT_DIR, args.dry_run)
+        dedup_input(
+            Paths.INPUT_DIR, args.dry_run, near=args.near_dups, workers=args.workers
+        )
+        return
+
+    if args.classify_summary is not None:
+        import csv
+
+        from src.classifier import (
+            SUMMARY_HEADER,
+            classification_summary,
+            format_summary,
+        )
+
+        svg_files = [
+            p for p in sorted(paths.INPUT_DIR.rglob("*.svg")) if "_debug" not in p.stem
+        ]
+        results = classify_many(svg_files)
+        if args.content_classify:
+            from src.content_classifier import refine_with_content
+
+            results = refine_with_content(svg_files, results)
+        rows = classification_summary(results)
+        print(f"Classified {len(svg_files)} SVG files under {paths.INPUT_DIR}\n")
+        print(format_summary(rows))
+        if args.classify_summary:
+            with open(args.classify_summary, "w", newline="", encoding="utf-8") as fh:
+                writer = csv.writer(fh)
+                writer.writerow(SUMMARY_HEADER)
+                writer.writerows(rows)
+            print(f"\nSummary written to {args.classify_summary}")
         return
 
     if args.migrate_legacy_completed:
@@ -100,6 +135,41 @@ def cmd_process(args: argparse.Namespace) -> None:
             args.dry_run,
             args.augment_min_size,
             compose_count=args.compose_count,
+            workers=args.workers,
+            seed=args.seed,
+            stream=args.stream_pool,
+            compose_symbols=tuple(args.compose_symbols),
+            vector=args.vector_aug,
+            writer_spec=ImageWriterSpec(
+                compress_level=args.compress_level, codec=args.image_codec
+            ),
+            shard_bytes=args.shard_size * 1024 * 1024,
+            val_fraction=args.val_fraction,
+            group_split=args.group_split,
+            incremental=not args.full_export,
+        )
+        return
+
+    if args.unpack_shards:
+        from src.shards import unpack_shards
+
+        dataset_dir, dest = (Path(p).resolve() for p in args.unpack_shards)
+        written = unpack_shards(dataset_dir, dest, args.dry_run)
+        print(f"Unpacked {written} samples from {dataset_dir} to {dest}")
+        return
+
+    if args.synth_sheets:
+        from src.sheet_synth import synthesize_sheets
+
+        synthesize_sheets(
+            paths.PROCESSED_DIR / "registry.json",
+            Path(args.synth_sheets).resolve(),
+            args.sheet_count,
+            args.dry_run,
+            symbols_range=tuple(args.sheet_symbols),
+            sheet_size=args.sheet_size,
+            workers=args.workers,
+            seed=args.seed,
         )
         return
 
@@ -117,6 +187,10 @@ def cmd_process(args: argparse.Namespace) -> None:
             args.augment_count,
             args.dry_run,
             args.augment_min_size,
+            workers=args.workers,
+            writer_spec=ImageWriterSpec(
+                compress_level=args.compress_level, codec=args.image_codec
+            ),
         )
         return
 
@@ -135,14 +209,49 @@ def cmd_process(args: argparse.Namespace) -> None:
     hash_map: dict[str, str] = {}
     hashes: dict[str, list[str]] = {}
     duplicates = 0
+    # (svg path, metadata, json path) of symbols that fell back to bbox snap points
+    raster_candidates: list[tuple[Path, dict, Path]] = []
+
+    hash_cache = HashCache.load()
+    near_index = None
+    near_pool = None
+    thumbnails: Iterator[Any] = repeat(None)
+    if args.near_dups:
+        from src.augmentation import _render_jobs
+        from src.near_dup import PHASH_SIZE, NearDupIndex, fingerprint
+        from src.render_pool import RenderPool
+
+        near_index = NearDupIndex()
+        # pHash thumbnails, rendered ahead of the loop and consumed in order;
+        # an unreadable file gets a failing job (None thumbnail).
+        near_pool = RenderPool(args.workers)
+        thumbnails = near_pool.imap(
+            _render_jobs(svg_files, size=(PHASH_SIZE, PHASH_SIZE))
+        )
 
-    for svg_path in svg_files:
+    # Batch classification; if it fails, each file is classified on its own
+    # inside the per-file try below, so a bad file counts as one [ERROR].
+    classifications: list[ClassificationResult | None]
+    try:
+        classifications = list(classify_many(svg_files))
+        if args.content_classify:
+            from src.content_classifier import refine_with_content
+
+            classifications = list(refine_with_content(svg_files, classifications))
+    except Exception as exc:
+        print(f"  [WARN] batch classification failed ({exc}); classifying per file")
+        classifications = [None] * len(svg_files)
+
+    for svg_path, classification, thumbnail in zip(
+        svg_files, classifications, thumbnails
+    ):
         if "_debug" in svg_path.stem:
             continue
         rel = svg_path.relative_to(paths.REPO_ROOT)
         src_rel = str(rel).replace("\\", "/")
         try:
-            classification = classify(svg_path)
+            if classification is None:
+                classification = classify(svg_path)
             target_dir = processed_dir_for(classification, src_rel)
 
             if target_dir not in used_stems:
@@ -150,7 +259,15 @@ def cmd_process(args: argparse.Namespace) -> None:
 
             base_stem = _normalize_stem(svg_path.stem, classification.standard)
             final_stem = resolve_stem(base_stem, target_dir, used_stems[target_dir])
-            meta = build_metadata(svg_path, final_stem, classification, src_rel)
+            snap_method = ""
+            snap_points = None
+            if args.raster_snap:
+                snap_points, snap_method = detect_snap_points_with_method(
+                    svg_path, classification.category
+                )
+            meta = build_metadata(
+                svg_path, final_stem, classification, src_rel, snap_points
+            )
         except Exception as exc:
             print(f"  [ERROR] {rel}: {exc}")
             errors += 1
@@ -158,11 +275,24 @@ def cmd_process(args: argparse.Namespace) -> None:
 
         raw_svg = svg_path.read_text(encoding="utf-8", errors="replace")
         minified = _minify_svg(raw_svg)
-        content_hash = _svg_sha256(minified)
+        content_hash = hash_cache.get(svg_path)
+        if content_hash is None:
+            content_hash = _svg_sha256(minified)
+            hash_cache.put(svg_path, content_hash)
         meta["content_hash"] = content_hash
 
+        # Key of the symbol this one duplicates: its own hash for an exact
+        # copy, else the hash of the kept symbol it near-duplicates.
+        dup_key, tag = None, "DUP"
         if content_hash in hash_map:
-            existing_id = hash_map[content_hash]
+            dup_key = content_hash
+        elif near_index is not None:
+            fp = fingerprint(svg_path, thumbnail)
+            if fp is not None:
+                dup_key, tag = near_index.add(content_hash, fp), "NEAR"
+
+        if dup_key is not None:
+            existing_id = hash_map[dup_key]
             existing_meta = next(
                 (m for m in registry if m.get("id") == existing_id), None
             )
@@ -171,25 +301,26 @@ def cmd_process(args: argparse.Namespace) -> None:
                 old_quality = _metadata_quality(existing_meta)
                 if new_quality <= old_quality:
                     print(
-                        f"  [DUP ] {rel}: duplicate of {existing_id} "
+                        f"  [{tag:<4}] {rel}: duplicate of {existing_id} "
                         f"(quality {new_quality} <= {old_quality}), skipping"
                     )
-                    hashes.setdefault(content_hash, []).append(meta["id"])
+                    hashes.setdefault(dup_key, []).append(meta["id"])
                     duplicates += 1
                     continue
                 else:
                     print(
-                        f"  [DUP+] {rel}: replacing {existing_id} "
+                        f"  [{tag}+] {rel}: replacing {existing_id} "
                         f"(quality {new_quality} > {old_quality})"
                     )
                     registry.remove(existing_meta)
-                    hashes.setdefault(content_hash, []).append(existing_id)
-                    hash_map[content_hash] = meta["id"]
+                    hashes.setdefault(dup_key, []).append(existing_id)
+                    hash_map[dup_key] = meta["id"]
             else:
-                hash_map[content_hash] = meta["id"]
+                hash_map[dup_key] = meta["id"]
         else:
+            dup_key = content_hash
             hash_map[content_hash] = meta["id"]
-        hashes.setdefault(content_hash, [meta["id"]])
+        hashes.setdefault(dup_key, [meta["id"]])
 
         conf = meta["classification"]["confidence"]
         conf_counts[conf] = conf_counts.get(conf, 0) + 1
@@ -214,6 +345,32 @@ def cmd_process(args: argparse.Namespace) -> None:
 
         registry.append(meta)
         processed_count += 1
+        if snap_method == "bbox":
+            raster_candidates.append(
+                (svg_path, meta, target_dir / (final_stem + ".json"))
+            )
+
+    hash_cache.save()
+    if near_pool is not None:
+        near_pool.close()
+
+    raster_refined = 0
+    if raster_candidates:
+        from src.raster_snap import raster_snap_points
+
+        print(f"\nRaster snap fallback for {len(raster_candidates)} symbols ...")
+        refined = raster_snap_points(
+            [(svg, meta["category"]) for svg, meta, _ in raster_candidates],
+            workers=args.workers,
+        )
+        for (_, meta, json_path), points in zip(raster_candidates, refined):
+            if points is None:
+                continue
+            meta["snap_points"] = points
+            raster_refined += 1
+            if not args.dry_run:
+                with open(json_path, "w", encoding="utf-8") as fh:
+                    json.dump(meta, fh, indent=2, ensure_ascii=False)
 
     registry_path = paths.PROCESSED_DIR / "registry.json"
     if not args.dry_run:
@@ -239,6 +396,8 @@ def cmd_process(args: argparse.Namespace) -> None:
     print(f"  High conf  : {conf_counts.get('high', 0)}")
     print(f"  Low conf   : {conf_counts.get('low', 0)}")
     print(f"  Unknown    : {conf_counts.get('none', 0)}")
+    if args.raster_snap:
+        print(f"  Raster snap: {raster_refined}/{len(raster_candidates)} refined")
     if not args.dry_run:
         print(f"  Output    : {paths.PROCESSED_DIR}")
         print(f"  Registry  : {registry_path}")
@@ -393,11 +552,150 @@ Examples:
         metavar="N",
         help="Composite images per standard",
     )
+    process_parser.add_argument(
+        "--compose-symbols",
+        type=int,
+        nargs=2,
+        default=(2, 8),
+        metavar=("MIN", "MAX"),
+        help="Symbols per composite image (default: 2 8)",
+    )
+    process_parser.add_argument(
+        "--vector-aug",
+        action="store_true",
+        help="Apply --export-yolo geometric augmentation in SVG space (exact boxes)",
+    )
+    process_parser.add_argument(
+        "--classify-summary",
+        nargs="?",
+        const="",
+        default=None,
+        metavar="CSV",
+        help="Classify the input tree and print a summary table (optionally as CSV)",
+    )
+    process_parser.add_argument(
+        "--content-classify",
+        action="store_true",
+        help="Label unknown symbols by drawing similarity to classified ones (kNN)",
+    )
+    process_parser.add_argument(
+        "--raster-snap",
+        action="store_true",
+        help="Re-detect bbox-fallback snap points from a low-resolution render",
+    )
+    process_parser.add_argument(
+        "--val-fraction",
+        type=float,
+        default=0.2,
+        metavar="F",
+        help="Fraction of --export-yolo samples hashed into the val split",
+    )
+    process_parser.add_argument(
+        "--group-split",
+        action="store_true",
+        help="Keep all augmentations of a symbol in the same --export-yolo split",
+    )
+    process_parser.add_argument(
+        "--full-export",
+        action="store_true",
+        help="Regenerate every --export-yolo output instead of only changed symbols",
+    )
+    process_parser.add_argument(
+        "--shard-size",
+        type=int,
+        default=0,
+        metavar="MB",
+        help=(
+            "Pack --export-yolo output into tar shards of MB megabytes "
+            "(0 = loose files)"
+        ),
+    )
+    process_parser.add_argument(
+        "--unpack-shards",
+        nargs=2,
+        default=None,
+        metavar=("DATASET", "DEST"),
+        help="Convert a sharded YOLO dataset back to the images/labels layout",
+    )
+    process_parser.add_argument(
+        "--synth-sheets",
+        default=None,
+        metavar="DIR",
+        help="Generate synthetic P&ID sheets with routed pipes into DIR",
+    )
+    process_parser.add_argument(
+        "--sheet-count",
+        type=int,
+        default=10,
+        metavar="N",
+        help="Sheets per standard for --synth-sheets",
+    )
+    process_parser.add_argument(
+        "--sheet-symbols",
+        type=int,
+        nargs=2,
+        default=(80, 200),
+        metavar=("MIN", "MAX"),
+        help="Symbols per synthetic sheet (default: 80 200)",
+    )
+    process_parser.add_argument(
+        "--sheet-size",
+        type=int,
+        default=4096,
+        metavar="PX",
+        help="Long side of synthetic sheets in pixels",
+    )
+    process_parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        metavar="N",
+        help=(
+            "Worker processes for --augment/--export-yolo/--synth-sheets/"
+            "--raster-snap (0 = all cores)"
+        ),
+    )
+    process_parser.add_argument(
+        "--seed",
+        type=int,
+        default=None,
+        metavar="N",
+        help="Random seed for reproducible --export-yolo/--synth-sheets output",
+    )
+    process_parser.add_argument(
+        "--stream-pool",
+        action="store_true",
+        help="Spill rendered symbols to a memory-mapped file during --export-yolo",
+    )
+    process_parser.add_argument(
+        "--image-codec",
+        choices=["png", "webp", "qoi", "npy"],
+        default="png",
+        help="Augmented image format (webp is lossless; qoi needs the qoi package)",
+    )
+    process_parser.add_argument(
+        "--compress-level",
+        "--png-compress-level",
+        dest="compress_level",
+        type=int,
+        choices=range(10),
+        default=6,
+        metavar="0-9",
+        help="Codec effort for augmented images (0 = fastest, 9 = smallest; default 6)",
+    )
     process_parser.add_argument(
         "--dedup-input",
         action="store_true",
         help="Delete duplicate SVG files from input",
     )
+    process_parser.add_argument(
+        "--near-dups",
+        action="store_true",
+        help=(
+            "Also treat near-duplicate drawings as duplicates "
+            "(process / --dedup-input)"
+        ),
+    )
     process_parser.add_argument(
         "--migrate-legacy-completed",
         action="store_true",
@@ -2,40 +2,82 @@
 src package - P&ID Symbol Library core modules.
 
 Public API:
+    array_dataset - Memory-mapped NumPy dataset output
     classifier   - Symbol classification strategies
     constants   - Shared constants and domain types
+    content_classifier - Feature-vector kNN stage for unknown symbols
     degradation - Image degradation effects
     augmentation - Image augmentation for training
     export      - Export utilities
+    export_manifest - Output manifest for incremental YOLO export
+    hash_cache  - Persistent canonical content-hash cache
+    image_codecs - PNG / WebP / QOI / NPY codecs for augmentation outputs
+    image_writer - Background image writer for augmentation outputs
     metadata    - Metadata assembly and path resolution
+    near_dup    - Near-duplicate fingerprints and LSH index
+    raster_snap - Raster fallback for bounding-box snap points
+    render_pool - Persistent batch SVG rendering workers
+    shards      - Sharded tar dataset output
+    sheet_synth - Synthetic P&ID sheets with routed pipes
     snap_points - Port/snap point detection
+    svg_geometry - SVG geometry engine (transforms, curves, <use>) for snap points
+    symbol_pool - Shared-memory symbol pools for parallel export
     svg_utils   - SVG manipulation utilities
+    vector_augment - Geometric augmentation in SVG space
     paths       - Repository path constants
     studio      - Browser-based symbol editor (separate CLI)
 """
 
 from . import (
+    array_dataset,
     augmentation,
     classifier,
     constants,
+    content_classifier,
     degradation,
     export,
+    export_manifest,
+    hash_cache,
+    image_codecs,
+    image_writer,
     metadata,
+    near_dup,
     paths,
+    raster_snap,
+    render_pool,
+    shards,
+    sheet_synth,
     snap_points,
+    svg_geometry,
     svg_utils,
+    symbol_pool,
     utils,
+    vector_augment,
 )
 
 __all__ = [
+    "array_dataset",
     "augmentation",
     "classifier",
     "constants",
+    "content_classifier",
     "degradation",
     "export",
+    "export_manifest",
+    "hash_cache",
+    "image_codecs",
+    "image_writer",
     "metadata",
+    "near_dup",
     "paths",
+    "raster_snap",
+    "render_pool",
+    "shards",
+    "sheet_synth",
     "snap_points",
+    "svg_geometry",
     "svg_utils",
+    "symbol_pool",
     "utils",
+    "vector_augment",
 ]
@@ -0,0 +1,124 @@
+"""
+array_dataset.py
+--------------------
+Memory-mapped NumPy dataset output for training and evaluation pipelines.
+
+ArrayDatasetWriter writes frames straight into a preallocated `.npy` file
+opened with numpy's open_memmap, so no image is ever encoded.  The files are:
+
+  - images.npy     (N, H, W, 3) uint8
+  - labels.npy     (N, 5) float32 rows [class, cx, cy, w, h] (YOLO-normalised;
+                   class -1 when the frame has no box)
+  - metadata.json  the number of rows written, the class names, and a
+                   per-row record (symbol id, frame index, effects, seed)
+
+N is the capacity reserved up front.  Rows past `count` (from frames that
+failed) stay zero.  load_array_dataset() maps the files back read-only and
+trims them to `count`, so batches load with zero decode cost.
+
+numpy is imported lazily inside functions.
+"""
+
+from __future__ import annotations
+
+import json
+from pathlib import Path
+from typing import Any, Mapping, Sequence
+
+IMAGES_NAME: str = "images.npy"
+LABELS_NAME: str = "labels.npy"
+METADATA_NAME: str = "metadata.json"
+NO_CLASS: int = -1
+
+
+class ArrayDatasetWriter:
+    """Append frames to a preallocated (capacity, H, W, 3) memory-mapped array.
+
+    Use as a context manager; close() flushes the arrays and writes the metadata.
+    """
+
+    def __init__(
+        self,
+        out_dir: Path,
+        capacity: int,
+        height: int,
+        width: int,
+        classes: Sequence[str] = (),
+    ) -> None:
+        import numpy as np
+
+        out_dir.mkdir(parents=True, exist_ok=True)
+        self.out_dir = out_dir
+        self.classes = list(classes)
+        self.count = 0
+        self.samples: list[dict[str, Any]] = []
+        self.images = np.lib.format.open_memmap(
+            out_dir / IMAGES_NAME,
+            mode="w+",
+            dtype=np.uint8,
+            shape=(capacity, height, width, 3),
+        )
+        self.labels = np.lib.format.open_memmap(
+            out_dir / LABELS_NAME, mode="w+", dtype=np.float32, shape=(capacity, 5)
+        )
+        self.labels[:, 0] = NO_CLASS
+
+    def __len__(self) -> int:
+        return self.count
+
+    def add(
+        self,
+        arr,
+        class_idx: int = NO_CLASS,
+        bbox: tuple[float, float, float, float] | None = None,
+        meta: Mapping[str, Any] | None = None,
+    ) -> int:
+        """Copy *arr* into the next row and return its index.
+
+        Raises ValueError when the dataset is full or the frame shape differs.
+        """
+        if self.count >= len(self.images):
+            raise ValueError(f"array dataset is full ({len(self.images)} rows)")
+        if arr.shape != self.images.shape[1:]:
+            raise ValueError(
+                f"frame shape {arr.shape} does not match {self.images.shape[1:]}"
+            )
+        row = self.count
+        self.images[row] = arr
+        if bbox is not None:
+            self.labels[row] = (class_idx, *bbox)
+        self.samples.append(dict(meta or {}))
+        self.count += 1
+        return row
+
+    def close(self) -> None:
+        """Flush both arrays and write metadata.json."""
+        self.images.flush()
+        self.labels.flush()
+        metadata = {
+            "count": self.count,
+            "capacity": len(self.images),
+            "shape": list(self.images.shape[1:]),
+            "classes": self.classes,
+            "samples": self.samples,
+        }
+        (self.out_dir / METADATA_NAME).write_text(
+            json.dumps(metadata, indent=1), encoding="utf-8"
+        )
+
+    def __enter__(self) -> "ArrayDatasetWriter":
+        return self
+
+    def __exit__(self, *_exc) -> None:
+        self.close()
+
+
+def load_array_dataset(out_dir: Path, mmap_mode: str = "r") -> tuple[Any, Any, dict]:
+    """Return (images, labels, metadata), memory-mapped and trimmed to `count`."""
+    import numpy as np
+
+    metadata = json.loads((out_dir / METADATA_NAME).read_text(encoding="utf-8"))
+    count = metadata["count"]
+    images = np.load(out_dir / IMAGES_NAME, mmap_mode=mmap_mode)[:count]
+    labels = np.load(out_dir / LABELS_NAME, mmap_mode=mmap_mode)[:count]
+    return images, labels, metadata
@@ -14,15 +14,26 @@ Heavy dependencies (cairosvg, albumentations, numpy, Pillow) are imported
 lazily inside functions so the module can be imported without them installed.
 """
 
-import io
+import hashlib
 import json
+import os
 import random
-from dataclasses import dataclass
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass, replace
 from pathlib import Path
 from typing import Any, Literal, Tuple
 
 from . import paths
-from .svg_utils import _render_svg_to_png
+from .constants import (
+    DEFAULT_CANVAS_SIZE,
+    MAX_PLACEMENT_IOU,
+    MAX_SYMBOL_FRACTION,
+    MIN_SYMBOL_FRACTION,
+    WHITE_THRESHOLD,
+)
+from .image_writer import ImageWriter, ImageWriterSpec
+from .svg_utils import _render_svg_to_array
 from .utils import _safe_std_slug
 
 
@@ -39,6 +50,7 @@ class AugmentationPipelineSpec:
     min_visibility: float | None = None
     bbox_format: Literal["coco", "pascal_voc", "albumentations", "yolo"] = "yolo"
     label_fields: tuple[str, ...] = ("class_labels",)
+    geometric: bool = True
 
     def build(self) -> Any:
         import albumentations as A
@@ -50,13 +62,23 @@ class AugmentationPipelineSpec:
                 label_fields=list(self.label_fields),
                 min_visibility=self.min_visibility or 0.1,
             )
-        return A.Compose(_default_augment_ops(), **kwargs)
+        return A.Compose(_default_augment_ops(self.geometric), **kwargs)
 
 
-def _default_augment_ops() -> list[Any]:
-    """Shared augmentation transforms used by both pipelines."""
+def _default_augment_ops(geometric: bool = True) -> list[Any]:
+    """Shared augmentation transforms used by both pipelines.
+
+    With geometric=False only the photometric ops are returned; the geometric
+    ones are then applied in SVG space (see vector_augment).
+    """
     import albumentations as A
 
+    photometric = [
+        A.RandomBrightnessContrast(p=0.3),
+        A.GaussNoise(p=0.2),
+    ]
+    if not geometric:
+        return photometric
     return [
         A.HorizontalFlip(p=0.7),  # mirror
         A.VerticalFlip(p=0.7),  # upside down
@@ -67,8 +89,7 @@ def _default_augment_ops() -> list[Any]:
         A.Perspective(scale=(0.05, 0.15), p=0.4),
         A.ElasticTransform(alpha=30, sigma=6, p=0.3),
         A.GridDistortion(num_steps=5, distort_limit=0.3, p=0.3),
-        A.RandomBrightnessContrast(p=0.3),
-        A.GaussNoise(p=0.2),
+        *photometric,
     ]
 
 
@@ -82,27 +103,34 @@ def _build_augment_transform_yolo():
     return AugmentationPipelineSpec(include_bboxes=True, min_visibility=0.1).build()
 
 
-def _tight_bbox_normalized(img_arr) -> tuple | None:
-    """Return (cx, cy, w, h) normalized to [0,1] for the non-white region, or None if blank."""
+def _tight_bbox_pixels(img_arr) -> tuple[int, int, int, int] | None:
+    """Return the (x1, y1, x2, y2) pixel box (exclusive end) of the non-white region."""
     import numpy as np
 
-    gray = img_arr.mean(axis=2)
-    mask = gray < 250
+    mask = img_arr.mean(axis=2) < WHITE_THRESHOLD
+    rows = np.flatnonzero(mask.any(axis=1))
+    if not len(rows):
+        return None
+    cols = np.flatnonzero(mask.any(axis=0))
+    return int(cols[0]), int(rows[0]), int(cols[-1]) + 1, int(rows[-1]) + 1
 
-    rows = np.any(mask, axis=1)
-    cols = np.any(mask, axis=0)
 
-    if not rows.any():
-        return None
+def _tight_bbox_normalized(img_arr, box: tuple | None = None) -> tuple | None:
+    """Return (cx, cy, w, h) normalized to [0,1] for the non-white region, or None if blank.
 
-    r_min, r_max = int(np.argmax(rows)), int(len(rows) - 1 - np.argmax(rows[::-1]))
-    c_min, c_max = int(np.argmax(cols)), int(len(cols) - 1 - np.argmax(cols[::-1]))
+    A pixel box already computed by _tight_bbox_pixels can be passed as *box*.
+    """
+    if box is None:
+        box = _tight_bbox_pixels(img_arr)
+        if box is None:
+            return None
 
+    x1, y1, x2, y2 = box
     H, W = img_arr.shape[:2]
-    cx = ((c_min + c_max) / 2) / W
-    cy = ((r_min + r_max) / 2) / H
-    bw = (c_max - c_min + 1) / W
-    bh = (r_max - r_min + 1) / H
+    cx = ((x1 + x2 - 1) / 2) / W
+    cy = ((y1 + y2 - 1) / 2) / H
+    bw = (x2 - x1) / W
+    bh = (y2 - y1) / H
 
     cx = max(0.0, min(1.0, cx))
     cy = max(0.0, min(1.0, cy))
@@ -113,9 +141,13 @@ def _tight_bbox_normalized(img_arr) -> tuple | None:
 
 
 def _scale_to_canvas(
-    img_arr, canvas_size: int, min_frac: float = 0.12, max_frac: float = 0.32
+    img_arr,
+    canvas_size: int,
+    min_frac: float = MIN_SYMBOL_FRACTION,
+    max_frac: float = MAX_SYMBOL_FRACTION,
 ):
     """Scale img_arr so its longest side occupies a random fraction of canvas_size."""
+    import numpy as np
     from PIL import Image
 
     h, w = img_arr.shape[:2]
@@ -123,94 +155,182 @@ def _scale_to_canvas(
     scale = target / max(h, w, 1)
     nw = max(1, int(round(w * scale)))
     nh = max(1, int(round(h * scale)))
-    return __import__("numpy").array(
+    return np.asarray(
         Image.fromarray(img_arr).resize((nw, nh), Image.Resampling.LANCZOS)
     )
 
 
-def _box_iou(a: tuple, b: tuple) -> float:
-    """Pixel-space intersection-over-union for two (x1,y1,x2,y2) boxes."""
-    ix1 = max(a[0], b[0])
-    iy1 = max(a[1], b[1])
-    ix2 = min(a[2], b[2])
-    iy2 = min(a[3], b[3])
-    if ix2 <= ix1 or iy2 <= iy1:
-        return 0.0
-    inter = (ix2 - ix1) * (iy2 - iy1)
-    return inter / (
-        (a[2] - a[0]) * (a[3] - a[1]) + (b[2] - b[0]) * (b[3] - b[1]) - inter
-    )
+class _OccupancyGrid:
+    """Coarse occupancy map of a square canvas for overlap-bounded placement.
+
+    Placed boxes mark grid cells as occupied.  For a new box, one summed-area
+    table yields the occupied-cell count of every candidate position at once, so
+    a valid position is drawn directly instead of by rejection sampling.
+    """
+
+    def __init__(self, canvas_size: int, cell: int) -> None:
+        import numpy as np
+
+        self.canvas_size = canvas_size
+        self.cell = cell
+        n = -(-canvas_size // cell)
+        self.occ = np.zeros((n, n), dtype=np.int32)
+
+    def find(self, w: int, h: int, max_overlap: float) -> tuple[int, int] | None:
+        """Return a random pixel (x, y) for a w×h box, or None if nothing fits."""
+        import numpy as np
+
+        cell = self.cell
+        limit_x = self.canvas_size - w
+        limit_y = self.canvas_size - h
+        if limit_x < 0 or limit_y < 0:
+            return None
+
+        cw, ch = -(-w // cell), -(-h // cell)
+        nx, ny = limit_x // cell + 1, limit_y // cell + 1
+        sat = np.pad(self.occ.cumsum(0).cumsum(1), ((1, 0), (1, 0)))
+        rows, cols = sat.shape[0] - 1, sat.shape[1] - 1
+        y0 = np.arange(ny)[:, None]
+        x0 = np.arange(nx)[None, :]
+        y1 = np.minimum(y0 + ch, rows)
+        x1 = np.minimum(x0 + cw, cols)
+        covered = sat[y1, x1] - sat[y0, x1] - sat[y1, x0] + sat[y0, x0]
+        free = np.flatnonzero(covered <= max_overlap * cw * ch)
+        if not len(free):
+            return None
+
+        gy, gx = divmod(int(free[random.randrange(len(free))]), nx)
+        x = min(gx * cell, limit_x)
+        y = min(gy * cell, limit_y)
+        return x, y
+
+    def mark(self, x: int, y: int, w: int, h: int) -> None:
+        cell = self.cell
+        self.occ[y // cell : -(-(y + h) // cell), x // cell : -(-(x + w) // cell)] = 1
 
 
 def _compose_symbols_image(
     pool: list[tuple],  # [(img_arr, class_idx), …]  — mixed categories OK
-    canvas_size: int = 640,
+    canvas_size: int = DEFAULT_CANVAS_SIZE,
+    boxes: list[tuple | None] | None = None,
+    min_symbols: int = 2,
+    max_symbols: int = 8,
 ) -> tuple:  # (canvas_arr, [(class_idx, cx, cy, w, h), …])
     """Place a random selection of symbols from the pool onto a white canvas.
 
     Uses random.choices so the same symbol can appear more than once (useful
-    when the pool is small).  Tries up to 40 positions per symbol to keep
-    IoU < 0.15 with already-placed boxes.  Returns the composite array and
-    the normalized YOLO bounding boxes for every successfully placed symbol.
+    when the pool is small).  *boxes* holds the precomputed tight pixel box of
+    each pool entry (see _tight_bbox_pixels); symbols are cropped to it before
+    scaling, so the placed rectangle is the label and blank entries are skipped.
+
+    Positions come from an occupancy grid: each symbol may cover at most
+    MAX_PLACEMENT_IOU of its area with already-placed symbols.  When many
+    symbols are requested the scale range shrinks so they can still fit.
+    Symbols are drawn with a darken blend (np.minimum), which leaves white
+    background pixels untouched without computing per-symbol masks.
     """
     import numpy as np
 
-    if not pool:
-        return np.full((canvas_size, canvas_size, 3), 255, dtype=np.uint8), []
+    canvas = np.full((canvas_size, canvas_size, 3), 255, dtype=np.uint8)
+    if boxes is None:
+        boxes = [_tight_bbox_pixels(arr) for arr, _ in pool]
+    candidates = [
+        (arr[b[1] : b[3], b[0] : b[2]], class_idx)
+        for (arr, class_idx), b in zip(pool, boxes)
+        if b is not None
+    ]
+    if not candidates:
+        return canvas, []
 
-    n_sym = random.randint(min(2, len(pool)), min(8, len(pool)))
-    selected = random.choices(pool, k=n_sym)
+    n_sym = random.randint(
+        min(min_symbols, len(candidates)), min(max_symbols, len(candidates))
+    )
+    selected = random.choices(candidates, k=n_sym)
+
+    # Keep the expected covered area under ~60 % of the canvas.
+    mean_frac = (MIN_SYMBOL_FRACTION + MAX_SYMBOL_FRACTION) / 2
+    shrink = min(1.0, (0.6 / max(n_sym * mean_frac**2, 1e-9)) ** 0.5)
+    scaled_syms = [
+        (
+            _scale_to_canvas(
+                img_arr,
+                canvas_size,
+                MIN_SYMBOL_FRACTION * shrink,
+                MAX_SYMBOL_FRACTION * shrink,
+            ),
+            class_idx,
+        )
+        for img_arr, class_idx in selected
+    ]
+    # Largest first: big symbols are the hardest to fit later.
+    scaled_syms.sort(key=lambda s: -s[0].shape[0] * s[0].shape[1])
 
-    canvas = np.full((canvas_size, canvas_size, 3), 255, dtype=np.uint8)
+    grid = _OccupancyGrid(canvas_size, max(4, canvas_size // 64))
     labels: list[tuple] = []
-    placed: list[tuple] = []  # (x1, y1, x2, y2) pixel boxes
 
-    for img_arr, class_idx in selected:
-        scaled = _scale_to_canvas(img_arr, canvas_size)
+    for scaled, class_idx in scaled_syms:
         sh, sw = scaled.shape[:2]
-        if sw > canvas_size or sh > canvas_size:
+        pos = grid.find(sw, sh, MAX_PLACEMENT_IOU)
+        if pos is None:
             continue
-
-        for _ in range(40):
-            x1 = random.randint(0, canvas_size - sw)
-            y1 = random.randint(0, canvas_size - sh)
-            box = (x1, y1, x1 + sw, y1 + sh)
-            if any(_box_iou(box, p) > 0.15 for p in placed):
-                continue
-
-            # Composite: non-white pixels of symbol overwrite canvas
-            mask = scaled.mean(axis=2) < 250
-            canvas[y1 : y1 + sh, x1 : x1 + sw][mask] = scaled[mask]
-            placed.append(box)
-
-            # Tight bbox of symbol content in canvas coords
-            rows = __import__("numpy").any(mask, axis=1)
-            cols = __import__("numpy").any(mask, axis=0)
-            if not rows.any():
-                break
-            r_min = int(__import__("numpy").argmax(rows))
-            r_max = int(len(rows) - 1 - __import__("numpy").argmax(rows[::-1]))
-            c_min = int(__import__("numpy").argmax(cols))
-            c_max = int(len(cols) - 1 - __import__("numpy").argmax(cols[::-1]))
-
-            cx = (x1 + (c_min + c_max) / 2) / canvas_size
-            cy = (y1 + (r_min + r_max) / 2) / canvas_size
-            bw = (c_max - c_min + 1) / canvas_size
-            bh = (r_max - r_min + 1) / canvas_size
-            labels.append(
-                (
-                    class_idx,
-                    max(0.0, min(1.0, cx)),
-                    max(0.0, min(1.0, cy)),
-                    max(0.0, min(1.0, bw)),
-                    max(0.0, min(1.0, bh)),
-                )
+        x1, y1 = pos
+
+        region = canvas[y1 : y1 + sh, x1 : x1 + sw]
+        np.minimum(region, scaled, out=region)
+        grid.mark(x1, y1, sw, sh)
+
+        labels.append(
+            (
+                class_idx,
+                max(0.0, min(1.0, (x1 + sw / 2) / canvas_size)),
+                max(0.0, min(1.0, (y1 + sh / 2) / canvas_size)),
+                max(0.0, min(1.0, sw / canvas_size)),
+                max(0.0, min(1.0, sh / canvas_size)),
             )
-            break
+        )
 
     return canvas, labels
 
 
+def _upscale_to_min_size(base_arr, min_size: int):
+    """LANCZOS-upscale *base_arr* so its short side is at least min_size.
+
+    SVGs are rendered at their final size, so this only acts as a fallback for
+    rasters whose intrinsic size could not be determined up front.
+    """
+    import numpy as np
+    from PIL import Image
+
+    h, w = base_arr.shape[:2]
+    short = min(w, h)
+    if min_size <= 0 or short >= min_size:
+        return base_arr
+    scale = min_size / max(short, 1)
+    base = Image.fromarray(base_arr).resize(
+        (max(1, int(round(w * scale))), max(1, int(round(h * scale)))),
+        resample=Image.Resampling.LANCZOS,
+    )
+    return np.array(base)
+
+
+def _render_jobs(
+    svg_files: list[Path], min_size: int = 0, size: tuple[int, int] | None = None
+) -> list[tuple]:
+    """Build render-pool jobs for *svg_files*; unreadable files become failing jobs.
+
+    Each job renders at its final resolution (see render_pool.svg_render_job).
+    """
+    from .render_pool import svg_render_job
+
+    jobs = []
+    for svg_file in svg_files:
+        try:
+            jobs.append(svg_render_job(svg_file, min_size, size))
+        except OSError:
+            jobs.append((b"", None))
+    return jobs
+
+
 def augment_single_svg(
     svg_path: Path,
     output_dir: Path,
@@ -218,47 +338,66 @@ def augment_single_svg(
     dry_run: bool,
     transform,
     min_size: int,
+    base_arr=None,
+    writer: ImageWriter | None = None,
 ) -> tuple[int, int]:
-    """Render a single SVG and write N augmented PNGs to output_dir."""
-    import numpy as np
-    from PIL import Image
+    """Render a single SVG and write N augmented PNGs to output_dir.
 
+    A raster already produced by the render pool can be passed as *base_arr*.
+    PNGs are encoded in the background by *writer*; when the caller shares a
+    writer, failed writes are reported through writer.errors instead.
+    """
     try:
-        png_bytes = _render_svg_to_png(svg_path)
-        base = Image.open(io.BytesIO(png_bytes)).convert("RGB")
-        if min_size > 0:
-            w, h = base.size
-            short = min(w, h)
-            if short < min_size:
-                scale = min_size / max(short, 1)
-                new_w = max(1, int(round(w * scale)))
-                new_h = max(1, int(round(h * scale)))
-                base = base.resize((new_w, new_h), resample=Image.Resampling.LANCZOS)
-        base_arr = np.array(base)
+        if base_arr is None:
+            base_arr = _render_svg_to_array(svg_path, min_size)
+        base_arr = _upscale_to_min_size(base_arr, min_size)
     except Exception:
         return 0, 1
 
     if not dry_run:
         output_dir.mkdir(parents=True, exist_ok=True)
 
+    own_writer = writer is None
+    if writer is None:
+        writer = ImageWriterSpec().open()
+
     created = 0
-    for i in range(count):
-        try:
-            augmented = transform(image=base_arr)["image"]
-            if not dry_run:
-                out_name = f"{svg_path.stem}_aug{i + 1}.png"
-                Image.fromarray(augmented).save(output_dir / out_name, format="PNG")
-            created += 1
-        except Exception:
-            return created, 1
+    try:
+        for i in range(count):
+            try:
+                augmented = transform(image=base_arr)["image"]
+                if not dry_run:
+                    out_name = f"{svg_path.stem}_aug{i + 1}{writer.suffix}"
+                    writer.save(augmented, output_dir / out_name)
+                created += 1
+            except Exception:
+                return created, 1
+    finally:
+        if own_writer:
+            writer.close()
 
+    if own_writer and writer.errors:
+        return created - writer.errors, 1
     return created, 0
 
 
 def augment_svgs(
-    input_dir: Path, output_dir: Path, count: int, dry_run: bool, min_size: int
+    input_dir: Path,
+    output_dir: Path,
+    count: int,
+    dry_run: bool,
+    min_size: int,
+    workers: int = 1,
+    writer_spec: ImageWriterSpec | None = None,
 ) -> None:
-    """Augment SVGs in input_dir and write PNGs to output_dir (no JSON/registry)."""
+    """Augment SVGs in input_dir and write PNGs to output_dir (no JSON/registry).
+
+    Rendering runs on a RenderPool; with workers > 1 later SVGs render in
+    worker processes while earlier ones are being augmented.  PNG encoding
+    runs on a background ImageWriter configured by *writer_spec*.
+    """
+    from .render_pool import RenderPool
+
     if not input_dir.is_dir():
         print(f"Error: input directory not found: {input_dir}")
         return
@@ -270,15 +409,32 @@ def augment_svgs(
     created = 0
     errors = 0
 
-    for idx, svg_path in enumerate(svg_files, 1):
-        rel = svg_path.relative_to(input_dir)
-        target_dir = output_dir / rel.parent
-        made, err = augment_single_svg(
-            svg_path, target_dir, count, dry_run, transform, min_size
-        )
-        created += made
-        errors += err
-        print(f"  [{idx:>4}/{total}] {rel}")
+    with (
+        RenderPool(workers) as render_pool,
+        (writer_spec or ImageWriterSpec()).open() as writer,
+    ):
+        rasters = render_pool.imap(_render_jobs(svg_files, min_size))
+        for idx, (svg_path, base_arr) in enumerate(zip(svg_files, rasters), 1):
+            rel = svg_path.relative_to(input_dir)
+            target_dir = output_dir / rel.parent
+            if base_arr is None:
+                made, err = 0, 1
+            else:
+                made, err = augment_single_svg(
+                    svg_path,
+                    target_dir,
+                    count,
+                    dry_run,
+                    transform,
+                    min_size,
+                    base_arr,
+                    writer,
+                )
+            created += made
+            errors += err
+            print(f"  [{idx:>4}/{total}] {rel}")
+    created -= writer.errors
+    errors += writer.errors
 
     print(f"\n{'=' * 60}")
     print(f"  Inputs   : {total}")
@@ -291,41 +447,276 @@ def augment_svgs(
     print(f"{'=' * 60}")
 
 
-def export_yolo_datasets(
-    registry_path: Path,
-    output_dir: Path,
+VAL_FRACTION_DEFAULT: float = 0.2
+
+
+def _split_is_val(key: str, val_fraction: float = VAL_FRACTION_DEFAULT) -> bool:
+    """Stable split assignment: True if *key* hashes into the validation fraction.
+
+    Depends only on the key, so adding, removing or reordering symbols never
+    moves an existing sample to the other split.
+    """
+    digest = hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "big") < val_fraction * 2**64
+
+
+@dataclass(frozen=True, slots=True)
+class _YoloLayout:
+    """Image / label directories of one YOLO dataset (picklable for workers)."""
+
+    img_train: Path
+    img_val: Path
+    lbl_train: Path
+    lbl_val: Path
+    val_fraction: float = VAL_FRACTION_DEFAULT
+    group_split: bool = False
+
+    def dirs(self, is_val: bool) -> tuple[Path, Path]:
+        """Return (image_dir, label_dir) for the requested split."""
+        if is_val:
+            return self.img_val, self.lbl_val
+        return self.img_train, self.lbl_train
+
+    def dirs_for(self, key: str, index: int = 0) -> tuple[Path, Path]:
+        """Return the split directories of augmentation *index* of *key*.
+
+        With group_split every augmentation of a key lands in the same split.
+        """
+        split_key = key if self.group_split else f"{key}#{index}"
+        return self.dirs(_split_is_val(split_key, self.val_fraction))
+
+
+# Per-process YOLO transform, built lazily so worker processes construct their own.
+_yolo_transform: Any = None
+
+
+def _get_yolo_transform():
+    global _yolo_transform
+    if _yolo_transform is None:
+        _yolo_transform = _build_augment_transform_yolo()
+    return _yolo_transform
+
+
+_photometric_transform: Any = None
+
+
+def _get_photometric_transform():
+    global _photometric_transform
+    if _photometric_transform is None:
+        _photometric_transform = AugmentationPipelineSpec(geometric=False).build()
+    return _photometric_transform
+
+
+@contextmanager
+def _seeded_task(seed: int, transform=None):
+    """Seed every RNG a task touches so its output depends only on *seed*.
+
+    The global random / NumPy states are restored on exit, so tasks run
+    in-process (workers=1) leave the caller's RNGs as they were.
+    """
+    import numpy as np
+
+    py_state = random.getstate()
+    np_state = np.random.get_state()
+    random.seed(seed)
+    np.random.seed(seed % 2**32)
+    if transform is not None and hasattr(transform, "set_random_seed"):
+        transform.set_random_seed(seed)
+    try:
+        yield
+    finally:
+        random.setstate(py_state)
+        np.random.set_state(np_state)
+
+
+# (label (path, text) pairs, encoded (image path, bytes) pairs) of one export
+# task; images are only returned when the writer collects them for shards.
+_TaskOutput = tuple[list[tuple[Path, str]], list[tuple[Path, bytes]]]
+
+
+def _yolo_label_text(rows) -> str:
+    return (
+        "\n".join(
+            f"{cls} {cx:.6f} {cy:.6f} {bw:.6f} {bh:.6f}" for cls, cx, cy, bw, bh in rows
+        )
+        + "\n"
+    )
+
+
+def _yolo_symbol_task(
+    pool_src,
+    index: int,
+    stem: str,
+    bbox: BBox,
     count: int,
+    layout: _YoloLayout,
     dry_run: bool,
-    min_size: int,
-    origin: str | None = None,
-    standard: str | None = None,
-    compose_count: int = 20,
-) -> None:
-    """Export YOLO-format datasets (one per standard group) from the symbol registry.
+    seed: int,
+    writer_spec: ImageWriterSpec | None = None,
+) -> _TaskOutput:
+    """Write `count` augmentations of one pool entry.
+
+    Returns (labels, images): (label_path, label_text) pairs in augmentation
+    order, which the caller writes so they are collected back deterministically,
+    and the encoded frames when *writer_spec* collects them for sharded output.
+    Images are encoded in the background by an ImageWriter built from
+    *writer_spec*; a failed write is re-raised once the task has finished.
+    """
+    from .symbol_pool import resolve_pool
 
-    For each standard group this generates:
-      images/train/   images/val/    (80 / 20 split)
-      labels/train/   labels/val/
+    base_arr, class_idx = resolve_pool(pool_src)[index]
+    transform = _get_yolo_transform()
 
-    Two kinds of images:
-      1. Per-symbol augmented — one symbol per image, `count` augmentations each.
-      2. Multi-symbol composite — `compose_count` images with 2–8 randomly placed
-         symbols from the full pool (mixed categories; each gets its own label row).
+    labels: list[tuple[Path, str]] = []
+    with (
+        _seeded_task(seed, transform),
+        (writer_spec or ImageWriterSpec()).open() as writer,
+    ):
+        for i in range(count):
+            try:
+                result = transform(
+                    image=base_arr,
+                    bboxes=[list(bbox)],
+                    class_labels=[class_idx],
+                )
+                aug_img = result["image"]
+                aug_bboxes = result["bboxes"]
+                aug_labels = result["class_labels"]
+            except Exception:
+                continue
 
-    data.yaml uses the dict-format `names` field required by YOLOv8–v12.
+            if not aug_bboxes:
+                continue
+
+            out_name = f"{stem}_aug{i + 1}"
+            i_dir, l_dir = layout.dirs_for(stem, i)
+            if not dry_run:
+                writer.save(aug_img, i_dir / (out_name + writer.suffix))
+            labels.append(
+                (
+                    l_dir / (out_name + ".txt"),
+                    _yolo_label_text(
+                        (lbl, *box) for lbl, box in zip(aug_labels, aug_bboxes)
+                    ),
+                )
+            )
+    writer.check()
+    return labels, writer.take()
+
+
+def _yolo_vector_task(
+    pool_src,
+    index: int,
+    svg_file: Path,
+    stem: str,
+    count: int,
+    layout: _YoloLayout,
+    dry_run: bool,
+    seed: int,
+    writer_spec: ImageWriterSpec | None = None,
+) -> _TaskOutput:
+    """Vector-space variant of _yolo_symbol_task.
+
+    Geometric ops are applied as an SVG transform and each augmentation is
+    rasterised once; the label is the analytically transformed ink box.  Only
+    photometric ops run on the raster afterwards.
     """
-    import numpy as np
-    from PIL import Image
+    from .svg_utils import _svg_embed_parts
+    from .symbol_pool import resolve_pool
+    from .vector_augment import (
+        ink_outline,
+        render_affine,
+        sample_affine,
+        transformed_bbox,
+    )
 
+    base_arr, class_idx = resolve_pool(pool_src)[index]
+    outline = ink_outline(base_arr)
+    parts = _svg_embed_parts(svg_file.read_text(encoding="utf-8", errors="replace"))
+    if outline is None or parts is None:
+        return [], []
+    base_h, base_w = base_arr.shape[:2]
+    transform = _get_photometric_transform()
+    rng = random.Random(seed)
+
+    labels: list[tuple[Path, str]] = []
+    with (
+        _seeded_task(seed, transform),
+        (writer_spec or ImageWriterSpec()).open() as writer,
+    ):
+        for i in range(count):
+            m, out_w, out_h = sample_affine(rng, base_w, base_h)
+            bbox = transformed_bbox(outline, m, out_w, out_h)
+            if bbox is None:
+                continue
+
+            out_name = f"{stem}_aug{i + 1}"
+            i_dir, l_dir = layout.dirs_for(stem, i)
+            if not dry_run:
+                try:
+                    img = render_affine(parts, (base_w, base_h), m, (out_w, out_h))
+                    img = transform(image=img)["image"]
+                except Exception:
+                    continue
+                writer.save(img, i_dir / (out_name + writer.suffix))
+            labels.append(
+                (l_dir / (out_name + ".txt"), _yolo_label_text([(class_idx, *bbox)]))
+            )
+    writer.check()
+    return labels, writer.take()
+
+
+def _yolo_composite_task(
+    pool_src,
+    boxes: list[tuple | None],
+    jobs: list[tuple[int, int]],
+    std_slug: str,
+    layout: _YoloLayout,
+    dry_run: bool,
+    min_symbols: int = 2,
+    max_symbols: int = 8,
+    writer_spec: ImageWriterSpec | None = None,
+) -> _TaskOutput:
+    """Render the composites listed in *jobs* as (index, seed) pairs.
+
+    *boxes* are the tight pixel boxes of the pool entries, computed once when
+    the pool was built.
+    """
+    from .symbol_pool import resolve_pool
+
+    pool = resolve_pool(pool_src)
+    labels: list[tuple[Path, str]] = []
+    with (writer_spec or ImageWriterSpec()).open() as writer:
+        for i, seed in jobs:
+            with _seeded_task(seed):
+                canvas, comp_labels = _compose_symbols_image(
+                    pool, boxes=boxes, min_symbols=min_symbols, max_symbols=max_symbols
+                )
+            if not comp_labels:
+                continue
+
+            comp_name = f"composite_{std_slug}_{i + 1}"
+            i_dir, l_dir = layout.dirs_for(comp_name)
+            if not dry_run:
+                writer.save(canvas, i_dir / (comp_name + writer.suffix))
+            labels.append((l_dir / (comp_name + ".txt"), _yolo_label_text(comp_labels)))
+    writer.check()
+    return labels, writer.take()
+
+
+def _load_symbols_by_standard(
+    registry_path: Path, origin: str | None, standard: str | None
+) -> dict[str, list[dict]] | None:
+    """Load classified registry symbols grouped by standard, or None after an error."""
     if not registry_path.exists():
         print(f"Error: registry not found: {registry_path}")
-        return
+        return None
 
     try:
         registry = json.loads(registry_path.read_text(encoding="utf-8"))
     except (json.JSONDecodeError, OSError) as exc:
         print(f"Error loading registry: {exc}")
-        return
+        return None
 
     symbols = registry.get("symbols", [])
     symbols = [
@@ -345,159 +736,429 @@ def export_yolo_datasets(
 
     if not symbols:
         print("No eligible symbols found after filtering.")
-        return
+        return None
 
     by_standard: dict[str, list[dict]] = {}
     for sym in symbols:
         by_standard.setdefault(sym.get("standard", "unknown"), []).append(sym)
+    return by_standard
+
+
+def _yolo_class_name(sym: dict) -> str:
+    """Per-symbol class name: category/stem for specificity."""
+    parts = sym.get("id", "").split("/")
+    if len(parts) >= 2:
+        return f"{parts[-2]}/{parts[-1]}"
+    return Path(sym.get("svg_path", "unknown")).stem
+
+
+def _yolo_data_yaml(dataset_dir: Path, categories: list[str]) -> str:
+    """Return data.yaml content with the dict-format names required by YOLOv8-v12."""
+    names_lines = "\n".join(f"  {i}: {c}" for i, c in enumerate(categories))
+    return (
+        f"path: {dataset_dir.resolve()}\n"
+        f"train: images/train\n"
+        f"val: images/val\n"
+        f"nc: {len(categories)}\n"
+        f"names:\n{names_lines}\n"
+    )
 
-    transform = _build_augment_transform_yolo()
-    total_written = 0
-    total_skipped = 0
 
-    for std, sym_list in sorted(by_standard.items()):
-        std_slug = _safe_std_slug(std)
-        dataset_dir = output_dir / f"yolo-{std_slug}"
-        img_train = dataset_dir / "images" / "train"
-        img_val = dataset_dir / "images" / "val"
-        lbl_train = dataset_dir / "labels" / "train"
-        lbl_val = dataset_dir / "labels" / "val"
-
-        # Per-symbol class names: category/stem for specificity
-        def _cls_name(s: dict) -> str:
-            parts = s.get("id", "").split("/")
-            if len(parts) >= 2:
-                return f"{parts[-2]}/{parts[-1]}"
-            return Path(s.get("svg_path", "unknown")).stem
-
-        categories = sorted({_cls_name(s) for s in sym_list})
-        class_map = {cls: idx for idx, cls in enumerate(categories)}
-
-        # dict-format names required by YOLOv8-v12
-        names_lines = "\n".join(f"  {i}: {c}" for i, c in enumerate(categories))
-        yaml_content = (
-            f"path: {dataset_dir.resolve()}\n"
-            f"train: images/train\n"
-            f"val: images/val\n"
-            f"nc: {len(categories)}\n"
-            f"names:\n{names_lines}\n"
-        )
+# Manifest key of the composite images of a dataset (never a symbol stem).
+_COMPOSITE_KEY = "<composites>"
 
-        print(
-            f"\n[{std}]  {len(sym_list)} symbols, {len(categories)} classes"
-            + (f"  [origin: {origin}]" if origin else "")
+
+def _task_seed(seed: int | None, key: str, rng: random.Random) -> int:
+    """Return the task seed for *key*.
+
+    Derived from (seed, key), so it does not depend on which other symbols are
+    exported; unseeded runs draw from *rng*.
+    """
+    if seed is None:
+        return rng.getrandbits(32)
+    digest = hashlib.blake2b(f"{seed}:{key}".encode("utf-8"), digest_size=4).digest()
+    return int.from_bytes(digest, "big")
+
+
+def _label_outputs(labels, dataset_dir: Path, img_suffix: str) -> list[Path]:
+    """Label files of one task plus their images (images/<split>/<stem><suffix>)."""
+    outputs: list[Path] = []
+    for lbl_path, _ in labels:
+        outputs.append(lbl_path)
+        outputs.append(
+            dataset_dir / "images" / lbl_path.parent.name / (lbl_path.stem + img_suffix)
         )
+    return outputs
 
-        if not dry_run:
-            for d in (img_train, img_val, lbl_train, lbl_val):
-                d.mkdir(parents=True, exist_ok=True)
-            (dataset_dir / "data.yaml").write_text(yaml_content, encoding="utf-8")
 
-        # Render all symbols; build pool for composite generation
-        pool: list[tuple] = []  # (img_arr, class_idx) — all categories mixed
-        aug_global = 0  # monotonic counter for train/val split (mod 5)
+def _write_task_output(labels, images, shards) -> None:
+    """Write one task's labels as files, or pack labels and images into *shards*."""
+    if shards is not None:
+        shards.add_outputs(images, labels)
+        return
+    for lbl_path, text in labels:
+        lbl_path.write_text(text, encoding="utf-8")
 
-        for sym in sym_list:
-            class_idx = class_map[_cls_name(sym)]
-            svg_rel = sym.get("svg_path", "")
-            svg_file = (paths.REPO_ROOT / svg_rel) if svg_rel else None
 
-            if not svg_file or not svg_file.exists():
-                total_skipped += 1
-                continue
+def _run_tasks(executor, fn, arg_list: list[tuple], window: int = 0):
+    """Yield fn(*args) for every entry in order, inline or through *executor*.
 
-            try:
-                png_bytes = _render_svg_to_png(svg_file)
-                base = Image.open(io.BytesIO(png_bytes)).convert("RGB")
-                if min_size > 0:
-                    w, h = base.size
-                    short = min(w, h)
-                    if short < min_size:
-                        scale = min_size / max(short, 1)
-                        base = base.resize(
-                            (
-                                max(1, int(round(w * scale))),
-                                max(1, int(round(h * scale))),
-                            ),
-                            resample=Image.Resampling.LANCZOS,
-                        )
-                base_arr = np.array(base)
-            except Exception:
-                total_skipped += 1
-                continue
+    At most *window* tasks (default 2 x cores) run ahead of the consumer, so
+    results that carry encoded images (shards) never pile up in memory.
+    """
+    from .render_pool import ordered_map
 
-            pool.append((base_arr, class_idx))
+    if executor is None:
+        for args in arg_list:
+            yield fn(*args)
+        return
+    yield from ordered_map(executor, fn, arg_list, window or 2 * (os.cpu_count() or 1))
 
-            bbox = _tight_bbox_normalized(base_arr)
-            if bbox is None:
-                total_skipped += 1
-                continue
 
-            cx, cy, bw, bh = bbox
-            stem = sym.get("id", svg_file.stem).replace("/", "_")
+def export_yolo_datasets(
+    registry_path: Path,
+    output_dir: Path,
+    count: int,
+    dry_run: bool,
+    min_size: int,
+    origin: str | None = None,
+    standard: str | None = None,
+    compose_count: int = 20,
+    workers: int = 1,
+    seed: int | None = None,
+    stream: bool = False,
+    compose_symbols: tuple[int, int] = (2, 8),
+    vector: bool = False,
+    writer_spec: ImageWriterSpec | None = None,
+    shard_bytes: int = 0,
+    val_fraction: float = VAL_FRACTION_DEFAULT,
+    group_split: bool = False,
+    incremental: bool = True,
+) -> None:
+    """Export YOLO-format datasets (one per standard group) from the symbol registry.
 
-            # Per-symbol augmented images
-            for i in range(count):
-                try:
-                    result = transform(
-                        image=base_arr,
-                        bboxes=[[cx, cy, bw, bh]],
-                        class_labels=[class_idx],
-                    )
-                    aug_img = result["image"]
-                    aug_bboxes = result["bboxes"]
-                    aug_labels = result["class_labels"]
-                except Exception:
-                    continue
+    For each standard group this generates:
+      images/train/   images/val/    (`val_fraction` in val, default 80 / 20)
+      labels/train/   labels/val/
 
-                if not aug_bboxes:
-                    continue
+    Each sample's split comes from a stable hash of (symbol id, augmentation
+    index) or of the composite name, so it does not change when symbols are
+    added, removed or reordered.  group_split=True hashes the symbol id alone,
+    keeping all augmentations of a symbol in one split.
 
-                is_val = aug_global % 5 == 0
-                out_name = f"{stem}_aug{i + 1}"
-                i_dir = img_val if is_val else img_train
-                l_dir = lbl_val if is_val else lbl_train
+    Two kinds of images:
+      1. Per-symbol augmented — one symbol per image, `count` augmentations each.
+      2. Multi-symbol composite — `compose_count` images with `compose_symbols`
+         (default 2–8) randomly placed symbols from the full pool (mixed
+         categories; each gets its own label row).
+
+    With workers > 1 symbols are rendered and the augmentation and compositing
+    tasks of each standard run in one process pool.  The rendered pool is placed
+    in shared memory once and workers attach to it by name; label files are
+    written by the parent in task order.  Every task is seeded from `seed`, so a
+    seeded export produces the same files regardless of the worker count.
+
+    With stream=True each rendered raster is spilled to a memory-mapped file
+    next to the output instead of being kept in memory; composites page symbols
+    in lazily, so peak memory no longer grows with the size of a standard group.
+
+    With vector=True per-symbol augmentations apply their geometric ops as an
+    SVG transform and rasterise once (see vector_augment); labels are computed
+    analytically instead of being resampled with the image.
+
+    Images are PNG-encoded on background threads inside each task (see
+    image_writer); *writer_spec* sets the compression level and queue depth.
+
+    With shard_bytes > 0 images and labels are packed into tar shards of at
+    most that size under <dataset>/shards/ instead of loose files (see shards;
+    shards.unpack_shards restores the directory layout).  Workers return the
+    encoded frames and the parent appends them in task order, so seeded shards
+    are identical for any worker count.
+
+    Each dataset keeps a manifest.json mapping every symbol (and the composite
+    set) to its content hash, augmentation parameters, seed and output files
+    (see export_manifest).  With incremental=True a rerun only renders and
+    augments new or changed symbols, deletes the outputs of removed ones and
+    regenerates composites only when the pool or their parameters changed.
+    Per-symbol seeds are derived from (seed, symbol), so the result matches a
+    full export with the same seed.  Unseeded exports are never reused, and
+    incremental=False regenerates everything.  Sharded exports and dry runs are
+    always full.
 
-                if not dry_run:
-                    Image.fromarray(aug_img).save(
-                        i_dir / (out_name + ".png"), format="PNG"
-                    )
-                    lbl_lines = "\n".join(
-                        f"{lbl} {box[0]:.6f} {box[1]:.6f} {box[2]:.6f} {box[3]:.6f}"
-                        for lbl, box in zip(aug_labels, aug_bboxes)
-                    )
-                    (l_dir / (out_name + ".txt")).write_text(
-                        lbl_lines + "\n", encoding="utf-8"
-                    )
+    data.yaml uses the dict-format `names` field required by YOLOv8–v12.
+    """
+    import tempfile
+
+    from .export_manifest import MANIFEST_NAME, ExportManifest, fingerprint
+    from .image_codecs import get_codec
+    from .render_pool import RenderPool
+    from .shards import SHARD_DIRNAME, ShardWriter
+    from .symbol_pool import SharedSymbolPool, SpilledSymbolPool
+
+    by_standard = _load_symbols_by_standard(registry_path, origin, standard)
+    if by_standard is None:
+        return
 
-                total_written += 1
-                aug_global += 1
+    if workers < 1:
+        workers = os.cpu_count() or 1
+    writer_spec = writer_spec or ImageWriterSpec()
+    if shard_bytes > 0:
+        writer_spec = replace(writer_spec, collect=True)
+    img_suffix = get_codec(writer_spec.codec).suffix
+    tracked = not dry_run and shard_bytes <= 0
+    aug_params = {
+        "count": count,
+        "min_size": min_size,
+        "vector": vector,
+        "codec": writer_spec.codec,
+        "level": writer_spec.compress_level,
+        "val_fraction": val_fraction,
+        "group_split": group_split,
+    }
+    rng = random.Random(seed)
+    executor = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+    render_pool = RenderPool(workers, executor=executor)
+    total_written = 0
+    total_skipped = 0
+    total_reused = 0
+    total_deleted = 0
+
+    try:
+        for std, sym_list in sorted(by_standard.items()):
+            std_slug = _safe_std_slug(std)
+            dataset_dir = output_dir / f"yolo-{std_slug}"
+            layout = _YoloLayout(
+                img_train=dataset_dir / "images" / "train",
+                img_val=dataset_dir / "images" / "val",
+                lbl_train=dataset_dir / "labels" / "train",
+                lbl_val=dataset_dir / "labels" / "val",
+                val_fraction=val_fraction,
+                group_split=group_split,
+            )
+            output_dirs = (
+                layout.img_train,
+                layout.img_val,
+                layout.lbl_train,
+                layout.lbl_val,
+            )
+
+            categories = sorted({_yolo_class_name(s) for s in sym_list})
+            class_map = {cls: idx for idx, cls in enumerate(categories)}
+            yaml_content = _yolo_data_yaml(dataset_dir, categories)
+
+            print(
+                f"\n[{std}]  {len(sym_list)} symbols, {len(categories)} classes"
+                + (f"  [origin: {origin}]" if origin else "")
+            )
+
+            shards: ShardWriter | None = None
+            if not dry_run:
+                if shard_bytes > 0:
+                    shards = ShardWriter(dataset_dir / SHARD_DIRNAME, shard_bytes)
+                else:
+                    for d in output_dirs:
+                        d.mkdir(parents=True, exist_ok=True)
+                (dataset_dir / "data.yaml").write_text(yaml_content, encoding="utf-8")
+
+            # Render all symbols; build pool for composite generation
+            pool: list[tuple] = []  # (img_arr, class_idx) — all categories mixed
+            spill: SpilledSymbolPool | None = None
+            if stream:
+                spill_dir = Path(tempfile.gettempdir()) if dry_run else output_dir
+                spill = SpilledSymbolPool(
+                    spill_dir / f".pool-{std_slug}-{os.getpid()}.bin"
+                )
+            # (pool index, svg file, stem, bbox)
+            symbol_jobs: list[tuple[int, Path, str, BBox]] = []
+            boxes: list[tuple | None] = []  # tight pixel box per pool entry
+
+            # (symbol, svg file, stem, content hash, params fingerprint)
+            renderable: list[tuple[dict, Path, str, str, str]] = []
+            for sym in sym_list:
+                svg_rel = sym.get("svg_path", "")
+                svg_file = (paths.REPO_ROOT / svg_rel) if svg_rel else None
+                if not svg_file or not svg_file.exists():
+                    total_skipped += 1
+                    continue
+                stem = sym.get("id", svg_file.stem).replace("/", "_")
+                content_hash = (
+                    sym.get("content_hash")
+                    or hashlib.sha256(svg_file.read_bytes()).hexdigest()
+                )
+                params = fingerprint(
+                    {**aug_params, "class": class_map[_yolo_class_name(sym)]}
+                )
+                renderable.append((sym, svg_file, stem, content_hash, params))
+
+            # Incremental export: keep symbols whose manifest entry is current,
+            # delete the outputs of removed and changed ones.  Without a
+            # manifest the outputs of an earlier export are unknown, so that is
+            # a full rebuild.  Either way, files under images/ and labels/ that
+            # the manifest does not list (e.g. from the old i % 5 split, which
+            # may sit in the other split) are deleted so no sample is in both.
+            manifest = ExportManifest(dataset_dir)
+            if tracked:
+                previous = ExportManifest.load(dataset_dir)
+                if incremental and (dataset_dir / MANIFEST_NAME).is_file():
+                    manifest = previous
+                else:
+                    for key in previous.keys():
+                        total_deleted += previous.drop(key)
+                total_deleted += manifest.prune(output_dirs)
+            current = {stem for _, _, stem, _, _ in renderable}
+            for key in manifest.keys():
+                if key != _COMPOSITE_KEY and key not in current:
+                    total_deleted += manifest.drop(key)
+            todo: set[str] = set()
+            for _, _, stem, content_hash, params in renderable:
+                if not manifest.is_current(stem, content_hash, params, seed):
+                    total_deleted += manifest.drop(stem)
+                    todo.add(stem)
+            total_reused += len(renderable) - len(todo)
+
+            comp_params = fingerprint(
+                {
+                    **aug_params,
+                    "compose_count": compose_count,
+                    "compose_symbols": list(compose_symbols),
+                }
+            )
+            comp_hash = fingerprint([(stem, h, p) for _, _, stem, h, p in renderable])
+            compose = compose_count > 0 and not manifest.is_current(
+                _COMPOSITE_KEY, comp_hash, comp_params, seed
+            )
+            if compose:
+                total_deleted += manifest.drop(_COMPOSITE_KEY)
+            if not todo and not compose:
+                print("  Up to date.")
+            # Composites draw from the whole pool; otherwise only render what
+            # is regenerated.
+            if not compose:
+                renderable = [r for r in renderable if r[2] in todo]
+
+            rasters = render_pool.imap(
+                _render_jobs([r[1] for r in renderable], min_size)
+            )
+            for (sym, svg_file, stem, _, _), base_arr in zip(renderable, rasters):
+                class_idx = class_map[_yolo_class_name(sym)]
+                try:
+                    if base_arr is None:
+                        raise ValueError(f"render failed: {svg_file}")
+                    base_arr = _upscale_to_min_size(base_arr, min_size)
+                except Exception:
+                    total_skipped += 1
+                    continue
 
-        # Multi-symbol composite images
-        if pool and compose_count > 0:
-            print(f"  Compositing {compose_count} multi-symbol images...")
-            for i in range(compose_count):
-                canvas, comp_labels = _compose_symbols_image(pool)
-                if not comp_labels:
+                if spill is not None:
+                    index = spill.append(base_arr, class_idx)
+                else:
+                    pool.append((base_arr, class_idx))
+                    index = len(pool) - 1
+
+                box = _tight_bbox_pixels(base_arr)
+                boxes.append(box)
+                if box is None:
+                    total_skipped += 1
+                    continue
+                if stem not in todo:
                     continue
 
-                is_val = i % 5 == 0
-                comp_name = f"composite_{std_slug}_{i + 1}"
-                i_dir = img_val if is_val else img_train
-                l_dir = lbl_val if is_val else lbl_train
+                symbol_jobs.append(
+                    (index, svg_file, stem, _tight_bbox_normalized(base_arr, box))
+                )
 
-                if not dry_run:
-                    Image.fromarray(canvas).save(
-                        i_dir / (comp_name + ".png"), format="PNG"
+            shared: SharedSymbolPool | SpilledSymbolPool | None = None
+            if spill is not None:
+                spill.finalize()
+                shared = spill
+            elif executor is not None and pool:
+                shared = SharedSymbolPool(pool)
+            if shared is not None:
+                pool = shared.entries  # drop the private copies of the rasters
+            pool_size = len(pool)
+            pool_src = shared.handle if executor is not None and shared else pool
+            try:
+                # Per-symbol augmented images; splits are hashed from the
+                # symbol stem and augmentation index (see _split_is_val).
+                sym_args = [
+                    (
+                        pool_src,
+                        index,
+                        *((svg_file, stem) if vector else (stem, bbox)),
+                        count,
+                        layout,
+                        dry_run,
+                        _task_seed(seed, stem, rng),
+                        writer_spec,
                     )
-                    lbl_lines = "\n".join(
-                        f"{cls} {cx:.6f} {cy:.6f} {bw:.6f} {bh:.6f}"
-                        for cls, cx, cy, bw, bh in comp_labels
+                    for index, svg_file, stem, bbox in symbol_jobs
+                ]
+                comp_args: list[tuple] = []
+                if pool_size and compose:
+                    comp_rng = random.Random(
+                        _task_seed(seed, f"composite_{std_slug}", rng)
                     )
-                    (l_dir / (comp_name + ".txt")).write_text(
-                        lbl_lines + "\n", encoding="utf-8"
+                    comp_jobs = [
+                        (i, comp_rng.getrandbits(32)) for i in range(compose_count)
+                    ]
+                    chunk = max(1, -(-compose_count // (workers * 4)))
+                    comp_args = [
+                        (
+                            pool_src,
+                            boxes,
+                            comp_jobs[k : k + chunk],
+                            std_slug,
+                            layout,
+                            dry_run,
+                            *compose_symbols,
+                            writer_spec,
+                        )
+                        for k in range(0, compose_count, chunk)
+                    ]
+
+                sym_task = _yolo_vector_task if vector else _yolo_symbol_task
+                sym_info = {r[2]: r for r in renderable}
+                for (_, _, stem, _), (labels, images) in zip(
+                    symbol_jobs, _run_tasks(executor, sym_task, sym_args, 2 * workers)
+                ):
+                    if not dry_run:
+                        _write_task_output(labels, images, shards)
+                    if tracked:
+                        _, _, _, content_hash, params = sym_info[stem]
+                        manifest.record(
+                            stem,
+                            content_hash,
+                            params,
+                            seed,
+                            _label_outputs(labels, dataset_dir, img_suffix),
+                        )
+                    total_written += len(labels)
+
+                # Multi-symbol composite images
+                if comp_args:
+                    print(f"  Compositing {compose_count} multi-symbol images...")
+                comp_outputs: list[Path] = []
+                for labels, images in _run_tasks(
+                    executor, _yolo_composite_task, comp_args, 2 * workers
+                ):
+                    if not dry_run:
+                        _write_task_output(labels, images, shards)
+                    comp_outputs += _label_outputs(labels, dataset_dir, img_suffix)
+                    total_written += len(labels)
+                if tracked and compose:
+                    manifest.record(
+                        _COMPOSITE_KEY, comp_hash, comp_params, seed, comp_outputs
                     )
-                total_written += 1
+                if tracked:
+                    manifest.save()
+            finally:
+                if shared is not None:
+                    shared.close()
+                if shards is not None:
+                    shards.close()
+    finally:
+        if executor is not None:
+            executor.shutdown()
 
     print(f"\n{'=' * 60}")
     print(f"  Standards     : {len(by_standard)}")
@@ -506,6 +1167,9 @@ def export_yolo_datasets(
     if standard:
         print(f"  Std filter    : {standard}")
     print(f"  Written       : {total_written if not dry_run else 0}")
+    if total_reused or total_deleted:
+        print(f"  Unchanged     : {total_reused}")
+        print(f"  Deleted files : {total_deleted}")
     print(f"  Skipped       : {total_skipped}")
     if dry_run:
         print("  [DRY RUN -- no files written]")
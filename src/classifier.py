@@ -11,10 +11,22 @@ Strategies applied in order by classify():
   4. Generated filename prefix      (valve_ball → valve)
   5. Filename keyword heuristics    (fallback)
   6. unknown                        (if nothing matches)
+
+The rule tables are compiled once at import.  The keyword heuristics become
+an Aho-Corasick automaton, so one pass over the stem finds every keyword.
+The generated and PIP filename prefixes become prefix tries.  classify()
+computes the stem and the path relative to INPUT_DIR once per file
+(_PathInfo) and hands them to every strategy.
+
+classify_many() classifies a batch, resolving folder-level context once per
+directory.  Both entry points memoise results by relative path, and
+classification_summary() / format_summary() tabulate a batch for dashboards.
 """
 
+from collections import Counter, OrderedDict, deque
 from dataclasses import dataclass
 from pathlib import Path
+from typing import Iterable
 
 from . import paths
 from .constants import (
@@ -33,6 +45,161 @@ from .constants import (
 from .utils import _slugify, _extract_standard_from_name
 
 
+class _KeywordAutomaton:
+    """Aho-Corasick automaton over a fixed keyword list.
+
+    matches(text) returns the indices of every keyword occurring in *text*
+    in a single left-to-right pass.
+    """
+
+    __slots__ = ("_delta", "_out")
+
+    def __init__(self, keywords: list[str]) -> None:
+        goto: list[dict[str, int]] = [{}]
+        out: list[tuple[int, ...]] = [()]
+        for index, keyword in enumerate(keywords):
+            node = 0
+            for ch in keyword:
+                nxt = goto[node].get(ch)
+                if nxt is None:
+                    nxt = len(goto)
+                    goto[node][ch] = nxt
+                    goto.append({})
+                    out.append(())
+                node = nxt
+            out[node] += (index,)
+
+        # Breadth-first: fold each node's failure transitions into a full
+        # transition table, so matching is one dict lookup per character.
+        fail = [0] * len(goto)
+        delta: list[dict[str, int]] = [dict(goto[0])] + [{} for _ in goto[1:]]
+        queue = deque(goto[0].values())
+        while queue:
+            node = queue.popleft()
+            delta[node] = {**delta[fail[node]], **goto[node]}
+            for ch, nxt in goto[node].items():
+                queue.append(nxt)
+                fail[nxt] = delta[fail[node]].get(ch, 0)
+                out[nxt] += out[fail[nxt]]
+        self._delta, self._out = delta, out
+
+    def matches(self, text: str) -> set[int]:
+        delta, out = self._delta, self._out
+        node = 0
+        found: set[int] = set()
+        for ch in text:
+            node = delta[node].get(ch, 0)
+            if out[node]:
+                found.update(out[node])
+        return found
+
+
+class _PrefixTrie:
+    """Prefix trie over a list of keys, remembering each key's list position.
+
+    first_match(text) returns the position of the earliest-listed key that
+    *text* starts with (the same answer as a linear startswith() scan).
+    """
+
+    __slots__ = ("_root",)
+    _END = None
+
+    def __init__(self, keys: list[str]) -> None:
+        self._root: dict = {}
+        for order, key in enumerate(keys):
+            node = self._root
+            for ch in key:
+                node = node.setdefault(ch, {})
+            node.setdefault(self._END, order)
+
+    def first_match(self, text: str) -> int | None:
+        node = self._root
+        best: int | None = None
+        for ch in text:
+            node = node.get(ch)
+            if node is None:
+                break
+            order = node.get(self._END)
+            if order is not None and (best is None or order < best):
+                best = order
+        return best
+
+
+_KEYWORDS = _KeywordAutomaton([kw for kw, _ in KEYWORD_HEURISTICS])
+# Strategy 5 order: longer keywords first, ties in list order.
+_KEYWORD_RANK = {
+    index: rank
+    for rank, index in enumerate(
+        sorted(
+            range(len(KEYWORD_HEURISTICS)), key=lambda i: -len(KEYWORD_HEURISTICS[i][0])
+        )
+    )
+}
+_GENERATED_PREFIXES = list(GENERATED_PREFIX_MAP.items())
+_GENERATED_TRIE = _PrefixTrie([prefix for prefix, _ in _GENERATED_PREFIXES])
+_PIPING_TRIE = _PrefixTrie(list(PIPING_STEM_PREFIXES))
+
+CLASSIFY_CACHE_SIZE: int = 100_000
+
+
+def _relative_parts(path: Path) -> tuple[str, ...] | None:
+    """Parts of *path* relative to INPUT_DIR, or None if it lies outside."""
+    parts, base = path.parts, paths.INPUT_DIR.parts
+    if parts[: len(base)] == base:
+        return parts[len(base) :]
+    try:  # case-insensitive filesystems
+        return path.relative_to(paths.INPUT_DIR).parts
+    except ValueError:
+        return None
+
+
+def _part_standard(parts: tuple[str, ...]) -> str | None:
+    """Standard implied by the first path part starting with isa/iso."""
+    for part in parts:
+        if part.lower().startswith("isa"):
+            return "ISA"
+        if part.lower().startswith("iso"):
+            return "ISO 10628-2"
+    return None
+
+
+@dataclass(frozen=True, slots=True)
+class _FolderInfo:
+    """Per-directory values, shared by every file in the folder."""
+
+    rel_parts: tuple[str, ...] | None  # parts relative to INPUT_DIR
+    downloaded_category: str | None  # DOWNLOADED_FOLDER_MAP entry of the folder name
+    part_standard: str | None  # isa/iso implied by the folder's own parts
+
+    @classmethod
+    def of(cls, folder: Path) -> "_FolderInfo":
+        return cls(
+            _relative_parts(folder),
+            DOWNLOADED_FOLDER_MAP.get(folder.name),
+            _part_standard(folder.parts),
+        )
+
+
+@dataclass(frozen=True, slots=True)
+class _PathInfo:
+    """Per-file values shared by all strategies, computed once."""
+
+    path: Path
+    stem: str
+    stem_low: str
+    rel_parts: tuple[str, ...] | None  # parts relative to INPUT_DIR
+    folder: _FolderInfo
+
+    @classmethod
+    def of(cls, svg_path: Path, folder: _FolderInfo | None = None) -> "_PathInfo":
+        folder = folder or _FolderInfo.of(svg_path.parent)
+        rel_parts = folder.rel_parts
+        if rel_parts is not None:
+            rel_parts += (svg_path.name,)
+        stem = svg_path.stem
+        return cls(svg_path, stem, stem.lower(), rel_parts, folder)
+
+
 @dataclass(frozen=True, slots=True)
 class ClassificationResult:
     """Immutable classification result for a P&ID symbol."""
@@ -44,9 +211,12 @@ class ClassificationResult:
     method: str
 
 
-def _strategy_reference_sheet(svg_path: Path) -> ClassificationResult | None:
+_RESULT_CACHE: OrderedDict[tuple[str, str], ClassificationResult] = OrderedDict()
+
+
+def _strategy_reference_sheet(info: _PathInfo) -> ClassificationResult | None:
     """Strategy 0: Detect full reference sheets / drawings (not individual symbols)."""
-    stem = svg_path.stem
+    stem = info.stem
     if _REFERENCE_RE.search(stem):
         standard = _extract_standard_from_name(stem) or "ISO 10628-2"
         return ClassificationResult(
@@ -59,11 +229,10 @@ def _strategy_reference_sheet(svg_path: Path) -> ClassificationResult | None:
     return None
 
 
-def _strategy_autocad_folder(svg_path: Path) -> ClassificationResult | None:
+def _strategy_autocad_folder(info: _PathInfo) -> ClassificationResult | None:
     """Strategy 1: autocad-parser subfolder naming."""
-    try:
-        rel_parts = svg_path.relative_to(paths.INPUT_DIR).parts
-    except ValueError:
+    rel_parts = info.rel_parts
+    if rel_parts is None:
         return None
 
     if rel_parts[0] != "autocad-parser" or len(rel_parts) < 2:
@@ -74,17 +243,17 @@ def _strategy_autocad_folder(svg_path: Path) -> ClassificationResult | None:
         return None
 
     standard, category = AUTOCAD_FOLDER_MAP[folder]
-    stem = svg_path.stem
-
-    for pip_prefix in PIPING_STEM_PREFIXES:
-        if stem.lower().startswith(pip_prefix):
-            return ClassificationResult(
-                standard=Standard("PIP"),
-                category=Category(category),
-                subcategory=Subcategory(stem[len(pip_prefix) :]),
-                confidence=Confidence("high"),
-                method="autocad_folder_map",
-            )
+    stem = info.stem
+
+    pip = _PIPING_TRIE.first_match(info.stem_low)
+    if pip is not None:
+        return ClassificationResult(
+            standard=Standard("PIP"),
+            category=Category(category),
+            subcategory=Subcategory(stem[len(PIPING_STEM_PREFIXES[pip]) :]),
+            confidence=Confidence("high"),
+            method="autocad_folder_map",
+        )
 
     subcategory = stem
     for prefix in (
@@ -95,7 +264,7 @@ def _strategy_autocad_folder(svg_path: Path) -> ClassificationResult | None:
         "pip_",
         "pipa_",
     ):
-        if stem.lower().startswith(prefix):
+        if info.stem_low.startswith(prefix):
             subcategory = stem[len(prefix) :]
             break
 
@@ -108,22 +277,20 @@ def _strategy_autocad_folder(svg_path: Path) -> ClassificationResult | None:
     )
 
 
-def _strategy_filename_standard(svg_path: Path) -> ClassificationResult | None:
+def _strategy_filename_standard(info: _PathInfo) -> ClassificationResult | None:
     """Strategy 2: Standard tag embedded in filename e.g. '(ISO 10628-2)'."""
-    stem = svg_path.stem
+    stem = info.stem
     standard = _extract_standard_from_name(stem)
     if not standard:
         return None
 
-    parent = svg_path.parent.name
-    category = DOWNLOADED_FOLDER_MAP.get(parent)
+    category = info.folder.downloaded_category
 
     if not category:
-        stem_low = stem.lower()
-        for kw, cat in KEYWORD_HEURISTICS:
-            if kw in stem_low:
-                category = cat
-                break
+        # First keyword in list order.
+        found = _KEYWORDS.matches(info.stem_low)
+        if found:
+            category = KEYWORD_HEURISTICS[min(found)][1]
         else:
             category = "uncategorized"
 
@@ -139,11 +306,10 @@ def _strategy_filename_standard(svg_path: Path) -> ClassificationResult | None:
     )
 
 
-def _strategy_downloaded_folder(svg_path: Path) -> ClassificationResult | None:
+def _strategy_downloaded_folder(info: _PathInfo) -> ClassificationResult | None:
     """Strategy 3: pid-symbols-generator/downloaded subfolder map."""
-    try:
-        rel_parts = svg_path.relative_to(paths.INPUT_DIR).parts
-    except ValueError:
+    rel_parts = info.rel_parts
+    if rel_parts is None:
         return None
 
     if rel_parts[0] != "pid-symbols-generator":
@@ -158,8 +324,7 @@ def _strategy_downloaded_folder(svg_path: Path) -> ClassificationResult | None:
     if not category:
         return None
 
-    stem = svg_path.stem
-    clean_stem = _STANDARD_RE.sub("", stem).strip().strip(",").strip()
+    clean_stem = _STANDARD_RE.sub("", info.stem).strip().strip(",").strip()
 
     return ClassificationResult(
         standard=Standard("ISO 10628-2"),
@@ -170,11 +335,10 @@ def _strategy_downloaded_folder(svg_path: Path) -> ClassificationResult | None:
     )
 
 
-def _strategy_generated_prefix(svg_path: Path) -> ClassificationResult | None:
+def _strategy_generated_prefix(info: _PathInfo) -> ClassificationResult | None:
     """Strategy 4: pid-symbols-generator/generated filename prefix."""
-    try:
-        rel_parts = svg_path.relative_to(paths.INPUT_DIR).parts
-    except ValueError:
+    rel_parts = info.rel_parts
+    if rel_parts is None:
         return None
 
     if rel_parts[0] != "pid-symbols-generator":
@@ -182,45 +346,39 @@ def _strategy_generated_prefix(svg_path: Path) -> ClassificationResult | None:
     if len(rel_parts) < 2 or rel_parts[1] != "generated":
         return None
 
-    stem = svg_path.stem
-    for prefix, (standard, category) in GENERATED_PREFIX_MAP.items():
-        if stem.startswith(prefix):
-            return ClassificationResult(
-                standard=Standard(standard),
-                category=Category(category),
-                subcategory=Subcategory(stem[len(prefix) :]),
-                confidence=Confidence("high"),
-                method="generated_prefix_map",
-            )
-
-    return None
+    match = _GENERATED_TRIE.first_match(info.stem)
+    if match is None:
+        return None
+    prefix, (standard, category) = _GENERATED_PREFIXES[match]
+    return ClassificationResult(
+        standard=Standard(standard),
+        category=Category(category),
+        subcategory=Subcategory(info.stem[len(prefix) :]),
+        confidence=Confidence("high"),
+        method="generated_prefix_map",
+    )
 
 
-def _strategy_keyword_heuristics(svg_path: Path) -> ClassificationResult | None:
+def _strategy_keyword_heuristics(info: _PathInfo) -> ClassificationResult | None:
     """Strategy 5: Generic keyword scan of the filename stem.
-    Longer/more-specific keywords are checked before shorter ones."""
-    stem_low = svg_path.stem.lower()
-    for keyword, category in sorted(KEYWORD_HEURISTICS, key=lambda x: -len(x[0])):
-        if keyword in stem_low:
-            standard = "unknown"
-            for part in svg_path.parts:
-                if part.lower().startswith("isa"):
-                    standard = "ISA"
-                    break
-                if part.lower().startswith("iso"):
-                    standard = "ISO 10628-2"
-                    break
-            return ClassificationResult(
-                standard=Standard(standard),
-                category=Category(category),
-                subcategory=Subcategory(_slugify(svg_path.stem)),
-                confidence=Confidence("low"),
-                method="keyword_heuristic",
-            )
-    return None
+    Longer/more-specific keywords win over shorter ones."""
+    found = _KEYWORDS.matches(info.stem_low)
+    if not found:
+        return None
+    category = KEYWORD_HEURISTICS[min(found, key=_KEYWORD_RANK.__getitem__)][1]
+    standard = (
+        info.folder.part_standard or _part_standard((info.path.name,)) or "unknown"
+    )
+    return ClassificationResult(
+        standard=Standard(standard),
+        category=Category(category),
+        subcategory=Subcategory(_slugify(info.stem)),
+        confidence=Confidence("low"),
+        method="keyword_heuristic",
+    )
 
 
-def classify(svg_path: Path) -> ClassificationResult:
+def _classify_info(info: _PathInfo) -> ClassificationResult:
     """Run all strategies in order; fall back to 'unknown'."""
     for strategy in (
         _strategy_reference_sheet,
@@ -230,14 +388,104 @@ def classify(svg_path: Path) -> ClassificationResult:
         _strategy_generated_prefix,
         _strategy_keyword_heuristics,
     ):
-        result = strategy(svg_path)
+        result = strategy(info)
         if result:
             return result
 
     return ClassificationResult(
         standard=Standard("unknown"),
         category=Category("unknown"),
-        subcategory=Subcategory(_slugify(svg_path.stem)),
+        subcategory=Subcategory(_slugify(info.stem)),
         confidence=Confidence("none"),
         method="unclassified",
     )
+
+
+def _cache_key(svg_path: Path, rel_parts: tuple[str, ...] | None) -> tuple[str, str]:
+    """Result-cache key: (INPUT_DIR, relative path); absolute path outside it."""
+    if rel_parts is None:
+        return "", str(svg_path)
+    return str(paths.INPUT_DIR), "/".join(rel_parts)
+
+
+def _classify_cached(
+    svg_path: Path, rel_parts: tuple[str, ...] | None, folder: _FolderInfo | None
+) -> ClassificationResult:
+    key = _cache_key(svg_path, rel_parts)
+    result = _RESULT_CACHE.get(key)
+    if result is not None:
+        _RESULT_CACHE.move_to_end(key)
+        return result
+    result = _classify_info(_PathInfo.of(svg_path, folder))
+    _RESULT_CACHE[key] = result
+    if len(_RESULT_CACHE) > CLASSIFY_CACHE_SIZE:
+        _RESULT_CACHE.popitem(last=False)
+    return result
+
+
+def classify(svg_path: Path) -> ClassificationResult:
+    """Run all strategies in order; fall back to 'unknown'.
+
+    Results are memoised by relative path (see classify_many).
+    """
+    return _classify_cached(svg_path, _relative_parts(svg_path), None)
+
+
+def classify_many(svg_paths: Iterable[Path]) -> list[ClassificationResult]:
+    """Classify many files; returns results in input order.
+
+    Folder-level context (path relative to INPUT_DIR, folder-name maps,
+    isa/iso path parts) is resolved once per parent directory.  A result
+    depends only on the relative path, so results are memoised in an LRU
+    (CLASSIFY_CACHE_SIZE entries) shared with classify().
+    """
+    folders: dict[Path, _FolderInfo] = {}
+    results: list[ClassificationResult] = []
+    for svg_path in svg_paths:
+        parent = svg_path.parent
+        folder = folders.get(parent)
+        if folder is None:
+            folder = folders[parent] = _FolderInfo.of(parent)
+        rel_parts = folder.rel_parts
+        if rel_parts is not None:
+            rel_parts += (svg_path.name,)
+        results.append(_classify_cached(svg_path, rel_parts, folder))
+    return results
+
+
+def clear_classify_cache() -> None:
+    """Forget memoised results (e.g. after changing the rule tables)."""
+    _RESULT_CACHE.clear()
+
+
+SummaryRow = tuple[str, str, str, str, int]
+SUMMARY_HEADER: tuple[str, ...] = (
+    "standard",
+    "category",
+    "confidence",
+    "method",
+    "count",
+)
+
+
+def classification_summary(results: Iterable[ClassificationResult]) -> list[SummaryRow]:
+    """Count results per (standard, category, confidence, method), most common first."""
+    counts = Counter((r.standard, r.category, r.confidence, r.method) for r in results)
+    return [
+        (*key, n) for key, n in sorted(counts.items(), key=lambda kv: (-kv[1], kv[0]))
+    ]
+
+
+def format_summary(rows: list[SummaryRow]) -> str:
+    """Render summary rows as a fixed-width text table."""
+    table = [SUMMARY_HEADER] + [tuple(str(v) for v in row) for row in rows]
+    widths = [max(len(row[i]) for row in table) for i in range(len(SUMMARY_HEADER))]
+    lines = [
+        "  ".join(
+            v.rjust(w) if i == len(widths) - 1 else v.ljust(w)
+            for i, (v, w) in enumerate(zip(row, widths))
+        )
+        for row in table
+    ]
+    lines.insert(1, "  ".join("-" * w for w in widths))
+    return "\n".join(lines)
@@ -240,23 +240,38 @@ PIPING_STEM_PREFIXES: tuple[str, ...] = ("pip_", "pipa_")
 
 # SVG minification
 
-# Ordered list of (compiled regex, replacement) for SVG minification
-_MINIFY_PATTERNS: list[tuple[re.Pattern, str]] = [
+# Ordered list of (compiled regex, replacement, literals) for SVG minification.
+# A pattern can only match when one of its literals occurs in the text, so
+# _minify_svg skips it otherwise.
+_MINIFY_PATTERNS: list[tuple[re.Pattern, str, tuple[str, ...]]] = [
     # XML declaration
-    (re.compile(r"<\?xml[^?]*\?>\s*\n?"), ""),
+    (re.compile(r"<\?xml[^?]*\?>\s*\n?"), "", ("<?xml",)),
     # DOCTYPE declaration (handles quoted system identifiers)
-    (re.compile(r"<!DOCTYPE[^[>]*(?:\[[^\]]*\])?\s*>\s*\n?", re.DOTALL), ""),
+    (
+        re.compile(r"<!DOCTYPE[^[>]*(?:\[[^\]]*\])?\s*>\s*\n?", re.DOTALL),
+        "",
+        ("<!DOCTYPE",),
+    ),
     # <metadata>...</metadata> block
-    (re.compile(r"\s*<metadata\b[^>]*>.*?</metadata>\s*", re.DOTALL), "\n"),
+    (
+        re.compile(r"\s*<metadata\b[^>]*>.*?</metadata>\s*", re.DOTALL),
+        "\n",
+        ("<metadata",),
+    ),
     # Inkscape / sodipodi self-closing elements
-    (re.compile(r"\s*<(?:sodipodi|inkscape):[^\s>][^/]*/>\s*", re.DOTALL), ""),
+    (
+        re.compile(r"\s*<(?:sodipodi|inkscape):[^\s>][^/]*/>\s*", re.DOTALL),
+        "",
+        ("<sodipodi:", "<inkscape:"),
+    ),
     # Inkscape / sodipodi block elements
     (
         re.compile(r"\s*<(sodipodi|inkscape):[^\s>][^>]*>.*?</\1:[^>]*>\s*", re.DOTALL),
         "",
+        ("<sodipodi:", "<inkscape:"),
     ),
     # Collapse 3+ consecutive blank lines to one
-    (re.compile(r"\n{3,}"), "\n\n"),
+    (re.compile(r"\n{3,}"), "\n\n", ("\n\n\n",)),
 ]
 
 # Degradation / Augmentation constants
@@ -0,0 +1,251 @@
+"""
+content_classifier.py
+--------------------
+Content-based classification stage for symbols the path rules cannot place.
+
+classify() only looks at names and folders.  When those say nothing, the
+result is unknown / confidence "none".  This stage looks at the drawing
+itself instead:
+
+  1. svg_features() turns the parsed geometry (svg_geometry.load_geometry,
+     shared with snap-point detection) into a compact vector: element
+     counts, circle ratio, aspect, and segment-length and orientation
+     statistics (FEATURE_NAMES).
+  2. ContentIndex stores the vectors of already-classified symbols as one
+     standardised NumPy matrix.  query() answers a whole batch with a
+     vectorised k-nearest-neighbour search and an inverse-distance vote.
+  3. refine_with_content() re-labels the unknowns in a batch of results.
+     The index is built from the batch's own high-confidence results.  A
+     prediction is kept only when its vote share reaches MIN_VOTE_SHARE; it
+     is then reported with confidence "low" and method "content_knn".
+
+numpy is imported lazily inside functions.
+"""
+
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Any, Sequence
+
+from .classifier import ClassificationResult
+from .constants import Category, Confidence, Standard
+from .svg_geometry import load_geometry
+
+KNN_K: int = 5
+MIN_VOTE_SHARE: float = 0.6
+KNN_BLOCK: int = 1024
+
+FEATURE_NAMES: tuple[str, ...] = (
+    "paths",  # log1p of per-tag element counts ...
+    "lines",
+    "circles",
+    "rects",
+    "polys",
+    "texts",
+    "elements",  # ... and of all drawn elements
+    "circle_ratio",  # circles + ellipses / shape elements
+    "aspect",  # log(width / height) of the frame
+    "segments",  # log1p flattened segment count
+    "seg_len_mean",  # segment length / frame diagonal
+    "seg_len_std",
+    "horizontal",  # share of horizontal segments
+    "vertical",  # share of vertical segments
+    "open_ends",  # log1p open path end count
+    "bubble_area",  # largest ellipse area / frame area
+    "fill",  # drawing bbox area / frame area
+)
+
+_SHAPE_TAGS = ("path", "line", "polyline", "polygon", "rect", "circle", "ellipse")
+
+
+def svg_features(svg_path: Path) -> Any:
+    """Feature vector (len(FEATURE_NAMES) floats) of one SVG; all-NaN if unreadable.
+
+    An unreadable file never aborts a batch: it only drops out of the vote.
+    """
+    import numpy as np
+
+    vec = np.full(len(FEATURE_NAMES), np.nan)
+    try:
+        geom = load_geometry(svg_path)
+    except (OSError, ValueError):
+        return vec
+    if geom is None:
+        return vec
+
+    tags = geom.tag_counts
+    n_circles = tags.get("circle", 0) + tags.get("ellipse", 0)
+    n_shapes = sum(tags.get(t, 0) for t in _SHAPE_TAGS)
+    segs = geom.segments
+    if len(segs) or len(geom.ellipses):
+        lo = np.vstack(
+            [segs.reshape(-1, 2), geom.ellipses[:, 2:] - geom.ellipses[:, :2]]
+        )
+        hi = np.vstack(
+            [segs.reshape(-1, 2), geom.ellipses[:, 2:] + geom.ellipses[:, :2]]
+        )
+        x0, y0 = lo.min(axis=0)
+        x1, y1 = hi.max(axis=0)
+        ink_w, ink_h = x1 - x0, y1 - y0
+    else:
+        ink_w = ink_h = 0.0
+    if geom.view_box is not None and min(geom.view_box[2:]) > 0:
+        width, height = geom.view_box[2:]
+    else:
+        width, height = ink_w, ink_h
+    if width <= 0 or height <= 0:
+        width = height = 1.0
+
+    dx = segs[:, 2] - segs[:, 0]
+    dy = segs[:, 3] - segs[:, 1]
+    length = np.hypot(dx, dy) / np.hypot(width, height)
+    tol = 1e-6 + 0.01 * np.abs(np.stack([dx, dy])).max(axis=0, initial=0)
+    bubble = (np.pi * geom.ellipses[:, 0] * geom.ellipses[:, 1]).max(initial=0)
+
+    vec[:] = [
+        np.log1p(tags.get("path", 0)),
+        np.log1p(tags.get("line", 0)),
+        np.log1p(n_circles),
+        np.log1p(tags.get("rect", 0)),
+        np.log1p(tags.get("polyline", 0) + tags.get("polygon", 0)),
+        np.log1p(tags.get("text", 0) + tags.get("tspan", 0)),
+        np.log1p(sum(tags.values())),
+        n_circles / max(1, n_shapes),
+        np.log(width / height),
+        np.log1p(len(segs)),
+        length.mean() if len(segs) else 0.0,
+        length.std() if len(segs) else 0.0,
+        (np.abs(dy) <= tol).mean() if len(segs) else 0.0,
+        (np.abs(dx) <= tol).mean() if len(segs) else 0.0,
+        np.log1p(len(geom.endpoints)),
+        bubble / (width * height),
+        min(1.0, ink_w * ink_h / (width * height)),
+    ]
+    return vec
+
+
+def feature_matrix(svg_paths: Sequence[Path]) -> Any:
+    """(N, len(FEATURE_NAMES)) float matrix; unreadable files give NaN rows."""
+    import numpy as np
+
+    if not svg_paths:
+        return np.zeros((0, len(FEATURE_NAMES)))
+    return np.vstack([svg_features(p) for p in svg_paths])
+
+
+class ContentIndex:
+    """k-nearest-neighbour index over labelled feature vectors.
+
+    Rows with non-finite features are dropped.  Features are standardised
+    with the reference mean / std, so every dimension weighs the same.
+    """
+
+    __slots__ = ("_mean", "_std", "_ref", "_ref_sq", "_codes", "labels")
+
+    def __init__(self, features: Any, labels: Sequence[str]) -> None:
+        import numpy as np
+
+        features = np.asarray(features, dtype=np.float64)
+        keep = np.isfinite(features).all(axis=1)
+        ref = features[keep]
+        self.labels, codes = np.unique(
+            np.asarray(labels, dtype=object)[keep], return_inverse=True
+        )
+        self._codes = codes.reshape(-1)
+        self._mean = ref.mean(axis=0) if len(ref) else np.zeros(features.shape[1])
+        std = ref.std(axis=0) if len(ref) else np.ones(features.shape[1])
+        self._std = np.where(std > 1e-9, std, 1.0)
+        self._ref = (ref - self._mean) / self._std
+        self._ref_sq = (self._ref**2).sum(axis=1)
+
+    def __len__(self) -> int:
+        return len(self._ref)
+
+    def query(self, features: Any, k: int = KNN_K) -> list[tuple[str, float] | None]:
+        """Majority label and its vote share for each query row.
+
+        Neighbours vote with weight 1 / (distance + eps).  None for rows
+        with non-finite features or when the index is empty.
+        """
+        import numpy as np
+
+        features = np.asarray(features, dtype=np.float64).reshape(-1, len(self._mean))
+        out: list[tuple[str, float] | None] = [None] * len(features)
+        valid = np.flatnonzero(np.isfinite(features).all(axis=1))
+        k = min(k, len(self._ref))
+        if k == 0 or not len(valid):
+            return out
+        for start in range(0, len(valid), KNN_BLOCK):
+            rows = valid[start : start + KNN_BLOCK]
+            q = (features[rows] - self._mean) / self._std
+            d2 = (
+                (q**2).sum(axis=1)[:, None]
+                + self._ref_sq[None, :]
+                - 2 * q @ self._ref.T
+            )
+            nearest = np.argpartition(d2, k - 1, axis=1)[:, :k]
+            dist = np.sqrt(np.maximum(np.take_along_axis(d2, nearest, axis=1), 0))
+            votes = np.zeros((len(rows), len(self.labels)))
+            np.add.at(
+                votes,
+                (np.repeat(np.arange(len(rows)), k), self._codes[nearest].reshape(-1)),
+                (1.0 / (dist + 1e-6)).reshape(-1),
+            )
+            best = votes.argmax(axis=1)
+            share = votes[np.arange(len(rows)), best] / votes.sum(axis=1)
+            for row, code, s in zip(rows.tolist(), best.tolist(), share.tolist()):
+                out[row] = (str(self.labels[code]), s)
+        return out
+
+
+def _needs_content(result: ClassificationResult) -> bool:
+    return result.confidence == "none" or result.category in (
+        "unknown",
+        "uncategorized",
+    )
+
+
+def refine_with_content(
+    svg_paths: Sequence[Path],
+    results: Sequence[ClassificationResult],
+    k: int = KNN_K,
+    min_share: float = MIN_VOTE_SHARE,
+) -> list[ClassificationResult]:
+    """Re-label unknown / uncategorized results by drawing similarity.
+
+    The reference set is every high-confidence result of the batch with a
+    real category.  Returns a new list; confident results pass through.
+    """
+    out = list(results)
+    todo = [i for i, r in enumerate(results) if _needs_content(r)]
+    refs = [
+        i
+        for i, r in enumerate(results)
+        if r.confidence == "high"
+        and not _needs_content(r)
+        and r.category != "reference_sheet"
+    ]
+    if not todo or not refs:
+        return out
+
+    ref_x = feature_matrix([svg_paths[i] for i in refs])
+    query_x = feature_matrix([svg_paths[i] for i in todo])
+    categories = ContentIndex(ref_x, [results[i].category for i in refs])
+    standards = ContentIndex(ref_x, [results[i].standard for i in refs])
+    cat_votes = categories.query(query_x, k)
+    std_votes = standards.query(query_x, k)
+    for i, cat_vote, std_vote in zip(todo, cat_votes, std_votes):
+        if cat_vote is None or cat_vote[1] < min_share:
+            continue
+        old = results[i]
+        standard = old.standard
+        if standard == "unknown" and std_vote is not None and std_vote[1] >= min_share:
+            standard = Standard(std_vote[0])
+        out[i] = ClassificationResult(
+            standard=standard,
+            category=Category(cat_vote[0]),
+            subcategory=old.subcategory,
+            confidence=Confidence("low"),
+            method="content_knn",
+        )
+    return out
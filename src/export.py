@@ -16,6 +16,7 @@ from pathlib import Path
 
 from . import paths
 from .constants import PIP_CATEGORIES, SCHEMA_VERSION
+from .hash_cache import HashCache, content_hashes
 from .metadata import resolve_stem
 from .svg_utils import _minify_svg
 from .utils import (
@@ -295,13 +296,19 @@ def migrate_to_source_hierarchy(processed_dir: Path, dry_run: bool) -> None:
     print(f"{'=' * 60}")
 
 
-def dedup_input(input_dir: Path, dry_run: bool) -> None:
+def dedup_input(
+    input_dir: Path, dry_run: bool, near: bool = False, workers: int = 0
+) -> None:
     """Delete duplicate SVG files from input_dir.
 
     Two SVGs are considered duplicates when their canonical hashes match
     (same structure, ignoring randomly-generated internal IDs and metadata
-    timestamps).  Within each duplicate group the file with the shortest
-    path is kept; all others are deleted (or listed in dry-run mode).
+    timestamps).  Hashes come from the shared HashCache; files that are new or
+    changed since the last run are hashed on *workers* processes, and groups
+    are reported as they form.  With *near*, exact groups whose drawings are
+    near-duplicates (see near_dup) are merged too.  Within each duplicate
+    group the file with the shortest path is kept; all others are deleted (or
+    listed in dry-run mode).
     """
     if not input_dir.is_dir():
         print(f"Error: input directory not found: {input_dir}")
@@ -309,26 +316,46 @@ def dedup_input(input_dir: Path, dry_run: bool) -> None:
 
     svg_files = sorted(input_dir.rglob("*.svg"))
     print(f"Scanning {len(svg_files)} SVG files under {input_dir}\n")
+    candidates = [p for p in svg_files if "_debug" not in p.stem]
+    cache = HashCache.load()
 
     # hash → list of paths, in the order they are encountered
     groups: dict[str, list[Path]] = {}
+    hash_of: dict[Path, str] = {}
     errors = 0
 
-    for svg_path in svg_files:
-        if "_debug" in svg_path.stem:
-            continue
-        try:
-            content = svg_path.read_text(encoding="utf-8", errors="replace")
-            h = _svg_sha256(_minify_svg(content))
-        except OSError:
+    for index, h in content_hashes(candidates, cache, workers=workers):
+        svg_path = candidates[index]
+        if h is None:
             print(f"  [ERROR] cannot read {svg_path.relative_to(input_dir)}")
             errors += 1
             continue
-        groups.setdefault(h, []).append(svg_path)
+        group = groups.setdefault(h, [])
+        group.append(svg_path)
+        hash_of[svg_path] = h
+        if len(group) > 1:
+            print(
+                f"  [{'GRP ' if len(group) == 2 else 'GRP+'}] "
+                f"{svg_path.relative_to(input_dir)} == {group[0].relative_to(input_dir)}"
+            )
+    cache.save()
+
+    # Results arrive in completion order; restore scan order within groups.
+    order = {p: i for i, p in enumerate(candidates)}
+    dup_groups = [sorted(g, key=order.__getitem__) for g in groups.values()]
+    if near:
+        from .near_dup import near_duplicate_groups
+
+        # One representative per exact group; merge groups whose drawings match.
+        by_rep = {paths_list[0]: paths_list for paths_list in dup_groups}
+        dup_groups = [
+            [p for rep in near_group for p in by_rep.pop(rep)]
+            for near_group in near_duplicate_groups(list(by_rep), workers=workers)
+        ] + list(by_rep.values())
 
     to_delete: list[tuple[Path, Path]] = []  # (kept, deleted)
 
-    for paths_list in groups.values():
+    for paths_list in dup_groups:
         if len(paths_list) < 2:
             continue
         # Keep the file with the shortest relative path (usually the more
@@ -344,20 +371,29 @@ def dedup_input(input_dir: Path, dry_run: bool) -> None:
         return
 
     deleted = 0
+    near_found = 0
     for kept, dup in to_delete:
         rel_kept = kept.relative_to(input_dir)
         rel_dup = dup.relative_to(input_dir)
-        print(f"  {'[DRY]' if dry_run else '[DEL ]'} {rel_dup}  (kept: {rel_kept})")
+        kind = "kept"
+        if hash_of[dup] != hash_of[kept]:
+            kind = "near-duplicate of"
+            near_found += 1
+        print(f"  {'[DRY]' if dry_run else '[DEL ]'} {rel_dup}  ({kind}: {rel_kept})")
         if not dry_run:
             try:
                 dup.unlink()
+                cache.forget(dup)
                 deleted += 1
             except OSError as exc:
                 print(f"           ERROR: {exc}")
                 errors += 1
 
+    cache.save()
     print(f"\n{'=' * 60}")
     print(f"  Duplicates found : {len(to_delete)}")
+    if near:
+        print(f"    near-duplicates: {near_found}")
     print(f"  Deleted          : {deleted if not dry_run else 0}")
     if errors:
         print(f"  Errors           : {errors}")
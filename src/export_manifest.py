@@ -0,0 +1,132 @@
+"""
+export_manifest.py
+--------------------
+Manifest of generated dataset outputs, used for incremental YOLO export.
+
+Each entry maps a key (a symbol stem, or the composite set of a standard) to
+the inputs it was generated from and the files it produced:
+
+    {"content_hash": ..., "params": <fingerprint>, "seed": ..., "outputs": [...]}
+
+Output paths are stored relative to the dataset directory.  On the next
+export an entry is current when its content hash, parameter fingerprint and
+seed all match and every output still exists.  Only stale or new keys are
+regenerated.  drop() deletes the outputs of changed or removed keys and
+prune() deletes files in the output directories that no entry lists.
+
+An unseeded export (seed None) is never current: its augmentations were
+random draws, so a rerun without --seed produces fresh ones as before.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+from pathlib import Path
+from typing import Any, Iterable
+
+MANIFEST_NAME: str = "manifest.json"
+
+
+def fingerprint(params: Any) -> str:
+    """Stable short hash of a JSON-serialisable parameter structure."""
+    text = json.dumps(params, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:16]
+
+
+class ExportManifest:
+    """Outputs of one dataset directory, keyed by symbol stem."""
+
+    def __init__(self, root: Path, entries: dict[str, dict] | None = None) -> None:
+        self.root = root
+        self.entries: dict[str, dict] = entries or {}
+
+    @classmethod
+    def load(cls, root: Path) -> "ExportManifest":
+        """Read root/manifest.json; a missing or unreadable file gives an empty one."""
+        try:
+            data = json.loads((root / MANIFEST_NAME).read_text(encoding="utf-8"))
+            entries = data.get("entries", {})
+        except (OSError, json.JSONDecodeError, AttributeError):
+            entries = {}
+        return cls(root, entries)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.entries
+
+    def keys(self) -> list[str]:
+        return list(self.entries)
+
+    def is_current(self, key: str, content_hash: str, params: str, seed) -> bool:
+        """True if *key* was generated from the same inputs and its files exist.
+
+        Always False when *seed* is None.
+        """
+        entry = self.entries.get(key)
+        if entry is None or seed is None:
+            return False
+        if (entry.get("content_hash"), entry.get("params"), entry.get("seed")) != (
+            content_hash,
+            params,
+            seed,
+        ):
+            return False
+        return all((self.root / rel).exists() for rel in entry.get("outputs", ()))
+
+    def record(
+        self,
+        key: str,
+        content_hash: str,
+        params: str,
+        seed,
+        outputs: Iterable[Path],
+    ) -> None:
+        self.entries[key] = {
+            "content_hash": content_hash,
+            "params": params,
+            "seed": seed,
+            "outputs": sorted(
+                path.relative_to(self.root).as_posix() for path in outputs
+            ),
+        }
+
+    def drop(self, key: str) -> int:
+        """Delete the outputs of *key* and forget it; returns the files removed."""
+        entry = self.entries.pop(key, None)
+        if entry is None:
+            return 0
+        removed = 0
+        for rel in entry.get("outputs", ()):
+            path = self.root / rel
+            if path.exists():
+                path.unlink()
+                removed += 1
+        return removed
+
+    def prune(self, dirs: Iterable[Path]) -> int:
+        """Delete files in *dirs* that no entry lists; returns the files removed.
+
+        These are outputs the manifest does not know about, e.g. from an
+        export that predates it or used another split scheme.
+        """
+        known = {
+            self.root / rel
+            for entry in self.entries.values()
+            for rel in entry.get("outputs", ())
+        }
+        removed = 0
+        for directory in dirs:
+            if not directory.is_dir():
+                continue
+            for path in directory.iterdir():
+                if path.is_file() and path not in known:
+                    path.unlink()
+                    removed += 1
+        return removed
+
+    def save(self) -> None:
+        self.root.mkdir(parents=True, exist_ok=True)
+        (self.root / MANIFEST_NAME).write_text(
+            json.dumps({"entries": self.entries}, indent=1, sort_keys=True),
+            encoding="utf-8",
+        )
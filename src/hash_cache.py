@@ -0,0 +1,166 @@
+"""
+hash_cache.py
+--------------------
+Persistent cache of canonical SVG content hashes.
+
+The content hash of a symbol is _svg_sha256(_minify_svg(text)), the value the
+process registry stores as "content_hash" and dedup_input groups by.
+HashCache keeps one entry per file path:
+
+    {"size": ..., "mtime_ns": ..., "hash": ...}
+
+An entry is reused while the file's size and modification time are
+unchanged.  The cache lives at REPO_ROOT/.cache/svg_hashes.json and is shared
+by dedup_input and the process run, so either one warms it for the other.
+
+content_hashes() serves cached files immediately and hashes the rest on a
+process pool in chunks, yielding results as chunks complete.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Iterator, Sequence
+
+from . import paths
+from .svg_utils import _minify_svg
+from .utils import _svg_sha256
+
+CACHE_DIR_NAME: str = ".cache"
+HASH_CACHE_NAME: str = "svg_hashes.json"
+HASH_CHUNK_SIZE: int = 256
+
+
+def default_cache_path() -> Path:
+    return paths.REPO_ROOT / CACHE_DIR_NAME / HASH_CACHE_NAME
+
+
+def svg_file_hash(svg_path: Path) -> str:
+    """Canonical content hash of the SVG file at *svg_path* (raises OSError)."""
+    content = Path(svg_path).read_text(encoding="utf-8", errors="replace")
+    return _svg_sha256(_minify_svg(content))
+
+
+def _hash_chunk(chunk: list[tuple[int, str]]) -> list[tuple[int, str | None, tuple]]:
+    """Worker side: (index, hash or None, (size, mtime_ns)) per (index, path)."""
+    out = []
+    for index, path in chunk:
+        try:
+            st = os.stat(path)
+            out.append((index, svg_file_hash(Path(path)), (st.st_size, st.st_mtime_ns)))
+        except OSError:
+            out.append((index, None, ()))
+    return out
+
+
+class HashCache:
+    """(path, size, mtime) -> content hash, persisted as JSON."""
+
+    def __init__(self, path: Path, entries: dict[str, dict] | None = None) -> None:
+        self.path = path
+        self.entries: dict[str, dict] = entries or {}
+        self.dirty = False
+
+    @classmethod
+    def load(cls, path: Path | None = None) -> "HashCache":
+        """Read the cache file; a missing or unreadable file gives an empty cache."""
+        path = path or default_cache_path()
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+            entries = data.get("entries", {})
+        except (OSError, json.JSONDecodeError, AttributeError):
+            entries = {}
+        return cls(path, entries)
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def get(self, svg_path: Path) -> str | None:
+        """Cached hash of *svg_path* if the file is unchanged since it was stored."""
+        entry = self.entries.get(str(svg_path))
+        if entry is None:
+            return None
+        try:
+            st = svg_path.stat()
+        except OSError:
+            return None
+        if (entry.get("size"), entry.get("mtime_ns")) != (st.st_size, st.st_mtime_ns):
+            return None
+        return entry.get("hash")
+
+    def put(
+        self, svg_path: Path, digest: str, stat: tuple[int, int] | None = None
+    ) -> None:
+        """Record *digest* for *svg_path* at its current (or given) size / mtime."""
+        if stat is None:
+            st = svg_path.stat()
+            stat = (st.st_size, st.st_mtime_ns)
+        self.entries[str(svg_path)] = {
+            "size": stat[0],
+            "mtime_ns": stat[1],
+            "hash": digest,
+        }
+        self.dirty = True
+
+    def forget(self, svg_path: Path) -> None:
+        if self.entries.pop(str(svg_path), None) is not None:
+            self.dirty = True
+
+    def save(self) -> None:
+        """Write the cache atomically if anything changed."""
+        if not self.dirty:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(".tmp")
+        tmp.write_text(
+            json.dumps({"entries": self.entries}, separators=(",", ":")),
+            encoding="utf-8",
+        )
+        os.replace(tmp, self.path)
+        self.dirty = False
+
+
+def content_hashes(
+    svg_paths: Sequence[Path],
+    cache: HashCache,
+    workers: int = 0,
+    chunk_size: int = HASH_CHUNK_SIZE,
+) -> Iterator[tuple[int, str | None]]:
+    """Yield (index into *svg_paths*, hash or None if unreadable), cached first.
+
+    Files missing from *cache* are hashed on *workers* processes (0 = all
+    cores; one chunk or fewer runs in-process) and recorded in *cache* as
+    their chunk completes.  Results arrive in completion order.
+    """
+    todo: list[tuple[int, str]] = []
+    for index, svg_path in enumerate(svg_paths):
+        digest = cache.get(svg_path)
+        if digest is None:
+            todo.append((index, str(svg_path)))
+        else:
+            yield index, digest
+
+    chunks = [todo[k : k + chunk_size] for k in range(0, len(todo), chunk_size)]
+    if workers < 1:
+        workers = os.cpu_count() or 1
+    if workers == 1 or len(chunks) <= 1:
+        results = map(_hash_chunk, chunks)
+        executor = None
+    else:
+        executor = ProcessPoolExecutor(max_workers=min(workers, len(chunks)))
+        results = (
+            f.result()
+            for f in as_completed(executor.submit(_hash_chunk, c) for c in chunks)
+        )
+    try:
+        for result in results:
+            for index, digest, stat in result:
+                if digest is not None:
+                    cache.put(svg_paths[index], digest, stat)
+                yield index, digest
+    finally:
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
@@ -0,0 +1,124 @@
+"""
+image_codecs.py
+--------------------
+Image codecs available to the augmentation writers (see image_writer).
+
+Each codec encodes an (H, W, 3) uint8 frame to bytes, decodes it back, and
+maps a common `level` (0 = fastest, 9 = smallest) onto its own knobs:
+
+  png   zlib compress_level = level (Pillow; 6 is Pillow's default)
+  webp  lossless WebP; method 0-6 and effort 0-100 scale with level.
+        Usually much smaller than PNG at a similar encode cost.
+  qoi   QOI (optional `qoi` package, pip install qoi); level is ignored.
+        Encodes several times faster than PNG and stays lossless.
+  npy   uncompressed NumPy .npy; level is ignored.  No encode cost, largest
+        files, and loaders get arrays back with zero decode cost.
+
+Heavy dependencies (numpy, Pillow, qoi) are imported lazily inside functions.
+"""
+
+from __future__ import annotations
+
+import io
+from dataclasses import dataclass
+from typing import Any, Callable
+
+DEFAULT_CODEC: str = "png"
+DEFAULT_LEVEL: int = 6
+
+
+def _encode_png(arr, level: int) -> bytes:
+    from PIL import Image
+
+    buf = io.BytesIO()
+    Image.fromarray(arr).save(buf, format="PNG", compress_level=level)
+    return buf.getvalue()
+
+
+def _encode_webp(arr, level: int) -> bytes:
+    from PIL import Image
+
+    buf = io.BytesIO()
+    Image.fromarray(arr).save(
+        buf,
+        format="WEBP",
+        lossless=True,
+        method=round(level * 6 / 9),
+        quality=round(level * 100 / 9),
+    )
+    return buf.getvalue()
+
+
+def _decode_pillow(data: bytes):
+    import numpy as np
+    from PIL import Image
+
+    with Image.open(io.BytesIO(data)) as img:
+        return np.asarray(img.convert("RGB"))
+
+
+def _import_qoi():
+    try:
+        import qoi
+    except ImportError as exc:
+        raise ImportError(
+            "the qoi codec needs the qoi package: pip install qoi"
+        ) from exc
+    return qoi
+
+
+def _encode_qoi(arr, _level: int) -> bytes:
+    import numpy as np
+
+    return _import_qoi().encode(np.ascontiguousarray(arr))
+
+
+def _decode_qoi(data: bytes):
+    return _import_qoi().decode(data)
+
+
+def _encode_npy(arr, _level: int) -> bytes:
+    import numpy as np
+
+    buf = io.BytesIO()
+    np.save(buf, np.ascontiguousarray(arr), allow_pickle=False)
+    return buf.getvalue()
+
+
+def _decode_npy(data: bytes):
+    import numpy as np
+
+    return np.load(io.BytesIO(data), allow_pickle=False)
+
+
+@dataclass(frozen=True, slots=True)
+class ImageCodec:
+    """One output format: file suffix plus encode / decode functions."""
+
+    name: str
+    suffix: str
+    encode: Callable[[Any, int], bytes]
+    decode: Callable[[bytes], Any]
+
+
+CODECS: dict[str, ImageCodec] = {
+    "png": ImageCodec("png", ".png", _encode_png, _decode_pillow),
+    "webp": ImageCodec("webp", ".webp", _encode_webp, _decode_pillow),
+    "qoi": ImageCodec("qoi", ".qoi", _encode_qoi, _decode_qoi),
+    "npy": ImageCodec("npy", ".npy", _encode_npy, _decode_npy),
+}
+
+
+def get_codec(name: str) -> ImageCodec:
+    """Return the codec called *name*; raises ValueError for unknown names."""
+    try:
+        return CODECS[name.lower()]
+    except KeyError:
+        raise ValueError(
+            f"unknown image codec {name!r} (choose from {', '.join(CODECS)})"
+        ) from None
+
+
+def decode_image(data: bytes, suffix: str):
+    """Decode bytes written by any codec, picked by file suffix (".png", ...)."""
+    return get_codec(suffix.lstrip(".")).decode(data)
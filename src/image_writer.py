@@ -0,0 +1,141 @@
+"""
+image_writer.py
+--------------------
+Background image writer shared by the augmentation and YOLO exporters.
+
+ImageWriter encodes and saves frames on a small thread pool (the image
+encoders release the GIL) behind a bounded queue: save() blocks once `max_pending`
+frames are in flight, so generation of frame N+1 overlaps encoding of frame N
+without unbounded memory growth.
+
+ImageWriterSpec is the small, picklable configuration passed to worker
+processes; each task opens its own writer from it.  With collect=True frames are
+encoded in memory instead of saved, and take() returns (path, bytes) pairs for
+a packed sink such as shards.ShardWriter.
+
+The output format is any codec from image_codecs (png, lossless webp, qoi,
+npy); `compress_level` is its 0 (fastest) - 9 (smallest) speed/size knob.
+"""
+
+from __future__ import annotations
+
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+from .image_codecs import DEFAULT_CODEC, DEFAULT_LEVEL, get_codec
+
+PNG_COMPRESS_LEVEL_DEFAULT: int = DEFAULT_LEVEL  # Pillow's default
+
+
+@dataclass(frozen=True, slots=True)
+class ImageWriterSpec:
+    """How augmentation outputs are encoded and how many writes may queue."""
+
+    compress_level: int = PNG_COMPRESS_LEVEL_DEFAULT
+    threads: int = 2
+    max_pending: int = 8
+    collect: bool = False
+    codec: str = DEFAULT_CODEC
+
+    def open(self) -> "ImageWriter":
+        return ImageWriter(self)
+
+
+class ImageWriter:
+    """Bounded asynchronous image writer; use as a context manager.
+
+    Callers name outputs with `suffix` (".png", ".webp", ...).  close() waits
+    for every queued write.  Failed writes are counted in `errors` (the first
+    exception is kept in `first_error`) instead of being raised from the
+    generation loop.
+    """
+
+    def __init__(self, spec: ImageWriterSpec | None = None) -> None:
+        self.spec = spec or ImageWriterSpec()
+        self.codec = get_codec(self.spec.codec)
+        self.suffix = self.codec.suffix
+        self.errors = 0
+        self.first_error: BaseException | None = None
+        self._collected: list[tuple[Path, Any]] = []
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(max(1, self.spec.max_pending))
+        self._pool = (
+            ThreadPoolExecutor(
+                max_workers=self.spec.threads, thread_name_prefix="image-writer"
+            )
+            if self.spec.threads > 0
+            else None
+        )
+
+    def _write(self, arr: Any, path: Path) -> bytes | None:
+        data = self.codec.encode(arr, self.spec.compress_level)
+        if self.spec.collect:
+            return data
+        path.write_bytes(data)
+        return None
+
+    def _done(self, future: Future) -> None:
+        self._slots.release()
+        exc = future.exception()
+        if exc is not None:
+            with self._lock:
+                self.errors += 1
+                if self.first_error is None:
+                    self.first_error = exc
+
+    def save(self, arr: Any, path: Path) -> None:
+        """Queue *arr* to be written to *path*; blocks while the queue is full.
+
+        The caller must not modify *arr* afterwards.
+        """
+        if self._pool is None:
+            try:
+                data = self._write(arr, path)
+            except Exception as exc:
+                self.errors += 1
+                if self.first_error is None:
+                    self.first_error = exc
+                return
+            if self.spec.collect:
+                self._collected.append((path, data))
+            return
+        self._slots.acquire()
+        future = self._pool.submit(self._write, arr, path)
+        future.add_done_callback(self._done)
+        if self.spec.collect:
+            self._collected.append((path, future))
+
+    def take(self) -> list[tuple[Path, bytes]]:
+        """Collect mode: wait for the queued frames and return them in save order.
+
+        Failed frames are left out (they are counted in `errors`).
+        """
+        taken: list[tuple[Path, bytes]] = []
+        for path, result in self._collected:
+            if isinstance(result, Future):
+                if result.exception() is not None:
+                    continue
+                result = result.result()
+            taken.append((path, result))
+        self._collected = []
+        return taken
+
+    def close(self) -> None:
+        """Wait for all queued writes to finish."""
+        if self._pool is not None:
+            self._pool.shutdown(wait=True)
+            self._pool = None
+
+    def check(self) -> None:
+        """Raise the first write error, if any (call after close())."""
+        if self.first_error is not None:
+            raise self.first_error
+
+    def __enter__(self) -> "ImageWriter":
+        return self
+
+    def __exit__(self, *_exc) -> None:
+        self.close()
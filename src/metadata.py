@@ -131,8 +131,12 @@ def build_metadata(
     final_stem: str,
     classification: ClassificationT,
     source_path: str = "",
+    snap_points: list[dict] | None = None,
 ) -> dict:
-    """Assemble the complete metadata dict for one SVG."""
+    """Assemble the complete metadata dict for one SVG.
+
+    Pass *snap_points* when the caller has already detected them.
+    """
     svg_attrs = parse_svg_attributes(svg_path)
     src_path = source_path or _rel_or_abs(svg_path, paths.REPO_ROOT)
     source_slug = _source_slug_from_path(src_path)
@@ -176,6 +180,10 @@ def build_metadata(
         "tags": _auto_tags(
             _get_category(classification), _get_subcategory(classification)
         ),
-        "snap_points": detect_snap_points(svg_path, _get_category(classification)),
+        "snap_points": (
+            snap_points
+            if snap_points is not None
+            else detect_snap_points(svg_path, _get_category(classification))
+        ),
         "notes": "",
     }
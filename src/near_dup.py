@@ -0,0 +1,276 @@
+"""
+near_dup.py
+--------------------
+Near-duplicate detection for SVG symbols.
+
+Exact dedup (_svg_sha256 of the canonicalised SVG) misses copies that differ
+only in float precision, attribute order, stroke widths or colours.  This
+module compares what is drawn instead:
+
+  1. Geometry signature -- the flattened segments and ellipses from
+     svg_geometry.load_geometry, in viewBox units (the drawing's bounding
+     box without one), quantised to an NEAR_DUP_GRID grid.  Each segment or
+     ellipse becomes one integer cell token that also carries its paint
+     flags (filled / dashed), so a dashed line never matches a solid one.
+  2. Perceptual hash (optional) -- a 64-bit DCT hash of a PHASH_SIZE
+     thumbnail rendered through a RenderPool.
+  3. MinHash + LSH -- the cells, coarsened to an LSH_GRID grid so small
+     offsets rarely change them, are summarised by MINHASH_PERMS minimums
+     and split into LSH_BANDS bands.  NearDupIndex only compares a symbol
+     with those sharing a band, so lookups stay sub-linear.
+
+Candidates are confirmed exactly by similar().  Both symbols must have the
+same number of distinct cells of each kind and paint, and every cell
+of either must have a cell of the same kind and paint in the other within
+NEAR_DUP_TOLERANCE grid steps.  A variant with one extra stroke is therefore
+not a duplicate.  The <text> labels must be identical, so instrument bubbles that
+differ only in their tag letters are never merged.  When both thumbnails
+rendered, the pHash Hamming distance must also be at most PHASH_MAX_DISTANCE.
+
+numpy is imported lazily inside functions.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Hashable, Sequence
+
+from .render_pool import RenderPool, svg_render_job
+from .svg_geometry import load_geometry
+
+NEAR_DUP_GRID: int = 128
+NEAR_DUP_TOLERANCE: int = 1
+LSH_GRID: int = 16
+MINHASH_PERMS: int = 64
+LSH_BANDS: int = 32
+PHASH_SIZE: int = 32
+PHASH_MAX_DISTANCE: int = 6
+
+_BASE = NEAR_DUP_GRID + 1
+_VERIFY_BLOCK = 256
+
+
+@dataclass(frozen=True, slots=True, eq=False)
+class Fingerprint:
+    """Near-duplicate fingerprint of one symbol."""
+
+    cells: Any  # (T, 5) int64: kind * 4 + paint, then four grid coordinates
+    counts: tuple[int, ...]  # distinct cells per kind * 4 + paint
+    texts: tuple[str, ...]
+    minhash: tuple[int, ...]
+    phash: int | None = None
+
+
+def geometry_cells(geom) -> Any:
+    """Unique quantised (kind/paint, a, b, c, d) cells of *geom*.
+
+    Segments are (x1, y1, x2, y2) with the endpoints in a canonical order;
+    ellipses are (cx, cy, rx, ry).
+    """
+    import numpy as np
+
+    segs = geom.segments
+    ell = geom.ellipses
+    if not len(segs) and not len(ell):
+        return np.zeros((0, 5), dtype=np.int64)
+    if geom.view_box is not None and min(geom.view_box[2:]) > 0:
+        lo = np.array(geom.view_box[:2])
+        extent = max(geom.view_box[2:])
+    else:
+        pts = segs.reshape(-1, 2)
+        lo = np.vstack([pts, ell[:, 2:] - ell[:, :2]]).min(axis=0)
+        hi = np.vstack([pts, ell[:, 2:] + ell[:, :2]]).max(axis=0)
+        extent = max(float((hi - lo).max()), 1e-9)
+    scale = NEAR_DUP_GRID / extent
+
+    q = np.rint((segs - np.tile(lo, 2)) * scale).astype(np.int64)
+    # Undirected: order the two endpoints so A->B and B->A give one cell.
+    swap = (q[:, 0] > q[:, 2]) | ((q[:, 0] == q[:, 2]) & (q[:, 1] > q[:, 3]))
+    q[swap] = q[swap][:, [2, 3, 0, 1]]
+    e = np.rint(np.column_stack([ell[:, 2:] - lo, ell[:, :2]]) * scale)
+    cells = np.vstack(
+        [
+            np.column_stack([geom.segment_paint.astype(np.int64), q]),
+            np.column_stack([4 + geom.ellipse_paint.astype(np.int64), e]),
+        ]
+    ).astype(np.int64)
+    cells[:, 1:] = np.clip(cells[:, 1:], 0, NEAR_DUP_GRID)
+    return np.unique(cells, axis=0)
+
+
+def _lsh_tokens(cells) -> Any:
+    """One integer per cell on the coarse LSH_GRID (mixed-radix encoding)."""
+    step = NEAR_DUP_GRID // LSH_GRID
+    tokens = cells[:, 0]
+    for col in range(1, 5):
+        tokens = tokens * _BASE + (cells[:, col] + step // 2) // step
+    return tokens
+
+
+@lru_cache(maxsize=1)
+def _hash_params():
+    import numpy as np
+
+    rng = np.random.default_rng(0x5EED)
+    a = rng.integers(1, 2**63, MINHASH_PERMS, dtype=np.uint64) | np.uint64(1)
+    b = rng.integers(0, 2**63, MINHASH_PERMS, dtype=np.uint64)
+    return a, b
+
+
+def minhash(tokens) -> tuple[int, ...]:
+    """MINHASH_PERMS multiply-shift MinHash values of an integer token array."""
+    import numpy as np
+
+    if not len(tokens):
+        return ()
+    a, b = _hash_params()
+    x = np.asarray(tokens).astype(np.uint64)
+    return tuple(((((x[:, None] ^ b) * a) >> np.uint64(32)).min(axis=0)).tolist())
+
+
+def phash(image) -> int:
+    """64-bit DCT perceptual hash of an (H, W) or (H, W, C) uint8 image."""
+    import numpy as np
+
+    gray = np.asarray(image, dtype=np.float64)
+    if gray.ndim == 3:
+        gray = gray.mean(axis=2)
+    n = PHASH_SIZE
+    rows = np.linspace(0, gray.shape[0] - 1, n).round().astype(int)
+    cols = np.linspace(0, gray.shape[1] - 1, n).round().astype(int)
+    gray = gray[np.ix_(rows, cols)]
+    k = np.arange(n)
+    dct = np.cos(np.pi * (2 * k[None, :] + 1) * k[:, None] / (2 * n))
+    low = (dct @ gray @ dct.T)[:8, :8].reshape(-1)
+    bits = low > np.median(low[1:])
+    return int.from_bytes(np.packbits(bits).tobytes(), "big")
+
+
+def fingerprint(svg_path: Path, thumbnail=None) -> Fingerprint | None:
+    """Fingerprint *svg_path*; None when it cannot be parsed or draws nothing."""
+    geom = load_geometry(svg_path)
+    if geom is None:
+        return None
+    import numpy as np
+
+    cells = geometry_cells(geom)
+    if not len(cells):
+        return None
+    return Fingerprint(
+        cells=cells,
+        counts=tuple(np.bincount(cells[:, 0], minlength=8).tolist()),
+        texts=tuple(sorted(geom.texts)),
+        minhash=minhash(np.unique(_lsh_tokens(cells))),
+        phash=None if thumbnail is None else phash(thumbnail),
+    )
+
+
+def _covered(a, b) -> bool:
+    """Every cell of *a* has a same-kind cell of *b* within NEAR_DUP_TOLERANCE."""
+    import numpy as np
+
+    b_swapped = np.where(b[:, :1] < 4, b[:, [0, 3, 4, 1, 2]], b)
+    for start in range(0, len(a), _VERIFY_BLOCK):
+        block = a[start : start + _VERIFY_BLOCK, None, :]
+        dist = np.minimum(
+            np.abs(block[..., 1:] - b[None, :, 1:]).max(axis=2),
+            np.abs(block[..., 1:] - b_swapped[None, :, 1:]).max(axis=2),
+        )
+        dist[block[..., 0] != b[None, :, 0]] = NEAR_DUP_GRID + 1
+        if (dist.min(axis=1) > NEAR_DUP_TOLERANCE).any():
+            return False
+    return True
+
+
+def similar(a: Fingerprint, b: Fingerprint) -> bool:
+    """Exact near-duplicate test behind the LSH candidates."""
+    if a.texts != b.texts or a.counts != b.counts:
+        return False
+    if a.phash is not None and b.phash is not None:
+        if (a.phash ^ b.phash).bit_count() > PHASH_MAX_DISTANCE:
+            return False
+    return _covered(a.cells, b.cells) and _covered(b.cells, a.cells)
+
+
+class NearDupIndex:
+    """LSH index of fingerprints; add() returns the key a new entry duplicates."""
+
+    __slots__ = ("_buckets", "_items")
+
+    def __init__(self) -> None:
+        self._buckets: dict[tuple[int, tuple[int, ...]], list[int]] = {}
+        self._items: list[tuple[Hashable, Fingerprint]] = []
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    @staticmethod
+    def _bands(fp: Fingerprint):
+        rows = len(fp.minhash) // LSH_BANDS
+        for band in range(LSH_BANDS):
+            yield band, fp.minhash[band * rows : (band + 1) * rows]
+
+    def match(self, fp: Fingerprint) -> Hashable | None:
+        """Key of the earliest indexed near-duplicate of *fp*, or None."""
+        candidates: set[int] = set()
+        for band in self._bands(fp):
+            candidates.update(self._buckets.get(band, ()))
+        for i in sorted(candidates):
+            key, other = self._items[i]
+            if similar(fp, other):
+                return key
+        return None
+
+    def add(self, key: Hashable, fp: Fingerprint) -> Hashable | None:
+        """Index *fp* under *key* unless it near-duplicates an entry.
+
+        Returns the matching entry's key (and does not index *fp*), else None.
+        Only group representatives are indexed, so groups never chain.
+        """
+        found = self.match(fp)
+        if found is not None:
+            return found
+        i = len(self._items)
+        self._items.append((key, fp))
+        for band in self._bands(fp):
+            self._buckets.setdefault(band, []).append(i)
+        return None
+
+
+def near_duplicate_groups(
+    svg_paths: Sequence[Path],
+    pool: RenderPool | None = None,
+    workers: int = 0,
+    thumbnails: bool = True,
+) -> list[list[Path]]:
+    """Groups (two or more paths, first-seen order) of near-duplicate SVGs.
+
+    With *thumbnails*, each symbol is also rendered at PHASH_SIZE through
+    *pool* (or a RenderPool of *workers*) for the perceptual-hash check;
+    symbols whose render fails are compared on geometry alone.
+    """
+    if thumbnails and pool is None:
+        with RenderPool(workers) as own_pool:
+            return near_duplicate_groups(svg_paths, own_pool)
+
+    thumbs: list[Any] = [None] * len(svg_paths)
+    if thumbnails:
+        todo = [i for i, p in enumerate(svg_paths) if load_geometry(p) is not None]
+        jobs = [
+            svg_render_job(svg_paths[i], size=(PHASH_SIZE, PHASH_SIZE)) for i in todo
+        ]
+        for i, arr in zip(todo, pool.imap(jobs)):
+            thumbs[i] = arr
+
+    index = NearDupIndex()
+    groups: dict[Path, list[Path]] = {}
+    for svg_path, thumb in zip(svg_paths, thumbs):
+        fp = fingerprint(svg_path, thumb)
+        if fp is None:
+            continue
+        rep = index.add(svg_path, fp)
+        if rep is not None:
+            groups.setdefault(rep, [rep]).append(svg_path)
+    return list(groups.values())
@@ -0,0 +1,203 @@
+"""
+raster_snap.py
+--------------------
+Raster fallback for snap points where the vector heuristics give up.
+
+When detect_snap_points falls back to bounding-box extremes (strategy 4),
+the points are often off the actual pipe stubs.  raster_snap_points()
+renders those symbols once at a modest resolution (RASTER_SNAP_SIZE on the
+long side) through a RenderPool.  It then finds the stubs in pixel space for
+a whole batch at once:
+
+  1. ink mask (dark pixels), padded into one (B, S, S) stack
+  2. Zhang-Suen skeletonisation, vectorised over the stack
+  3. skeleton end pixels (exactly one 8-neighbour) that touch the ink's
+     bounding box -- the stub tips on the symbol hull
+
+Each tip is cross-checked against the vector geometry.  It is kept only
+if a segment endpoint lies within SNAP_TOLERANCE_PX pixels, and is then
+moved onto that endpoint, so the stored coordinates stay exact.  The raster
+result replaces the vector one only when at least two tips are confirmed;
+otherwise the symbol keeps its bounding-box points.
+
+numpy is imported lazily inside functions.
+"""
+
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Any, Sequence
+
+from .render_pool import RenderPool, svg_render_job
+from .snap_points import _label_floating
+from .svg_geometry import load_geometry
+
+RASTER_SNAP_SIZE: int = 128
+RASTER_SNAP_BATCH: int = 64
+INK_THRESHOLD: int = 128
+SNAP_TOLERANCE_PX: float = 3.0
+
+
+def skeletonize_batch(masks):
+    """Zhang-Suen thinning of a (B, H, W) bool stack; returns a bool stack."""
+    import numpy as np
+
+    img = np.pad(masks.astype(np.uint8), ((0, 0), (1, 1), (1, 1)))
+    core = img[:, 1:-1, 1:-1]
+    while True:
+        changed = False
+        for step in (0, 1):
+            # Neighbours P2..P9, clockwise from north.
+            nb = [
+                img[:, :-2, 1:-1],
+                img[:, :-2, 2:],
+                img[:, 1:-1, 2:],
+                img[:, 2:, 2:],
+                img[:, 2:, 1:-1],
+                img[:, 2:, :-2],
+                img[:, 1:-1, :-2],
+                img[:, :-2, :-2],
+            ]
+            count = sum(n.astype(np.int8) for n in nb)
+            transitions = sum(
+                ((nb[i] == 0) & (nb[(i + 1) % 8] == 1)).astype(np.int8)
+                for i in range(8)
+            )
+            p2, p4, p6, p8 = nb[0], nb[2], nb[4], nb[6]
+            if step == 0:
+                gate = ((p2 & p4 & p6) == 0) & ((p4 & p6 & p8) == 0)
+            else:
+                gate = ((p2 & p4 & p8) == 0) & ((p2 & p6 & p8) == 0)
+            delete = (
+                (core == 1) & (count >= 2) & (count <= 6) & (transitions == 1) & gate
+            )
+            if delete.any():
+                core[delete] = 0
+                changed = True
+        if not changed:
+            return core.astype(bool)
+
+
+def stub_tips(masks, margin: int = 2) -> list[Any]:
+    """Per mask, the (x, y) pixel coordinates of skeleton ends on the ink hull.
+
+    *masks* is a (B, H, W) bool ink stack.  The hull is the ink's bounding
+    box; an end pixel within *margin* of any of its edges is a stub tip.
+    Tips closer than *margin* to each other are merged.
+    """
+    import numpy as np
+
+    skel = skeletonize_batch(masks)
+    padded = np.pad(skel, ((0, 0), (1, 1), (1, 1))).astype(np.int8)
+    neighbours = sum(
+        padded[:, 1 + dy : padded.shape[1] - 1 + dy, 1 + dx : padded.shape[2] - 1 + dx]
+        for dy in (-1, 0, 1)
+        for dx in (-1, 0, 1)
+        if dy or dx
+    )
+    b, y, x = np.nonzero(skel & (neighbours == 1))
+
+    rows, cols = masks.any(axis=2), masks.any(axis=1)
+    height, width = masks.shape[1:]
+    y_lo = np.where(rows.any(axis=1), rows.argmax(axis=1), 0)
+    y_hi = height - 1 - rows[:, ::-1].argmax(axis=1)
+    x_lo = np.where(cols.any(axis=1), cols.argmax(axis=1), 0)
+    x_hi = width - 1 - cols[:, ::-1].argmax(axis=1)
+    on_hull = (
+        (x - x_lo[b] <= margin)
+        | (x_hi[b] - x <= margin)
+        | (y - y_lo[b] <= margin)
+        | (y_hi[b] - y <= margin)
+    )
+    b, x, y = b[on_hull], x[on_hull], y[on_hull]
+
+    tips: list[Any] = []
+    for i in range(len(masks)):
+        pts = np.column_stack([x[b == i], y[b == i]]).astype(np.float64)
+        merged: list[Any] = []
+        for pt in pts:
+            if all(np.abs(pt - m).max() > margin for m in merged):
+                merged.append(pt)
+        tips.append(np.array(merged).reshape(-1, 2))
+    return tips
+
+
+def _raster_size(
+    view_box: tuple[float, float, float, float], size: int
+) -> tuple[int, int]:
+    _, _, vb_w, vb_h = view_box
+    scale = size / max(vb_w, vb_h)
+    return max(1, round(vb_w * scale)), max(1, round(vb_h * scale))
+
+
+def _confirm(tips, geom, size: int, category: str) -> list[dict] | None:
+    """Map pixel tips to user space and snap them onto vector segment endpoints."""
+    import numpy as np
+
+    if len(tips) < 2 or not len(geom.segments):
+        return None
+    vb_x, vb_y, vb_w, vb_h = geom.view_box
+    width, height = _raster_size(geom.view_box, size)
+    user = np.column_stack(
+        [
+            vb_x + (tips[:, 0] + 0.5) * vb_w / width,
+            vb_y + (tips[:, 1] + 0.5) * vb_h / height,
+        ]
+    )
+    ends = np.unique(geom.segments.reshape(-1, 2), axis=0)
+    dist = np.hypot(*(user[:, None, :] - ends[None, :, :]).transpose(2, 0, 1))
+    nearest = dist.argmin(axis=1)
+    ok = dist[np.arange(len(user)), nearest] <= SNAP_TOLERANCE_PX * vb_w / width
+    snapped = sorted(
+        {(round(float(x), 2), round(float(y), 2)) for x, y in ends[nearest[ok]]}
+    )
+    if len(snapped) < 2:
+        return None
+    return _label_floating(snapped, category)
+
+
+def raster_snap_points(
+    items: Sequence[tuple[Path, str]],
+    pool: RenderPool | None = None,
+    workers: int = 0,
+    size: int = RASTER_SNAP_SIZE,
+    batch: int = RASTER_SNAP_BATCH,
+) -> list[list[dict] | None]:
+    """Raster-derived snap points for (svg_path, category) items, in order.
+
+    None means "keep the vector result": no viewBox, a render failure, or
+    fewer than two stub tips confirmed by the vector geometry.  Rendering
+    goes through *pool*, or a RenderPool of *workers* started for the call.
+    """
+    if pool is None:
+        with RenderPool(workers) as own_pool:
+            return raster_snap_points(items, own_pool, size=size, batch=batch)
+
+    import numpy as np
+
+    results: list[list[dict] | None] = [None] * len(items)
+    geoms = [load_geometry(path) for path, _ in items]
+    todo = [
+        i
+        for i, geom in enumerate(geoms)
+        if geom is not None and geom.view_box is not None and min(geom.view_box[2:]) > 0
+    ]
+    for start in range(0, len(todo), batch):
+        chunk = todo[start : start + batch]
+        jobs = [
+            svg_render_job(items[i][0], size=_raster_size(geoms[i].view_box, size))
+            for i in chunk
+        ]
+        masks = np.zeros((len(chunk), size, size), dtype=bool)
+        rendered = []
+        for k, arr in enumerate(pool.imap(jobs)):
+            if arr is None:
+                continue
+            ink = arr.min(axis=2) < INK_THRESHOLD
+            masks[k, : ink.shape[0], : ink.shape[1]] = ink[:size, :size]
+            rendered.append(k)
+        tips = stub_tips(masks)
+        for k in rendered:
+            i = chunk[k]
+            results[i] = _confirm(tips[k], geoms[i], size, items[i][1])
+    return results
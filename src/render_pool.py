@@ -0,0 +1,216 @@
+"""
+render_pool.py
+--------------------
+Batch SVG rendering service backed by long-lived worker processes.
+
+Workers import cairosvg once (pool initializer) and render chunks of
+RenderJob = (svg bytes, output size) jobs.  Each chunk comes back through a
+single shared-memory block (see symbol_pool).  Cairo draws straight into a
+NumPy buffer, so a raster is copied once into shared memory and once into the
+caller -- no PNG encode/decode and no pickling through the result pipe.
+
+RenderPool.imap() keeps about 2 x workers chunks in flight and yields arrays
+in job order, so callers degrade / augment earlier symbols while later ones
+are still being rendered, and memory stays bounded for any batch size.
+With workers <= 1 the same API renders lazily in-process.
+
+Heavy dependencies (cairosvg, numpy, Pillow) are imported lazily inside functions.
+"""
+
+from __future__ import annotations
+
+import atexit
+import multiprocessing
+import os
+import threading
+from collections import deque
+from concurrent.futures import Executor, Future, ProcessPoolExecutor
+from itertools import islice
+from pathlib import Path
+from typing import Any, Callable, Iterable, Iterator, Sequence
+
+from .svg_utils import _rasterize_svg, _render_size
+from .symbol_pool import PoolHandle, SharedSymbolPool, _map_entries
+
+# (svg bytes, (width, height) or None for the intrinsic size)
+RenderJob = tuple[bytes, tuple[int, int] | None]
+
+DEFAULT_CHUNK_SIZE: int = 8
+
+
+def svg_render_job(
+    svg_path: Path, min_size: int = 0, size: tuple[int, int] | None = None
+) -> RenderJob:
+    """Return the job rendering *svg_path* at its final resolution.
+
+    That is *size* if given, else the intrinsic size scaled so the short side
+    is at least *min_size*.
+    """
+    svg_text = svg_path.read_text(encoding="utf-8", errors="replace")
+    return svg_text.encode("utf-8"), size or _render_size(svg_text, min_size)
+
+
+def render_job(svg_bytes: bytes, size: tuple[int, int] | None = None):
+    """Render one job in the calling process; returns an (H, W, 3) uint8 view.
+
+    The view points straight into cairo's pixel buffer (see _rasterize_svg).
+    """
+    return _rasterize_svg(svg_bytes, size)
+
+
+def _warm_worker() -> None:
+    """Pool initializer: load cairosvg (and libcairo) once per worker."""
+    try:
+        import cairosvg  # noqa: F401
+    except Exception:
+        pass  # surfaced per job by render_job
+
+
+def _render_chunk(jobs: Sequence[RenderJob]) -> tuple[PoolHandle, tuple[bool, ...]]:
+    """Worker side: render *jobs* into one shared block; returns (handle, ok flags)."""
+    import numpy as np
+
+    entries: list[tuple[Any, int]] = []
+    ok: list[bool] = []
+    for svg_bytes, size in jobs:
+        try:
+            entries.append((render_job(svg_bytes, size), 0))
+            ok.append(True)
+        except Exception:
+            entries.append((np.zeros((0, 0, 3), dtype=np.uint8), 0))
+            ok.append(False)
+    shared = SharedSymbolPool(entries)
+    shared.release()  # the receiving process copies the rasters and unlinks
+    return shared.handle, tuple(ok)
+
+
+def _collect(handle: PoolHandle, ok: Sequence[bool]) -> list[Any]:
+    """Copy a rendered chunk out of shared memory and unlink the block."""
+    owner, entries = _map_entries(handle)
+    try:
+        return [arr.copy() if good else None for (arr, _), good in zip(entries, ok)]
+    finally:
+        entries.clear()
+        owner.close()
+        owner.unlink()
+
+
+def ordered_map(
+    executor: Executor,
+    fn: Callable[..., Any],
+    arg_list: Iterable[tuple],
+    window: int,
+    abandon: Callable[[Future], None] | None = None,
+) -> Iterator[Any]:
+    """Yield fn(*args) for every entry in order, at most *window* in flight.
+
+    The next task is submitted as each result is handed out, so results
+    waiting for a slow consumer never outgrow the window.  Futures still
+    pending when the consumer stops are cancelled; those already running get
+    *abandon* as a done-callback to free what they return.
+    """
+    args_iter = iter(arg_list)
+    pending: deque[Future] = deque(
+        executor.submit(fn, *args) for args in islice(args_iter, max(1, window))
+    )
+    try:
+        while pending:
+            result = pending.popleft().result()
+            for args in islice(args_iter, 1):
+                pending.append(executor.submit(fn, *args))
+            yield result
+    finally:
+        for future in pending:
+            if not future.cancel() and abandon is not None:
+                future.add_done_callback(abandon)
+
+
+def _discard(future: Future) -> None:
+    """Done-callback for chunks nobody will read: free their shared block."""
+    if not future.cancelled() and future.exception() is None:
+        _collect(*future.result())
+
+
+class RenderPool:
+    """Render batches of SVG jobs on persistent worker processes.
+
+    Pass *executor* to borrow an existing process pool (it is not shut down
+    by close()); otherwise `workers` processes are started (0 = all cores)
+    with the *start_method* multiprocessing context (None = platform default).
+    """
+
+    def __init__(
+        self,
+        workers: int = 0,
+        executor: Executor | None = None,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        start_method: str | None = None,
+    ) -> None:
+        if workers < 1:
+            workers = os.cpu_count() or 1
+        self.workers = workers
+        self.chunk_size = max(1, chunk_size)
+        self._owned = executor is None and workers > 1
+        self._executor = executor
+        if self._owned:
+            self._executor = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context(start_method),
+                initializer=_warm_worker,
+            )
+
+    def imap(self, jobs: Sequence[RenderJob]) -> Iterator[Any]:
+        """Yield one array (or None on failure) per job, in order."""
+        if self._executor is None:
+            import numpy as np
+
+            for svg_bytes, size in jobs:
+                try:
+                    yield np.ascontiguousarray(render_job(svg_bytes, size))
+                except Exception:
+                    yield None
+            return
+
+        jobs = list(jobs)
+        chunk = max(1, min(self.chunk_size, -(-len(jobs) // self.workers)))
+        # About 2 x workers chunks in flight: rasters are parked in shared
+        # memory only a little ahead of the consumer, not for the whole batch.
+        chunks = ((jobs[k : k + chunk],) for k in range(0, len(jobs), chunk))
+        for handle, ok in ordered_map(
+            self._executor, _render_chunk, chunks, 2 * self.workers, _discard
+        ):
+            yield from _collect(handle, ok)
+
+    def render(self, jobs: Sequence[RenderJob]) -> list[Any]:
+        """Render every job; returns arrays (None for failures) in job order."""
+        return list(self.imap(jobs))
+
+    def close(self) -> None:
+        if self._owned and self._executor is not None:
+            self._executor.shutdown()
+        self._executor = None
+
+    def __enter__(self) -> "RenderPool":
+        return self
+
+    def __exit__(self, *_exc) -> None:
+        self.close()
+
+
+_shared_pool: RenderPool | None = None
+_shared_pool_lock = threading.Lock()
+
+
+def get_render_pool() -> RenderPool:
+    """Return the process-wide RenderPool (all cores), starting it on first use.
+
+    Safe to call from several threads (the studio server handles requests on
+    threads).  Workers are spawned rather than forked, so they never inherit
+    a copy of a multi-threaded parent.
+    """
+    global _shared_pool
+    with _shared_pool_lock:
+        if _shared_pool is None:
+            _shared_pool = RenderPool(start_method="spawn")
+            atexit.register(_shared_pool.close)
+        return _shared_pool
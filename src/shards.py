@@ -0,0 +1,201 @@
+"""
+shards.py
+--------------------
+Packed, sharded dataset output (WebDataset-style tar shards).
+
+Instead of one image plus one label file per sample, ShardWriter appends each
+sample to an uncompressed tar shard.  The members are `<key>.png` and
+`<key>.txt`, so generic WebDataset loaders group them by key.  Each split gets
+its own series of shards (train-000000.tar, train-000001.tar, val-000000.tar,
+...), and a shard is closed once it reaches `max_bytes` or `max_count`.
+
+index.json, written next to the shards on close(), records each sample's shard
+and the byte offset and size of every member.  Readers can therefore seek
+straight to a sample without scanning the tar.  unpack_shards() converts a
+sharded dataset back to the loose YOLO directory layout.
+
+Layout of a sharded dataset directory:
+
+    <dataset>/data.yaml
+    <dataset>/shards/index.json
+    <dataset>/shards/<split>-NNNNNN.tar
+"""
+
+from __future__ import annotations
+
+import io
+import json
+import tarfile
+from pathlib import Path
+from typing import Iterator, Mapping, Sequence
+
+SHARD_DIRNAME: str = "shards"
+SHARD_INDEX_NAME: str = "index.json"
+SHARD_MAX_BYTES_DEFAULT: int = 256 * 1024 * 1024
+SHARD_MAX_COUNT_DEFAULT: int = 10_000
+LABEL_EXT: str = "txt"
+
+_BLOCK = tarfile.BLOCKSIZE
+
+
+class ShardWriter:
+    """Append samples to size-capped tar shards; use as a context manager.
+
+    close() finalises the open shards and writes the index.  Keys must be
+    unique within a split; dots are replaced by underscores because
+    WebDataset treats everything after the first dot as the extension.
+    """
+
+    def __init__(
+        self,
+        shard_dir: Path,
+        max_bytes: int = SHARD_MAX_BYTES_DEFAULT,
+        max_count: int = SHARD_MAX_COUNT_DEFAULT,
+    ) -> None:
+        self.shard_dir = shard_dir
+        self.max_bytes = max(1, max_bytes)
+        self.max_count = max(1, max_count)
+        self.shard_dir.mkdir(parents=True, exist_ok=True)
+        self.shards: list[dict] = []
+        self.samples: list[dict] = []
+        # split -> (open tar, index into self.shards)
+        self._open: dict[str, tuple[tarfile.TarFile, int]] = {}
+
+    def __len__(self) -> int:
+        return len(self.samples)
+
+    def _shard_for(self, split: str, size: int) -> tuple[tarfile.TarFile, int]:
+        current = self._open.get(split)
+        if current is not None:
+            info = self.shards[current[1]]
+            if (
+                info["samples"] < self.max_count
+                and info["bytes"] + size <= self.max_bytes
+            ):
+                return current
+            current[0].close()
+
+        number = sum(1 for s in self.shards if s["split"] == split)
+        name = f"{split}-{number:06d}.tar"
+        tar = tarfile.open(self.shard_dir / name, "w")
+        self.shards.append({"name": name, "split": split, "samples": 0, "bytes": 0})
+        self._open[split] = (tar, len(self.shards) - 1)
+        return self._open[split]
+
+    def add(self, split: str, key: str, files: Mapping[str, bytes]) -> None:
+        """Append one sample; *files* maps extension (no dot) to member bytes."""
+        key = key.replace(".", "_")
+        size = sum(_BLOCK + -(-len(data) // _BLOCK) * _BLOCK for data in files.values())
+        tar, shard = self._shard_for(split, size)
+
+        members: dict[str, list[int]] = {}
+        for ext, data in files.items():
+            info = tarfile.TarInfo(f"{key}.{ext}")
+            info.size = len(data)
+            info.mode = 0o644
+            tar.addfile(info, io.BytesIO(data))
+            # tar.offset is the end of the padded member data.
+            end = tar.offset
+            members[ext] = [end - -(-len(data) // _BLOCK) * _BLOCK, len(data)]
+
+        self.shards[shard]["samples"] += 1
+        self.shards[shard]["bytes"] += size
+        self.samples.append(
+            {"key": key, "split": split, "shard": shard, "members": members}
+        )
+
+    def add_outputs(
+        self,
+        images: Sequence[tuple[Path, bytes]],
+        labels: Sequence[tuple[Path, str]] = (),
+        split: str | None = None,
+    ) -> None:
+        """Add exporter outputs, pairing each image with the label of the same stem.
+
+        The split is the image's parent directory name (images/<split>/) unless
+        *split* is given.
+        """
+        texts = {path.stem: text for path, text in labels}
+        for path, data in images:
+            files = {path.suffix.lstrip("."): data}
+            if path.stem in texts:
+                files[LABEL_EXT] = texts[path.stem].encode("utf-8")
+            self.add(split or path.parent.name, path.stem, files)
+
+    def close(self) -> None:
+        """Close the open shards and write index.json."""
+        for tar, _ in self._open.values():
+            tar.close()
+        self._open.clear()
+        index = {"format": "webdataset", "shards": self.shards, "samples": self.samples}
+        (self.shard_dir / SHARD_INDEX_NAME).write_text(
+            json.dumps(index, separators=(",", ":")), encoding="utf-8"
+        )
+
+    def __enter__(self) -> "ShardWriter":
+        return self
+
+    def __exit__(self, *_exc) -> None:
+        self.close()
+
+
+def read_index(shard_dir: Path) -> dict:
+    """Load the index written by ShardWriter."""
+    return json.loads((shard_dir / SHARD_INDEX_NAME).read_text(encoding="utf-8"))
+
+
+def iter_samples(
+    shard_dir: Path, split: str | None = None
+) -> Iterator[tuple[str, str, dict[str, bytes]]]:
+    """Yield (split, key, {ext: bytes}) per sample, in write order.
+
+    Members are read by offset from the index; the tar headers are never parsed.
+    """
+    index = read_index(shard_dir)
+    handles: dict[int, io.BufferedReader] = {}
+    try:
+        for sample in index["samples"]:
+            if split is not None and sample["split"] != split:
+                continue
+            shard = sample["shard"]
+            if shard not in handles:
+                handles[shard] = open(shard_dir / index["shards"][shard]["name"], "rb")
+            fh = handles[shard]
+            files: dict[str, bytes] = {}
+            for ext, (offset, size) in sample["members"].items():
+                fh.seek(offset)
+                files[ext] = fh.read(size)
+            yield sample["split"], sample["key"], files
+    finally:
+        for fh in handles.values():
+            fh.close()
+
+
+def unpack_shards(dataset_dir: Path, output_dir: Path, dry_run: bool = False) -> int:
+    """Convert a sharded dataset back to the YOLO layout; returns samples written.
+
+    Writes images/<split>/<key>.<ext> and labels/<split>/<key>.txt under
+    *output_dir*, and copies data.yaml with its `path:` pointing at the output.
+    """
+    shard_dir = dataset_dir / SHARD_DIRNAME
+    written = 0
+    for split, key, files in iter_samples(shard_dir):
+        written += 1
+        if dry_run:
+            continue
+        for ext, data in files.items():
+            kind = "labels" if ext == LABEL_EXT else "images"
+            target = output_dir / kind / split / f"{key}.{ext}"
+            target.parent.mkdir(parents=True, exist_ok=True)
+            target.write_bytes(data)
+
+    yaml_path = dataset_dir / "data.yaml"
+    if yaml_path.exists() and not dry_run:
+        lines = yaml_path.read_text(encoding="utf-8").splitlines(keepends=True)
+        lines = [
+            f"path: {output_dir.resolve()}\n" if line.startswith("path:") else line
+            for line in lines
+        ]
+        output_dir.mkdir(parents=True, exist_ok=True)
+        (output_dir / "data.yaml").write_text("".join(lines), encoding="utf-8")
+    return written
@@ -0,0 +1,486 @@
+"""
+sheet_synth.py
+--------------------
+Synthetic P&ID sheet generator built on the YOLO composite exporter.
+
+Each sheet lays out many registry symbols on a large canvas (a jittered grid),
+routes orthogonal pipes between their stored snap_points along the gutters
+between grid cells, assembles everything into one SVG and rasterises it once.
+Boxes and pipe geometry are known analytically from the layout, so labels are
+exact and no raster pasting or resampling is involved.
+
+Outputs per standard group (sheets-<standard>/):
+  images/{train,val}/sheet_<std>_N.png
+  labels/{train,val}/sheet_<std>_N.txt   YOLO boxes, same classes as --export-yolo
+  graphs/sheet_<std>_N.json              connection graph (symbols + pipes)
+  data.yaml
+
+Heavy dependencies (cairosvg) are imported lazily inside functions.
+"""
+
+from __future__ import annotations
+
+import json
+import math
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+
+from . import paths
+from .augmentation import (
+    _load_symbols_by_standard,
+    _run_tasks,
+    _yolo_class_name,
+    _yolo_data_yaml,
+    _yolo_label_text,
+    _YoloLayout,
+)
+from .svg_utils import _nested_svg, _svg_embed_parts
+from .utils import _safe_std_slug
+
+# Fraction of a grid cell's short side taken by a symbol's long side.
+CELL_FILL_MIN: float = 0.45
+CELL_FILL_MAX: float = 0.70
+
+
+@dataclass(frozen=True, slots=True)
+class SheetSymbol:
+    """A library symbol prepared for embedding in a sheet."""
+
+    sym_id: str
+    class_idx: int
+    body: str  # inner markup of the root <svg>, ids prefixed
+    xmlns: str  # extra namespace declarations from the root tag
+    view_box: tuple[float, float, float, float]
+    ports: tuple[tuple[str, float, float], ...]  # (port id, x, y) in user units
+
+
+@dataclass(frozen=True, slots=True)
+class Placement:
+    """One symbol instance on a sheet (pixel coordinates)."""
+
+    symbol: int  # index into the library
+    x: float
+    y: float
+    w: float
+    h: float
+    col: int
+    row: int
+
+
+def prepare_symbol(
+    sym: dict, class_idx: int, key: int, svg_text: str | None = None
+) -> SheetSymbol | None:
+    """Turn a registry entry into an embeddable SheetSymbol (None if unusable)."""
+    if svg_text is None:
+        svg_rel = sym.get("svg_path", "")
+        svg_file = (paths.REPO_ROOT / svg_rel) if svg_rel else None
+        if not svg_file or not svg_file.exists():
+            return None
+        svg_text = svg_file.read_text(encoding="utf-8", errors="replace")
+
+    parts = _svg_embed_parts(svg_text, f"s{key}_")
+    if parts is None:
+        return None
+    body, xmlns, view_box = parts
+
+    ports: list[tuple[str, float, float]] = []
+    for p in sym.get("snap_points", []):
+        zone = p.get("zone")
+        if zone:
+            x = zone.get("x", 0) + zone.get("width", 0) / 2
+            y = zone.get("y", 0) + zone.get("height", 0) / 2
+        else:
+            x, y = p.get("x"), p.get("y")
+        if x is None or y is None:
+            continue
+        ports.append((str(p.get("id", f"p{len(ports) + 1}")), float(x), float(y)))
+
+    return SheetSymbol(
+        sym_id=sym.get("id", ""),
+        class_idx=class_idx,
+        body=body,
+        xmlns=xmlns,
+        view_box=view_box,
+        ports=tuple(ports),
+    )
+
+
+def _layout_sheet(
+    rng: random.Random,
+    library: list[SheetSymbol],
+    n_symbols: int,
+    width: int,
+    height: int,
+) -> tuple[list[Placement], float, float]:
+    """Place n_symbols on a jittered grid; returns (placements, cell_w, cell_h).
+
+    Every symbol keeps a margin inside its cell so the cell boundaries form
+    free gutters for pipe routing.
+    """
+    cols = max(1, math.ceil(math.sqrt(n_symbols * width / height)))
+    rows = max(1, math.ceil(n_symbols / cols))
+    cell_w, cell_h = width / cols, height / rows
+    cells = rng.sample(range(cols * rows), n_symbols)
+
+    placements: list[Placement] = []
+    for cell in sorted(cells):
+        row, col = divmod(cell, cols)
+        index = rng.randrange(len(library))
+        _, _, vb_w, vb_h = library[index].view_box
+        long_side = rng.uniform(CELL_FILL_MIN, CELL_FILL_MAX) * min(cell_w, cell_h)
+        scale = long_side / max(vb_w, vb_h)
+        w, h = vb_w * scale, vb_h * scale
+        slack_x, slack_y = cell_w - w, cell_h - h
+        x = col * cell_w + slack_x / 2 + rng.uniform(-0.3, 0.3) * slack_x
+        y = row * cell_h + slack_y / 2 + rng.uniform(-0.3, 0.3) * slack_y
+        placements.append(Placement(index, x, y, w, h, col, row))
+    return placements, cell_w, cell_h
+
+
+def _port_xy(place: Placement, sym: SheetSymbol, port: int) -> tuple[float, float]:
+    vb_x, vb_y, vb_w, vb_h = sym.view_box
+    _, px, py = sym.ports[port]
+    return (
+        place.x + (px - vb_x) * place.w / vb_w,
+        place.y + (py - vb_y) * place.h / vb_h,
+    )
+
+
+def _exit_to_gutter(
+    place: Placement,
+    pt: tuple[float, float],
+    cell_w: float,
+    cell_h: float,
+    lane: float,
+) -> tuple[str, float, tuple[float, float]]:
+    """Leave the symbol through the cell side nearest the port.
+
+    Returns (axis, gutter coordinate, point on the gutter), where axis "x"
+    means the gutter is a vertical line x = const.
+    """
+    dx = (pt[0] - (place.x + place.w / 2)) / place.w
+    dy = (pt[1] - (place.y + place.h / 2)) / place.h
+    if abs(dx) >= abs(dy):
+        gx = (place.col + (1 if dx >= 0 else 0)) * cell_w + lane
+        return "x", gx, (gx, pt[1])
+    gy = (place.row + (1 if dy >= 0 else 0)) * cell_h + lane
+    return "y", gy, (pt[0], gy)
+
+
+def _route_pipe(
+    a: tuple[float, float],
+    a_place: Placement,
+    b: tuple[float, float],
+    b_place: Placement,
+    cell_w: float,
+    cell_h: float,
+    lane: float,
+) -> list[tuple[float, float]]:
+    """Orthogonal pipe from port a to port b that travels along cell gutters."""
+    a_axis, ga, pa = _exit_to_gutter(a_place, a, cell_w, cell_h, lane)
+    b_axis, gb, pb = _exit_to_gutter(b_place, b, cell_w, cell_h, lane)
+
+    if a_axis == "x" and b_axis == "y":
+        middle = [(ga, gb)]
+    elif a_axis == "y" and b_axis == "x":
+        middle = [(gb, ga)]
+    elif a_axis == "x":
+        # Both on vertical gutters: cross over on the row boundary facing b.
+        row = a_place.row + (1 if b[1] > a[1] else 0)
+        h = row * cell_h + lane
+        middle = [(ga, h), (gb, h)]
+    else:
+        col = a_place.col + (1 if b[0] > a[0] else 0)
+        v = col * cell_w + lane
+        middle = [(v, ga), (v, gb)]
+
+    points: list[tuple[float, float]] = []
+    for pt in [a, pa, *middle, pb, b]:
+        pt = (round(pt[0], 2), round(pt[1], 2))
+        if not points or points[-1] != pt:
+            points.append(pt)
+    return points
+
+
+def _connect(
+    rng: random.Random,
+    placements: list[Placement],
+    library: list[SheetSymbol],
+    branch_p: float = 0.3,
+) -> list[tuple[int, int, int, int]]:
+    """Pick (src placement, src port, dst placement, dst port) pipe endpoints.
+
+    Symbols are chained in serpentine row order, plus occasional branches to
+    the symbol below; every port is used at most once.
+    """
+    free = {
+        i: list(range(len(library[p.symbol].ports))) for i, p in enumerate(placements)
+    }
+    by_cell = {(p.col, p.row): i for i, p in enumerate(placements)}
+    order = sorted(
+        range(len(placements)),
+        key=lambda i: (
+            placements[i].row,
+            placements[i].col if placements[i].row % 2 == 0 else -placements[i].col,
+        ),
+    )
+
+    edges: list[tuple[int, int, int, int]] = []
+
+    def _link(i: int, j: int) -> None:
+        if i == j or not free[i] or not free[j]:
+            return
+        pi = free[i].pop(rng.randrange(len(free[i])))
+        pj = free[j].pop(rng.randrange(len(free[j])))
+        edges.append((i, pi, j, pj))
+
+    for i, j in zip(order, order[1:]):
+        _link(i, j)
+    for i, p in enumerate(placements):
+        below = by_cell.get((p.col, p.row + 1))
+        if below is not None and rng.random() < branch_p:
+            _link(i, below)
+    return edges
+
+
+def build_sheet(
+    rng: random.Random,
+    library: list[SheetSymbol],
+    n_symbols: int,
+    width: int,
+    height: int,
+) -> tuple[str, list[tuple], dict]:
+    """Assemble one sheet; returns (svg_text, yolo_rows, connection_graph)."""
+    placements, cell_w, cell_h = _layout_sheet(rng, library, n_symbols, width, height)
+    edges = _connect(rng, placements, library)
+    gutter = min(cell_w, cell_h) * (1 - CELL_FILL_MAX) / 2
+
+    parts = [
+        '<svg xmlns="http://www.w3.org/2000/svg" '
+        'xmlns:xlink="http://www.w3.org/1999/xlink" '
+        f'width="{width}" height="{height}" viewBox="0 0 {width} {height}">'
+    ]
+    rows: list[tuple] = []
+    nodes: list[dict] = []
+    for n, place in enumerate(placements):
+        sym = library[place.symbol]
+        parts.append(
+            _nested_svg(
+                sym.body,
+                sym.xmlns,
+                sym.view_box,
+                (place.x, place.y, place.w, place.h),
+                aspect="none",
+            )
+        )
+        rows.append(
+            (
+                sym.class_idx,
+                (place.x + place.w / 2) / width,
+                (place.y + place.h / 2) / height,
+                place.w / width,
+                place.h / height,
+            )
+        )
+        nodes.append(
+            {
+                "id": n,
+                "symbol": sym.sym_id,
+                "class": sym.class_idx,
+                "bbox": [
+                    round(place.x, 2),
+                    round(place.y, 2),
+                    round(place.x + place.w, 2),
+                    round(place.y + place.h, 2),
+                ],
+            }
+        )
+
+    links: list[dict] = []
+    for i, pi, j, pj in edges:
+        a_place, b_place = placements[i], placements[j]
+        a = _port_xy(a_place, library[a_place.symbol], pi)
+        b = _port_xy(b_place, library[b_place.symbol], pj)
+        lane = rng.uniform(-0.5, 0.5) * gutter
+        points = _route_pipe(a, a_place, b, b_place, cell_w, cell_h, lane)
+        dash = ' stroke-dasharray="6 4"' if rng.random() < 0.15 else ""
+        parts.append(
+            '<polyline fill="none" stroke="black" '
+            f'stroke-width="{rng.uniform(1.2, 2.4):.1f}"{dash} points="'
+            + " ".join(f"{x},{y}" for x, y in points)
+            + '"/>'
+        )
+        links.append(
+            {
+                "source": i,
+                "source_port": library[a_place.symbol].ports[pi][0],
+                "target": j,
+                "target_port": library[b_place.symbol].ports[pj][0],
+                "points": [list(p) for p in points],
+            }
+        )
+
+    parts.append("</svg>")
+    graph = {"width": width, "height": height, "nodes": nodes, "edges": links}
+    return "".join(parts), rows, graph
+
+
+# Per-process symbol library, installed by the pool initializer.
+_library: list[SheetSymbol] = []
+
+
+def _init_sheet_worker(library: list[SheetSymbol]) -> None:
+    global _library
+    _library = library
+
+
+def _sheet_task(
+    library: list[SheetSymbol] | None,
+    name: str,
+    is_val: bool,
+    seed: int,
+    symbols_range: tuple[int, int],
+    width: int,
+    height: int,
+    layout: _YoloLayout,
+    graph_dir: Path,
+    dry_run: bool,
+) -> tuple[Path, str, Path, str]:
+    """Build and rasterise one sheet; returns label and graph files to write."""
+    library = library if library is not None else _library
+    rng = random.Random(seed)
+    n_symbols = rng.randint(*symbols_range)
+    svg_text, rows, graph = build_sheet(rng, library, n_symbols, width, height)
+
+    i_dir, l_dir = layout.dirs(is_val)
+    if not dry_run:
+        import cairosvg
+
+        cairosvg.svg2png(
+            bytestring=svg_text.encode("utf-8"),
+            output_width=width,
+            output_height=height,
+            background_color="white",
+            write_to=str(i_dir / (name + ".png")),
+        )
+    return (
+        l_dir / (name + ".txt"),
+        _yolo_label_text(rows),
+        graph_dir / (name + ".json"),
+        json.dumps(graph, ensure_ascii=False),
+    )
+
+
+def synthesize_sheets(
+    registry_path: Path,
+    output_dir: Path,
+    count: int,
+    dry_run: bool,
+    symbols_range: tuple[int, int] = (80, 200),
+    sheet_size: int = 4096,
+    origin: str | None = None,
+    standard: str | None = None,
+    workers: int = 1,
+    seed: int | None = None,
+) -> None:
+    """Generate `count` synthetic sheets per standard group from the registry.
+
+    Sheets are landscape with an A-series aspect ratio and a long side of
+    `sheet_size` pixels.  Each holds a random number of symbols within
+    `symbols_range` (capped by the grid); only symbols with snap_points take
+    part in pipe routing.  With workers > 1 sheets are built and rasterised in
+    a process pool; labels and graphs are written by the parent in sheet order.
+    """
+    by_standard = _load_symbols_by_standard(registry_path, origin, standard)
+    if by_standard is None:
+        return
+
+    if workers < 1:
+        workers = os.cpu_count() or 1
+    width = sheet_size
+    height = max(1, round(sheet_size / math.sqrt(2)))
+    rng = random.Random(seed)
+    total_written = 0
+
+    for std, sym_list in sorted(by_standard.items()):
+        std_slug = _safe_std_slug(std)
+        dataset_dir = output_dir / f"sheets-{std_slug}"
+        layout = _YoloLayout(
+            img_train=dataset_dir / "images" / "train",
+            img_val=dataset_dir / "images" / "val",
+            lbl_train=dataset_dir / "labels" / "train",
+            lbl_val=dataset_dir / "labels" / "val",
+        )
+        graph_dir = dataset_dir / "graphs"
+
+        categories = sorted({_yolo_class_name(s) for s in sym_list})
+        class_map = {cls: idx for idx, cls in enumerate(categories)}
+        library = [
+            prepared
+            for key, sym in enumerate(sym_list)
+            if (prepared := prepare_symbol(sym, class_map[_yolo_class_name(sym)], key))
+            is not None
+        ]
+        print(
+            f"\n[{std}]  {len(library)}/{len(sym_list)} usable symbols, "
+            f"{len(categories)} classes"
+        )
+        if not library:
+            continue
+
+        if not dry_run:
+            for d in (*layout.dirs(False), *layout.dirs(True), graph_dir):
+                d.mkdir(parents=True, exist_ok=True)
+            (dataset_dir / "data.yaml").write_text(
+                _yolo_data_yaml(dataset_dir, categories), encoding="utf-8"
+            )
+
+        executor = (
+            ProcessPoolExecutor(
+                max_workers=workers,
+                initializer=_init_sheet_worker,
+                initargs=(library,),
+            )
+            if workers > 1
+            else None
+        )
+        task_library = None if executor is not None else library
+        args = [
+            (
+                task_library,
+                f"sheet_{std_slug}_{i + 1}",
+                i % 5 == 0,
+                rng.getrandbits(32),
+                symbols_range,
+                width,
+                height,
+                layout,
+                graph_dir,
+                dry_run,
+            )
+            for i in range(count)
+        ]
+        try:
+            for lbl_path, lbl_text, graph_path, graph_text in _run_tasks(
+                executor, _sheet_task, args, 2 * workers
+            ):
+                if not dry_run:
+                    lbl_path.write_text(lbl_text, encoding="utf-8")
+                    graph_path.write_text(graph_text, encoding="utf-8")
+                total_written += 1
+        finally:
+            if executor is not None:
+                executor.shutdown()
+        print(f"  {count} sheets")
+
+    print(f"\n{'=' * 60}")
+    print(f"  Standards     : {len(by_standard)}")
+    print(f"  Sheets        : {total_written if not dry_run else 0}")
+    if dry_run:
+        print("  [DRY RUN -- no files written]")
+    else:
+        print(f"  Output        : {output_dir}")
+    print(f"{'=' * 60}")
@@ -6,126 +6,110 @@ Automatic snap-point / connection-port detection for P&ID SVG symbols.
 Four strategies applied in order:
   1. ID-based: elements whose id/class contains port/conn/inlet/outlet/…
   2. Open-end: floating endpoints of non-closed straight-line paths.
-               Applied only to valve/pipe-like categories.
+               Applied only to valve/pipe-like categories.  Internal junctions
+               are filtered with a grid-indexed, vectorised segment test.
   3. Bubble cardinal: N/S/E/W of the largest circle/ellipse.
                       Applied to instrument bubble / annotation categories.
   4. Bounding-box extremes: fallback for anything else.
+
+Geometry comes from svg_geometry.load_geometry().  It applies transforms,
+follows <use>, flattens curves, and is cached per content hash.  Every
+strategy reads the resulting arrays in root user space.
 """
 
-import re
-import xml.etree.ElementTree as ET
 from pathlib import Path
 
 from .constants import _VALVE_CATS, _OPEN_END_CATS, _BUBBLE_CATS, _ACTUATOR_CATS
+from .svg_geometry import load_geometry
 
 
-def _path_open_endpoints(d: str) -> list[tuple[float, float]]:
-    """
-    Return the start and end coordinates of each non-closed subpath that
-    contains at least one straight-line command (L/H/V).
-    Pure arc/curve subpaths are skipped — they represent symbol bodies, not stubs.
-    Handles both absolute (L/H/V) and relative (l/h/v) commands.
-    """
-    results: list[tuple[float, float]] = []
-    for sub in re.split(r'(?=[Mm])', d.strip()):
-        sub = sub.strip()
-        if not sub or sub[0].upper() != 'M':
-            continue
-        if re.search(r'[Zz]', sub):
-            continue  # closed path — no open ends
-        if not re.search(r'[LlHhVv]', sub):
-            continue  # only curves/arcs — skip
-        cur = [0.0, 0.0]
-        start: tuple[float, float] | None = None
-        end: tuple[float, float] | None = None
-        for cmd, args in re.findall(r'([MLHVmlhv])((?:[^MLHVZACSQTmlhvzacsqt])*)', sub):
-            nums = [float(n) for n in re.findall(r'[-+]?\d*\.?\d+(?:[eE][-+]?\d+)?', args)]
-            is_rel = cmd.islower()
-            cu = cmd.upper()
-            if cu == 'M' and len(nums) >= 2:
-                cur[:] = [cur[0] + nums[0] if is_rel else nums[0],
-                          cur[1] + nums[1] if is_rel else nums[1]]
-                if start is None:
-                    start = (cur[0], cur[1])
-                end = (cur[0], cur[1])
-            elif cu == 'L':
-                for i in range(0, len(nums) - 1, 2):
-                    cur[:] = [cur[0] + nums[i] if is_rel else nums[i],
-                              cur[1] + nums[i + 1] if is_rel else nums[i + 1]]
-                    end = (cur[0], cur[1])
-            elif cu == 'H':
-                for x in nums:
-                    cur[0] = cur[0] + x if is_rel else x
-                    end = (cur[0], cur[1])
-            elif cu == 'V':
-                for y in nums:
-                    cur[1] = cur[1] + y if is_rel else y
-                    end = (cur[0], cur[1])
-        if start is not None:
-            results.append(start)
-        if end is not None and end != start:
-            results.append(end)
-    return results
-
-
-def _straight_segments(root) -> list[tuple[tuple, tuple]]:
+# Segments whose tolerance box spans more grid cells than this are tested
+# against every candidate instead of being bucketed.
+_GRID_MAX_CELLS = 1024
+
+
+def _floating_mask(points, segs, tol: float = 1.5):
     """
-    Extract straight line segments from <line> elements and M/L/H/V path commands.
-    Used to test whether a candidate snap point is an internal junction.
-    Handles both absolute (L/H/V) and relative (l/h/v) commands.
+    Vectorised junction filter: for each point, True if no segment passes
+    within *tol* of it (inside the segment's bounding box grown by *tol* and
+    within *tol* of its line), ignoring segments with an endpoint that rounds
+    to the point itself.
+
+    *points* is (P, 2) integer-valued, *segs* is (M, 4) as x1, y1, x2, y2.
+    Segments are bucketed into a uniform grid and each point is only tested
+    against segments sharing its cell, so the cost is near-linear in P + M.
     """
-    segs: list[tuple[tuple, tuple]] = []
-    for elem in root.iter():
-        local = elem.tag.split("}")[-1] if "}" in elem.tag else elem.tag
-        if local == "line":
-            try:
-                segs.append((
-                    (float(elem.get("x1", 0)), float(elem.get("y1", 0))),
-                    (float(elem.get("x2", 0)), float(elem.get("y2", 0))),
-                ))
-            except ValueError:
-                pass
-        elif local == "path":
-            cur = [0.0, 0.0]
-            for cmd, args in re.findall(
-                r'([MLHVmlhv])((?:[^MLHVZACSQTmlhvzacsqt])*)', elem.get("d", "")
-            ):
-                nums = [float(n) for n in re.findall(r'[-+]?\d*\.?\d+(?:[eE][-+]?\d+)?', args)]
-                is_rel = cmd.islower()
-                cu = cmd.upper()
-                if cu == 'M' and len(nums) >= 2:
-                    cur[:] = [cur[0] + nums[0] if is_rel else nums[0],
-                              cur[1] + nums[1] if is_rel else nums[1]]
-                elif cu == 'L':
-                    for i in range(0, len(nums) - 1, 2):
-                        nxt = (cur[0] + nums[i] if is_rel else nums[i],
-                               cur[1] + nums[i + 1] if is_rel else nums[i + 1])
-                        segs.append((tuple(cur), nxt))
-                        cur[:] = list(nxt)
-                elif cu == 'H':
-                    for x in nums:
-                        nxt = (cur[0] + x if is_rel else x, cur[1])
-                        segs.append((tuple(cur), nxt))
-                        cur[0] = nxt[0]
-                elif cu == 'V':
-                    for y in nums:
-                        nxt = (cur[0], cur[1] + y if is_rel else y)
-                        segs.append((tuple(cur), nxt))
-                        cur[1] = nxt[1]
-    return segs
-
-
-def _on_segment(px: float, py: float, s: tuple, e: tuple, tol: float = 1.5) -> bool:
-    """Return True if (px, py) lies on segment s→e within tolerance."""
-    x1, y1, x2, y2 = s[0], s[1], e[0], e[1]
-    if not (min(x1, x2) - tol <= px <= max(x1, x2) + tol and
-            min(y1, y2) - tol <= py <= max(y1, y2) + tol):
-        return False
+    import numpy as np
+
+    n_pts = len(points)
+    hit = np.zeros(n_pts, dtype=bool)
+    if not n_pts or not len(segs):
+        return ~hit
+
+    lo = np.minimum(segs[:, :2], segs[:, 2:]) - tol
+    hi = np.maximum(segs[:, :2], segs[:, 2:]) + tol
+    extent = float(max((hi - lo.min(axis=0)).max(), 1.0))
+    cell = max(4 * tol, extent / max(1.0, len(segs) ** 0.5))
+
+    c_lo = np.floor(lo / cell).astype(np.int64)
+    c_hi = np.floor(hi / cell).astype(np.int64)
+    span = c_hi - c_lo + 1
+    n_cells = span[:, 0] * span[:, 1]
+    wide = n_cells > _GRID_MAX_CELLS
+
+    # (cell key, segment) pairs for every cell each narrow segment touches.
+    narrow = np.flatnonzero(~wide)
+    reps = n_cells[narrow]
+    seg_ids = np.repeat(narrow, reps)
+    offset = np.arange(len(seg_ids)) - np.repeat(np.cumsum(reps) - reps, reps)
+    gx = c_lo[seg_ids, 0] + offset % span[seg_ids, 0]
+    gy = c_lo[seg_ids, 1] + offset // span[seg_ids, 0]
+    key_base = int(c_hi[:, 1].max() - c_lo[:, 1].min() + 3)
+    y_min = int(c_lo[:, 1].min()) - 1
+    keys = gx * key_base + (gy - y_min)
+    order = np.argsort(keys, kind="stable")
+    keys, seg_ids = keys[order], seg_ids[order]
+
+    p_cell = np.floor(points / cell).astype(np.int64)
+    p_cy = np.clip(p_cell[:, 1], y_min, y_min + key_base - 1)
+    p_keys = p_cell[:, 0] * key_base + (p_cy - y_min)
+    start = np.searchsorted(keys, p_keys, side="left")
+    stop = np.searchsorted(keys, p_keys, side="right")
+    counts = stop - start
+    pt_ids = np.repeat(np.arange(n_pts), counts)
+    pair_segs = seg_ids[
+        np.repeat(start, counts)
+        + np.arange(len(pt_ids))
+        - np.repeat(np.cumsum(counts) - counts, counts)
+    ]
+
+    # Wide segments: test against every point.
+    wide_ids = np.flatnonzero(wide)
+    if len(wide_ids):
+        pt_ids = np.concatenate([pt_ids, np.repeat(np.arange(n_pts), len(wide_ids))])
+        pair_segs = np.concatenate([pair_segs, np.tile(wide_ids, n_pts)])
+
+    px, py = points[pt_ids, 0], points[pt_ids, 1]
+    x1, y1, x2, y2 = segs[pair_segs].T
+    rounded = np.round(segs[pair_segs])
+    own = ((rounded[:, 0] == px) & (rounded[:, 1] == py)) | (
+        (rounded[:, 2] == px) & (rounded[:, 3] == py)
+    )
+    inside = (
+        (lo[pair_segs, 0] <= px)
+        & (px <= hi[pair_segs, 0])
+        & (lo[pair_segs, 1] <= py)
+        & (py <= hi[pair_segs, 1])
+    )
     dx, dy = x2 - x1, y2 - y1
     len_sq = dx * dx + dy * dy
-    if len_sq < 1e-10:
-        return abs(px - x1) <= tol and abs(py - y1) <= tol
-    return abs(dy * px - dx * py + x2 * y1 - y2 * x1) / (len_sq ** 0.5) <= tol
+    degenerate = len_sq < 1e-10
+    with np.errstate(divide="ignore", invalid="ignore"):
+        near_line = np.abs(dy * px - dx * py + x2 * y1 - y2 * x1) / (len_sq**0.5) <= tol
+    near_point = (np.abs(px - x1) <= tol) & (np.abs(py - y1) <= tol)
+    on = ~own & inside & np.where(degenerate, near_point, near_line)
+    hit[pt_ids[on]] = True
+    return ~hit
 
 
 def _label_floating(
@@ -182,146 +166,76 @@ def detect_snap_points(svg_path: Path, category: str) -> list[dict]:
 
     Returns list of {"id": str, "x": float, "y": float}.
     """
-    try:
-        tree = ET.parse(svg_path)
-        root = tree.getroot()
-    except ET.ParseError:
-        return []
+    return detect_snap_points_with_method(svg_path, category)[0]
 
-    vb_parts = [float(v) for v in (root.get("viewBox") or "").split()]
-    if len(vb_parts) >= 4:
-        vb_x0, vb_y0, vb_w, vb_h = vb_parts[0], vb_parts[1], vb_parts[2], vb_parts[3]
+
+def detect_snap_points_with_method(
+    svg_path: Path, category: str
+) -> tuple[list[dict], str]:
+    """
+    detect_snap_points() plus the strategy that produced the points:
+    "id", "open_end", "bubble" or "bbox" ("" when nothing was found).
+    """
+    geom = load_geometry(svg_path)
+    if geom is None:
+        return [], ""
+    if geom.view_box is not None:
+        vb_x0, vb_y0, vb_w, vb_h = geom.view_box
     else:
         vb_x0 = vb_y0 = vb_w = vb_h = None
 
     # Strategy 1: semantically labelled elements
-    id_pts: list[dict] = []
-    for elem in root.iter():
-        eid = (elem.get("id") or "").lower()
-        ecl = (elem.get("class") or "").lower()
-        if any(kw in eid or kw in ecl
-               for kw in ("port", "conn", "inlet", "outlet", "signal", "terminal", "snap")):
-            local = elem.tag.split("}")[-1] if "}" in elem.tag else elem.tag
-            x = y = None
-            if local in ("circle", "ellipse"):
-                x, y = float(elem.get("cx", 0)), float(elem.get("cy", 0))
-            elif local == "rect":
-                x = float(elem.get("x", 0)) + float(elem.get("width", 0)) / 2
-                y = float(elem.get("y", 0)) + float(elem.get("height", 0)) / 2
-            elif local == "line":
-                x = (float(elem.get("x1", 0)) + float(elem.get("x2", 0))) / 2
-                y = (float(elem.get("y1", 0)) + float(elem.get("y2", 0))) / 2
-            if x is not None:
-                id_pts.append({"id": eid or f"p{len(id_pts) + 1}",
-                               "x": round(x, 2), "y": round(y, 2)})
-    if id_pts:
-        return id_pts
-
-    segs = _straight_segments(root)
+    if geom.ports:
+        return [dict(p) for p in geom.ports], "id"
+
+    import numpy as np
+
+    segs = geom.segments
 
     # Strategy 2: open-end floating endpoint detection (valve/pipe categories only)
     if category in _OPEN_END_CATS:
-        all_eps: list[tuple[float, float]] = []
-        for elem in root.iter():
-            local = elem.tag.split("}")[-1] if "}" in elem.tag else elem.tag
-            if local == "line":
-                try:
-                    all_eps += [
-                        (float(elem.get("x1", 0)), float(elem.get("y1", 0))),
-                        (float(elem.get("x2", 0)), float(elem.get("y2", 0))),
-                    ]
-                except ValueError:
-                    pass
-            elif local == "path":
-                all_eps.extend(_path_open_endpoints(elem.get("d", "")))
-
         count: dict[tuple[int, int], int] = {}
-        for x, y in all_eps:
+        for x, y in geom.endpoints.tolist():
             k = (round(x), round(y))
             count[k] = count.get(k, 0) + 1
 
-        floating = [
-            pt for pt, n in count.items()
-            if n == 1 and not any(
-                _on_segment(pt[0], pt[1], s, e)
-                for s, e in segs
-                if (round(s[0]), round(s[1])) != pt and (round(e[0]), round(e[1])) != pt
-            )
-        ]
+        candidates = [pt for pt, n in count.items() if n == 1]
+        keep = _floating_mask(
+            np.array(candidates, dtype=np.float64).reshape(-1, 2), segs
+        )
+        floating = [pt for pt, ok in zip(candidates, keep) if ok]
         if floating:
-            return _label_floating(floating, category)
+            return _label_floating(floating, category), "open_end"
 
     # Strategy 3: circle/ellipse cardinal points for instrument bubbles
-    if category in _BUBBLE_CATS:
-        bubbles: list[tuple[float, float, float, float]] = []  # (rx, ry, cx, cy)
-        for elem in root.iter():
-            local = elem.tag.split("}")[-1] if "}" in elem.tag else elem.tag
-            if local == "circle":
-                try:
-                    r = float(elem.get("r", 0))
-                    bubbles.append((r, r, float(elem.get("cx", 0)), float(elem.get("cy", 0))))
-                except ValueError:
-                    pass
-            elif local == "ellipse":
-                try:
-                    bubbles.append((
-                        float(elem.get("rx", 0)),
-                        float(elem.get("ry", 0)),
-                        float(elem.get("cx", 0)),
-                        float(elem.get("cy", 0)),
-                    ))
-                except ValueError:
-                    pass
-        if bubbles:
-            rx, ry, ccx, ccy = max(bubbles, key=lambda b: b[0] * b[1])
-            return [
-                {"id": "north", "x": round(ccx, 2),        "y": round(ccy - ry, 2)},
-                {"id": "south", "x": round(ccx, 2),        "y": round(ccy + ry, 2)},
-                {"id": "east",  "x": round(ccx + rx, 2),   "y": round(ccy, 2)},
-                {"id": "west",  "x": round(ccx - rx, 2),   "y": round(ccy, 2)},
-            ]
+    if category in _BUBBLE_CATS and len(geom.ellipses):
+        rx, ry, ccx, ccy = max(geom.ellipses.tolist(), key=lambda b: b[0] * b[1])
+        return [
+            {"id": "north", "x": round(ccx, 2),        "y": round(ccy - ry, 2)},
+            {"id": "south", "x": round(ccx, 2),        "y": round(ccy + ry, 2)},
+            {"id": "east",  "x": round(ccx + rx, 2),   "y": round(ccy, 2)},
+            {"id": "west",  "x": round(ccx - rx, 2),   "y": round(ccy, 2)},
+        ], "bubble"
 
     # Strategy 4: category bounding-box extremes.
     # Exclude segments that lie entirely on the viewBox boundary.
-    def _on_vb(x: float, y: float) -> bool:
+    def _on_vb(x, y):
         if vb_w is None or vb_h is None:
-            return False
+            return np.zeros(len(x), dtype=bool)
         return (
-            abs(x - vb_x0) < 1 or abs(x - (vb_x0 + vb_w)) < 1 or
-            abs(y - vb_y0) < 1 or abs(y - (vb_y0 + vb_h)) < 1
+            (np.abs(x - vb_x0) < 1) | (np.abs(x - (vb_x0 + vb_w)) < 1) |
+            (np.abs(y - vb_y0) < 1) | (np.abs(y - (vb_y0 + vb_h)) < 1)
         )
 
-    all_pts: list[tuple[float, float]] = [
-        p for s, e in segs for p in (s, e)
-        if not (_on_vb(*s) and _on_vb(*e))
-    ]
-    for elem in root.iter():
-        local = elem.tag.split("}")[-1] if "}" in elem.tag else elem.tag
-        if local == "circle":
-            try:
-                ccx = float(elem.get("cx", 0))
-                ccy = float(elem.get("cy", 0))
-                cr  = float(elem.get("r",  0))
-                all_pts += [(ccx - cr, ccy), (ccx + cr, ccy),
-                            (ccx, ccy - cr), (ccx, ccy + cr)]
-            except ValueError:
-                pass
-        elif local == "ellipse":
-            try:
-                ccx = float(elem.get("cx", 0))
-                ccy = float(elem.get("cy", 0))
-                erx = float(elem.get("rx", 0))
-                ery = float(elem.get("ry", 0))
-                all_pts += [(ccx - erx, ccy), (ccx + erx, ccy),
-                            (ccx, ccy - ery), (ccx, ccy + ery)]
-            except ValueError:
-                pass
-    if not all_pts:
-        return []
+    kept = segs[~(_on_vb(segs[:, 0], segs[:, 1]) & _on_vb(segs[:, 2], segs[:, 3]))]
+    erx, ery, ccx, ccy = geom.ellipses.T
+    xs = np.concatenate([kept[:, 0], kept[:, 2], ccx - erx, ccx + erx, ccx])
+    ys = np.concatenate([kept[:, 1], kept[:, 3], ccy, ccy - ery, ccy + ery])
+    if not len(xs):
+        return [], ""
 
-    xs, ys   = [p[0] for p in all_pts], [p[1] for p in all_pts]
-    x_min, x_max = min(xs), max(xs)
-    y_min, y_max = min(ys), max(ys)
+    x_min, x_max = float(xs.min()), float(xs.max())
+    y_min, y_max = float(ys.min()), float(ys.max())
     cx_g = (x_min + x_max) / 2
     cy_g = (y_min + y_max) / 2
 
@@ -329,15 +243,15 @@ def detect_snap_points(svg_path: Path, category: str) -> list[dict]:
         return [
             {"id": "in",      "x": round(x_min, 2), "y": round(cy_g, 2)},
             {"id": "out",     "x": round(x_max, 2), "y": round(cy_g, 2)},
-        ]
+        ], "bbox"
     if category in _ACTUATOR_CATS:
         return [
             {"id": "signal",  "x": round(cx_g, 2),  "y": round(y_min, 2)},
             {"id": "process", "x": round(cx_g, 2),  "y": round(y_max, 2)},
-        ]
+        ], "bbox"
     return [
         {"id": "north", "x": round(cx_g, 2),  "y": round(y_min, 2)},
         {"id": "south", "x": round(cx_g, 2),  "y": round(y_max, 2)},
         {"id": "east",  "x": round(x_max, 2), "y": round(cy_g, 2)},
         {"id": "west",  "x": round(x_min, 2), "y": round(cy_g, 2)},
-    ]
+    ], "bbox"
@@ -4,11 +4,15 @@ from __future__ import annotations
 
 import base64
 import io
+import math
 import threading
-from collections.abc import Mapping, Sequence
+from collections.abc import Callable, Iterable, Iterator, Mapping, Sequence
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from dataclasses import replace
 from pathlib import Path
 from random import Random
-from typing import cast
+from typing import TypeVar, cast
 
 import numpy as np
 from PIL import Image
@@ -22,6 +26,8 @@ else:
     _CAIROSVG_IMPORT_ERROR = None
 
 from .constants import (
+    AUGMENT_WORKERS_DEFAULT,
+    AUGMENT_WORKERS_MAX,
     BATCH_MAX_COUNT,
     COMBO_ATTEMPT_LIMIT,
     DEMOGRAPHIC_SIZE_MAX,
@@ -38,11 +44,21 @@ from .constants import (
 )
 from .reports import combo_overlaps_flagged, compute_effect_caps, compute_flagged_combos
 from .symbols import _safe_path, list_symbols
+from src.array_dataset import ArrayDatasetWriter
+from src.augmentation import _render_jobs
 from src.degradation import _APPLY_ORDER, apply_effects
-from src.svg_utils import _render_svg_to_png
+from src.image_codecs import CODECS, DEFAULT_CODEC
+from src.image_writer import ImageWriterSpec
+from src.render_pool import get_render_pool
+from src.shards import SHARD_DIRNAME, ShardWriter
+from src.svg_utils import _render_svg_to_array
 
 
 EffectIntensities = dict[str, float]
+FramePlan = tuple[EffectIntensities, int]  # (sampled effects, geometry seed)
+
+_T = TypeVar("_T")
+_R = TypeVar("_R")
 
 
 def _cap_intensity(value: float, cap: float) -> float:
@@ -55,12 +71,15 @@ def _encode_image(arr: np.ndarray) -> str:
     return "data:image/png;base64," + base64.b64encode(buf.getvalue()).decode("ascii")
 
 
-def _normalize_image(source_data: bytes, size: int) -> np.ndarray:
-    with Image.open(io.BytesIO(source_data)) as opened:
-        rgb = opened.convert("RGB")
-        if rgb.size != (size, size):
-            rgb = rgb.resize((size, size), Image.Resampling.LANCZOS)
-        return np.array(rgb, dtype=np.uint8)
+def _normalize_array(arr: np.ndarray, size: int) -> np.ndarray:
+    """Resize an RGB raster to size x size (no-op when already that size).
+
+    SVGs are rendered straight at size x size, so this is only a guard.
+    """
+    if arr.shape[:2] == (size, size):
+        return arr.astype(np.uint8, copy=False)
+    rgb = Image.fromarray(arr).resize((size, size), Image.Resampling.LANCZOS)
+    return np.array(rgb, dtype=np.uint8)
 
 
 def _select_non_flagged_combo(
@@ -121,6 +140,115 @@ def _sample_effects(
     return {}
 
 
+def _resolve_workers(body: Mapping[str, object]) -> int:
+    """Return the thread count requested by *body*, clamped to the allowed range.
+
+    Missing or non-numeric values fall back to AUGMENT_WORKERS_DEFAULT.
+    """
+    raw = body.get("workers")
+    if raw in (None, "", 0, "0"):
+        return AUGMENT_WORKERS_DEFAULT
+    try:
+        workers = int(cast(int, raw))
+    except (TypeError, ValueError):
+        return AUGMENT_WORKERS_DEFAULT
+    return max(1, min(AUGMENT_WORKERS_MAX, workers))
+
+
+def _resolve_writer_spec(body: Mapping[str, object]) -> ImageWriterSpec:
+    """Return the background writer settings ("codec", "compress_level") in *body*.
+
+    Unknown codecs fall back to PNG and a missing or non-numeric level to the
+    default.
+    """
+    codec = str(body.get("codec") or DEFAULT_CODEC).lower()
+    if codec not in CODECS:
+        codec = DEFAULT_CODEC
+    raw = body.get("compress_level")
+    if raw in (None, ""):
+        return ImageWriterSpec(codec=codec)
+    try:
+        level = max(0, min(9, int(cast(int, raw))))
+    except (TypeError, ValueError):
+        return ImageWriterSpec(codec=codec)
+    return ImageWriterSpec(compress_level=level, codec=codec)
+
+
+def _resolve_shard_bytes(body: Mapping[str, object]) -> int:
+    """Return the tar shard size requested by *body* ("shard_mb"); 0 = loose files.
+
+    Missing, non-numeric, non-finite and non-positive values mean no sharding.
+    """
+    raw = body.get("shard_mb")
+    if raw in (None, "", 0, "0"):
+        return 0
+    try:
+        shard_mb = float(cast(float, raw))
+    except (TypeError, ValueError):
+        return 0
+    if not (math.isfinite(shard_mb) and shard_mb > 0):
+        return 0
+    return max(1, int(shard_mb * 1024 * 1024))
+
+
+def _plan_frames(
+    rng: Random,
+    count: int,
+    effect_caps: Mapping[str, float],
+    flagged_combos: Sequence[frozenset[str]],
+    explicit_effects: Mapping[str, float],
+    randomize_per_image: bool,
+) -> list[FramePlan]:
+    """Sample effects and a geometry seed for each frame from the shared RNG.
+
+    Sampling stays on the calling thread so the shared ``Random`` is never
+    touched concurrently; workers only receive the resulting plans.
+    """
+    return [
+        (
+            _sample_effects(
+                rng,
+                effect_caps,
+                flagged_combos,
+                _APPLY_ORDER,
+                explicit_effects,
+                randomize_per_image,
+            ),
+            rng.getrandbits(64),
+        )
+        for _ in range(count)
+    ]
+
+
+def _degrade_frame(
+    base_arr: np.ndarray, plan: FramePlan
+) -> tuple[np.ndarray, EffectIntensities]:
+    """Apply the random geometry and degradation effects described by *plan*."""
+    varied, seed = plan
+    frame, geom = random_geometry_transform(base_arr, Random(seed))
+    frame_effects = {**geom, **varied}
+    return apply_effects(frame, frame_effects), frame_effects
+
+
+def _map_frames(
+    fn: Callable[[_T], _R], items: Iterable[_T], workers: int
+) -> Iterator[_R]:
+    """Yield ``fn(item)`` for every item in order, using a thread pool if workers > 1.
+
+    Each job processes a whole image; the NumPy/Pillow kernels inside the
+    degradation effects release the GIL, so threads scale across cores.
+    """
+    items = list(items)
+    if workers <= 1 or len(items) <= 1:
+        for item in items:
+            yield fn(item)
+        return
+    with ThreadPoolExecutor(
+        max_workers=min(workers, len(items)), thread_name_prefix="augment"
+    ) as pool:
+        yield from pool.map(fn, items)
+
+
 def random_geometry_transform(
     arr: np.ndarray, rng: Random | None = None
 ) -> tuple[np.ndarray, dict[str, float]]:
@@ -163,6 +291,7 @@ def augment_preview(body: dict) -> tuple[dict | None, str]:
     )
     count = max(1, min(PREVIEW_MAX_COUNT, int(body.get("count", 1))))
     randomize_per = bool(body.get("randomize_per_image", False))
+    workers = _resolve_workers(body)
 
     base = _safe_path(rel)
     if base is None:
@@ -171,28 +300,19 @@ def augment_preview(body: dict) -> tuple[dict | None, str]:
     if not svg_path.exists():
         return None, "SVG not found"
 
-    png_bytes = cast(bytes, _render_svg_to_png(svg_path))
-    base_arr = _normalize_image(png_bytes, size)
+    base_arr = _render_svg_to_array(svg_path, size=(size, size))
 
     effect_caps = compute_effect_caps()
     flagged_combos = compute_flagged_combos()
-    rng = Random()
+    plans = _plan_frames(
+        Random(), count, effect_caps, flagged_combos, effects, randomize_per
+    )
 
-    images_out: list[dict] = []
-    for _ in range(count):
-        varied = _sample_effects(
-            rng,
-            effect_caps,
-            flagged_combos,
-            _APPLY_ORDER,
-            effects,
-            randomize_per,
-        )
-        frame, geom = random_geometry_transform(base_arr, rng)
-        frame_effects = {**geom, **varied}
-        out_arr = apply_effects(frame, frame_effects)
-        images_out.append({"src": _encode_image(out_arr), "effects": frame_effects})
+    def _preview_frame(plan: FramePlan) -> dict:
+        out_arr, frame_effects = _degrade_frame(base_arr, plan)
+        return {"src": _encode_image(out_arr), "effects": frame_effects}
 
+    images_out = list(_map_frames(_preview_frame, plans, workers))
     return {"images": images_out}, ""
 
 
@@ -208,6 +328,7 @@ def augment_generate(body: dict) -> tuple[dict | None, str]:
     output_dir = (body.get("output_dir") or "").strip() or "./augmented"
     randomize_per = bool(body.get("randomize_per_image", False))
     return_images = bool(body.get("return_images", False))
+    workers = _resolve_workers(body)
 
     base = _safe_path(rel)
     if base is None:
@@ -217,50 +338,32 @@ def augment_generate(body: dict) -> tuple[dict | None, str]:
         return None, "SVG not found"
 
     try:
-        import cairosvg
-
-        from src.degradation import _APPLY_ORDER, apply_effects
-
         out_dir = Path(output_dir)
         out_dir.mkdir(parents=True, exist_ok=True)
 
-        svg_text = svg_path.read_text(encoding="utf-8")
-        png_bytes = cast(
-            bytes,
-            cairosvg.svg2png(
-                bytestring=svg_text.encode("utf-8"),
-                output_width=size,
-                output_height=size,
-            ),
-        )
-        base_arr = _normalize_image(png_bytes, size)
+        base_arr = _render_svg_to_array(svg_path, size=(size, size))
         stem = base.stem
 
         effect_caps = compute_effect_caps()
         flagged_combos = compute_flagged_combos()
-        rng = Random()
+        plans = _plan_frames(
+            Random(), count, effect_caps, flagged_combos, effects, randomize_per
+        )
         images_b64: list[dict] = []
 
-        for index in range(count):
-            varied = _sample_effects(
-                rng,
-                effect_caps,
-                flagged_combos,
-                _APPLY_ORDER,
-                effects,
-                randomize_per,
-            )
-            frame, geom = random_geometry_transform(base_arr, rng)
-            frame_effects = {**geom, **varied}
-            out_arr = apply_effects(frame, frame_effects)
-
-            fname = out_dir / f"{stem}_aug_{index + 1:04d}.png"
-            Image.fromarray(out_arr).save(fname)
+        frames = _map_frames(
+            lambda plan: _degrade_frame(base_arr, plan), plans, workers
+        )
+        with _resolve_writer_spec(body).open() as writer:
+            for index, (out_arr, frame_effects) in enumerate(frames):
+                out_name = f"{stem}_aug_{index + 1:04d}{writer.suffix}"
+                writer.save(out_arr, out_dir / out_name)
 
-            if return_images:
-                images_b64.append(
-                    {"src": _encode_image(out_arr), "effects": frame_effects}
-                )
+                if return_images:
+                    images_b64.append(
+                        {"src": _encode_image(out_arr), "effects": frame_effects}
+                    )
+        writer.check()
 
         result: dict[str, object] = {
             "saved": count,
@@ -300,15 +403,20 @@ def _symbol_class_name(sym_id: str) -> str:
     return parts[-1]
 
 
+def _symbol_classes(symbols: Sequence[dict[str, str]]) -> list[str]:
+    return sorted({_symbol_class_name(sym["path"]) for sym in symbols})
+
+
 def _setup_yolo_layout(
-    out_dir: Path, symbols: Sequence[dict[str, str]]
+    out_dir: Path, symbols: Sequence[dict[str, str]], make_dirs: bool = True
 ) -> tuple[Path, Path, dict[str, int]]:
     img_dir = out_dir / "images" / "train"
     lbl_dir = out_dir / "labels" / "train"
-    img_dir.mkdir(parents=True, exist_ok=True)
-    lbl_dir.mkdir(parents=True, exist_ok=True)
+    if make_dirs:
+        img_dir.mkdir(parents=True, exist_ok=True)
+        lbl_dir.mkdir(parents=True, exist_ok=True)
 
-    classes = sorted({_symbol_class_name(sym["path"]) for sym in symbols})
+    classes = _symbol_classes(symbols)
     class_map = {cls: idx for idx, cls in enumerate(classes)}
     names_block = "\n".join(f"  {idx}: {cls}" for idx, cls in enumerate(classes))
     (out_dir / "data.yaml").write_text(
@@ -334,6 +442,8 @@ def augment_batch(body: dict, batch_cancel: threading.Event):
     out_str = (body.get("output_dir") or "").strip() or "./augmented"
     randomize_per = bool(body.get("randomize_per_image", False))
     fmt = body.get("format", "png").lower()
+    workers = _resolve_workers(body)
+    shard_bytes = _resolve_shard_bytes(body)
 
     symbols = list_symbols()
     if source:
@@ -366,109 +476,169 @@ def augment_batch(body: dict, batch_cancel: threading.Event):
     n_classes = 0
 
     if fmt == "yolo":
-        img_dir, lbl_dir, class_map = _setup_yolo_layout(out_dir, symbols)
+        img_dir, lbl_dir, class_map = _setup_yolo_layout(
+            out_dir, symbols, make_dirs=not shard_bytes
+        )
         n_classes = len(class_map)
+    elif fmt == "npy":
+        class_map = {cls: idx for idx, cls in enumerate(_symbol_classes(symbols))}
+        n_classes = len(class_map)
+
+    # Sharded output: the writer keeps the encoded frames in memory and each
+    # symbol's frames and labels are appended to tar shards (see src.shards).
+    writer_spec = _resolve_writer_spec(body)
+    shards: ShardWriter | None = None
+    if shard_bytes and fmt != "npy":
+        writer_spec = replace(writer_spec, collect=True)
+        shards = ShardWriter(out_dir / SHARD_DIRNAME, shard_bytes)
 
     processed = saved = skipped = errors = 0
     rng = Random()
 
-    for i, sym in enumerate(symbols):
-        if batch_cancel.is_set():
-            yield {
-                "type": "cancelled",
-                "processed": processed,
-                "saved": saved,
-                "skipped": skipped + (total - i),
-                "errors": errors,
-            }
-            return
+    # Render every available SVG on the shared render pool up front; rasters are
+    # consumed in symbol order while later symbols are still rendering.
+    svg_paths: list[Path | None] = []
+    for sym in symbols:
+        base = _safe_path(sym["path"])
+        svg_path = base.with_suffix(".svg") if base is not None else None
+        svg_paths.append(svg_path if svg_path and svg_path.exists() else None)
+    rasters = get_render_pool().imap(
+        _render_jobs([p for p in svg_paths if p is not None], size=(size, size))
+    )
 
-        effect_caps = compute_effect_caps()
-        flagged_combos = compute_flagged_combos()
+    # "npy": frames go straight into a preallocated memory-mapped array with
+    # labels and per-frame metadata alongside (see src.array_dataset).
+    arrays: ArrayDatasetWriter | None = None
+    if fmt == "npy":
+        arrays = ArrayDatasetWriter(
+            out_dir,
+            sum(p is not None for p in svg_paths) * count,
+            size,
+            size,
+            classes=list(class_map),
+        )
+
+    with (
+        shards if shards is not None else nullcontext(),
+        arrays if arrays is not None else nullcontext(),
+        writer_spec.open() as writer,
+    ):
+        for i, sym in enumerate(symbols):
+            if batch_cancel.is_set():
+                yield {
+                    "type": "cancelled",
+                    "processed": processed,
+                    "saved": saved,
+                    "skipped": skipped + (total - i),
+                    "errors": errors,
+                }
+                return
+
+            effect_caps = compute_effect_caps()
+            flagged_combos = compute_flagged_combos()
+
+            sym_id = sym["path"]
+            base = _safe_path(sym_id)
+            name = sym.get("name", sym_id)
+
+            if base is None:
+                errors += 1
+                yield {
+                    "type": "progress",
+                    "current": i + 1,
+                    "total": total,
+                    "name": name,
+                    "status": "error",
+                    "saved": saved,
+                }
+                continue
 
-        sym_id = sym["path"]
-        base = _safe_path(sym_id)
-        name = sym.get("name", sym_id)
-
-        if base is None:
-            errors += 1
-            yield {
-                "type": "progress",
-                "current": i + 1,
-                "total": total,
-                "name": name,
-                "status": "error",
-                "saved": saved,
-            }
-            continue
-
-        svg_path = base.with_suffix(".svg")
-        if not svg_path.exists():
-            skipped += 1
-            yield {
-                "type": "progress",
-                "current": i + 1,
-                "total": total,
-                "name": name,
-                "status": "skipped",
-                "saved": saved,
-            }
-            continue
-
-        try:
-            png_bytes = cast(bytes, _render_svg_to_png(svg_path))
-            arr = _normalize_image(png_bytes, size)
-            stem = sym_id.replace("/", "_")
-
-            cls_idx = class_map.get(_symbol_class_name(sym_id), 0)
-
-            for attempt in range(count):
-                varied = _sample_effects(
-                    rng,
-                    effect_caps,
-                    flagged_combos,
-                    _APPLY_ORDER,
-                    effects,
-                    randomize_per,
+            if svg_paths[i] is None:
+                skipped += 1
+                yield {
+                    "type": "progress",
+                    "current": i + 1,
+                    "total": total,
+                    "name": name,
+                    "status": "skipped",
+                    "saved": saved,
+                }
+                continue
+
+            try:
+                rendered = next(rasters)
+                if rendered is None:
+                    raise RuntimeError("SVG render failed")
+                arr = _normalize_array(rendered, size)
+                stem = sym_id.replace("/", "_")
+
+                cls_idx = class_map.get(_symbol_class_name(sym_id), 0)
+
+                plans = _plan_frames(
+                    rng, count, effect_caps, flagged_combos, effects, randomize_per
                 )
-                frame, geom = random_geometry_transform(arr, rng)
-                frame_effects = {**geom, **varied}
-                out_arr = apply_effects(frame, frame_effects)
-                fname = f"{stem}_aug_{attempt + 1:04d}"
-                Image.fromarray(out_arr).save(img_dir / f"{fname}.png")
-
-                if fmt == "yolo" and lbl_dir is not None:
-                    bbox = tight_bbox_yolo(out_arr)
-                    if bbox:
-                        cx, cy, bw, bh = bbox
-                        (lbl_dir / f"{fname}.txt").write_text(
-                            f"{cls_idx} {cx:.6f} {cy:.6f} {bw:.6f} {bh:.6f}\n",
-                            encoding="utf-8",
+                frames = _map_frames(
+                    lambda plan: _degrade_frame(arr, plan), plans, workers
+                )
+                labels: list[tuple[Path, str]] = []
+                for attempt, (out_arr, frame_effects) in enumerate(frames):
+                    if arrays is not None:
+                        arrays.add(
+                            out_arr,
+                            cls_idx,
+                            tight_bbox_yolo(out_arr),
+                            {
+                                "symbol": sym_id,
+                                "frame": attempt + 1,
+                                "effects": frame_effects,
+                                "seed": plans[attempt][1],
+                            },
                         )
-
-                saved += 1
-
-            processed += 1
-            yield {
-                "type": "progress",
-                "current": i + 1,
-                "total": total,
-                "name": name,
-                "status": "ok",
-                "saved": saved,
-            }
-
-        except Exception as exc:
-            errors += 1
-            yield {
-                "type": "progress",
-                "current": i + 1,
-                "total": total,
-                "name": name,
-                "status": "error",
-                "saved": saved,
-                "error": str(exc),
-            }
+                        saved += 1
+                        continue
+
+                    fname = f"{stem}_aug_{attempt + 1:04d}"
+                    writer.save(out_arr, img_dir / f"{fname}{writer.suffix}")
+
+                    if fmt == "yolo" and lbl_dir is not None:
+                        bbox = tight_bbox_yolo(out_arr)
+                        if bbox:
+                            cx, cy, bw, bh = bbox
+                            label = f"{cls_idx} {cx:.6f} {cy:.6f} {bw:.6f} {bh:.6f}\n"
+                            if shards is not None:
+                                labels.append((lbl_dir / f"{fname}.txt", label))
+                            else:
+                                (lbl_dir / f"{fname}.txt").write_text(
+                                    label, encoding="utf-8"
+                                )
+
+                    saved += 1
+                if shards is not None:
+                    shards.add_outputs(writer.take(), labels, split="train")
+
+                processed += 1
+                yield {
+                    "type": "progress",
+                    "current": i + 1,
+                    "total": total,
+                    "name": name,
+                    "status": "ok",
+                    "saved": saved,
+                }
+
+            except Exception as exc:
+                errors += 1
+                yield {
+                    "type": "progress",
+                    "current": i + 1,
+                    "total": total,
+                    "name": name,
+                    "status": "error",
+                    "saved": saved,
+                    "error": str(exc),
+                }
+    saved -= writer.errors
+    errors += writer.errors
 
     done: dict[str, object] = {
         "type": "done",
@@ -479,8 +649,10 @@ def augment_batch(body: dict, batch_cancel: threading.Event):
         "output_dir": str(out_dir.resolve()),
         "format": fmt,
     }
-    if fmt == "yolo":
+    if fmt in ("yolo", "npy"):
         done["class_count"] = n_classes
+    if shards is not None:
+        done["shard_count"] = len(shards.shards)
     yield done
 
 
@@ -505,10 +677,8 @@ def augment_combo(body: dict) -> tuple[dict | None, str]:
         import itertools
 
         from src.degradation import apply_effects
-        from src.svg_utils import _render_svg_to_png
 
-        png_bytes = cast(bytes, _render_svg_to_png(svg_path))
-        base_arr = _normalize_image(png_bytes, size)
+        base_arr = _render_svg_to_array(svg_path, size=(size, size))
 
         effect_names = list(effects.keys())
         combos: list[dict[str, object]] = []
@@ -2,6 +2,7 @@
 
 from __future__ import annotations
 
+import os
 from typing import Final
 
 DEMOGRAPHIC_SIZE_MIN: Final[int] = 64
@@ -17,3 +18,5 @@ EFFECT_MIN_SCALE: Final[float] = 0.15
 EFFECT_MAX_SCALE: Final[float] = 0.65
 EFFECT_STDEV_SCALE: Final[float] = 0.7
 EFFECT_STDEV_RANGE: Final[float] = 1.3
+AUGMENT_WORKERS_DEFAULT: Final[int] = os.cpu_count() or 1
+AUGMENT_WORKERS_MAX: Final[int] = 64
@@ -0,0 +1,597 @@
+"""
+svg_geometry.py
+--------------------
+SVG geometry engine for snap-point detection (used by snap_points).
+
+extract_geometry() walks the element tree once.  It composes `transform`
+attributes down nested <g>/<svg> elements and follows <use> references
+(href / xlink:href, plus the x/y offset).  <defs>, <symbol> and other
+non-rendered containers are only drawn when a <use> references them.  Every
+path command is interpreted, including implicit lineto pairs, Z, S/T
+reflection and A (endpoint to centre conversion).  Curves and arcs are
+flattened into short polylines.  Every coordinate ends up in the root user
+space.  The resulting SymbolGeometry feeds every snap-point strategy:
+
+  - segments   (M, 4) x1, y1, x2, y2 of every straight or flattened segment
+               (<line>, <polyline>, <polygon>, <rect>, <path>)
+  - endpoints  (E, 2) open-end candidates: both ends of every <line> and
+               <polyline>, and the start/end of each open path subpath that
+               contains a straight command
+  - ellipses   (K, 4) half-width, half-height, cx, cy of every <circle> /
+               <ellipse> (axis-aligned extent after transformation), in
+               document order
+  - segment_paint / ellipse_paint
+               (M,) / (K,) PAINT_* flags (filled, dashed) with fill and
+               stroke-dasharray inherited down the tree
+  - ports      snap points of elements whose id/class marks them as a port
+  - view_box   the root viewBox (x, y, w, h), or None
+  - tag_counts number of drawn elements per local tag name
+  - texts      whitespace-normalised content of each <text> element
+
+load_geometry() parses a file and caches the result per content hash, so
+duplicate symbols and repeated runs over the same file are parsed once.
+
+numpy is imported lazily inside functions.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import math
+import re
+import xml.etree.ElementTree as ET
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from types import MappingProxyType
+from typing import Any, Mapping
+
+PORT_KEYWORDS: tuple[str, ...] = (
+    "port",
+    "conn",
+    "inlet",
+    "outlet",
+    "signal",
+    "terminal",
+    "snap",
+)
+
+# Segments per flattened Bézier curve; arcs use one segment per 22.5 degrees.
+CURVE_STEPS: int = 8
+ARC_STEP_RADIANS: float = math.pi / 8
+
+GEOMETRY_CACHE_SIZE: int = 4096
+
+# Containers that are never drawn directly (only through <use>).
+_NON_RENDERED = frozenset(
+    {
+        "defs",
+        "symbol",
+        "clipPath",
+        "mask",
+        "marker",
+        "pattern",
+        "linearGradient",
+        "radialGradient",
+        "filter",
+        "title",
+        "desc",
+        "metadata",
+        "style",
+        "script",
+    }
+)
+_MAX_USE_DEPTH = 8
+
+_PATH_TOKEN_RE = re.compile(r"([MLHVZACSQTmlhvzacsqt])([^MLHVZACSQTmlhvzacsqt]*)")
+_NUMBER_RE = re.compile(r"[-+]?\d*\.?\d+(?:[eE][-+]?\d+)?")
+_ARC_NUMBER_RE = re.compile(r"[\s,]*([-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?)")
+_ARC_FLAG_RE = re.compile(r"[\s,]*([01])")
+_TRANSFORM_RE = re.compile(r"(matrix|translate|scale|rotate|skewX|skewY)\s*\(([^)]*)\)")
+_PAINT_STYLE_RE = re.compile(r"(?:^|;)\s*(fill|stroke-dasharray)\s*:\s*([^;]*)")
+
+PAINT_FILLED: int = 1
+PAINT_DASHED: int = 2
+_ARG_COUNT = {"M": 2, "L": 2, "H": 1, "V": 1, "C": 6, "S": 4, "Q": 4, "T": 2, "A": 7}
+
+_CUBIC_BASIS = [
+    ((1 - t) ** 3, 3 * (1 - t) ** 2 * t, 3 * (1 - t) * t * t, t**3)
+    for t in (k / CURVE_STEPS for k in range(1, CURVE_STEPS + 1))
+]
+_QUAD_BASIS = [
+    ((1 - t) ** 2, 2 * (1 - t) * t, t * t)
+    for t in (k / CURVE_STEPS for k in range(1, CURVE_STEPS + 1))
+]
+
+# Affine matrix (a, b, c, d, e, f): x' = a*x + c*y + e, y' = b*x + d*y + f
+Matrix = tuple[float, float, float, float, float, float]
+IDENTITY: Matrix = (1.0, 0.0, 0.0, 1.0, 0.0, 0.0)
+
+
+@dataclass(frozen=True, slots=True)
+class SymbolGeometry:
+    """Geometry of one symbol in root user space, shared by all strategies."""
+
+    segments: Any  # (M, 4) float64
+    endpoints: Any  # (E, 2) float64
+    ellipses: Any  # (K, 4) float64: half-width, half-height, cx, cy
+    segment_paint: Any  # (M,) uint8 PAINT_* flags
+    ellipse_paint: Any  # (K,) uint8 PAINT_* flags
+    ports: tuple[dict, ...]
+    view_box: tuple[float, float, float, float] | None
+    tag_counts: Mapping[str, int]  # read-only view
+    texts: tuple[str, ...]
+
+
+def _local(tag: str) -> str:
+    return tag.split("}")[-1] if "}" in tag else tag
+
+
+# ── transforms ────────────────────────────────────────────────────────────────
+
+
+def _compose(m1: Matrix, m2: Matrix) -> Matrix:
+    """Return m1 · m2 (m2 applied first)."""
+    a1, b1, c1, d1, e1, f1 = m1
+    a2, b2, c2, d2, e2, f2 = m2
+    return (
+        a1 * a2 + c1 * b2,
+        b1 * a2 + d1 * b2,
+        a1 * c2 + c1 * d2,
+        b1 * c2 + d1 * d2,
+        a1 * e2 + c1 * f2 + e1,
+        b1 * e2 + d1 * f2 + f1,
+    )
+
+
+def parse_transform(text: str | None) -> Matrix:
+    """Parse an SVG `transform` attribute; unknown or malformed parts are ignored."""
+    m = IDENTITY
+    if not text:
+        return m
+    for name, args in _TRANSFORM_RE.findall(text):
+        v = [float(n) for n in _NUMBER_RE.findall(args)]
+        if name == "matrix" and len(v) == 6:
+            t = tuple(v)
+        elif name == "translate" and v:
+            t = (1.0, 0.0, 0.0, 1.0, v[0], v[1] if len(v) > 1 else 0.0)
+        elif name == "scale" and v:
+            t = (v[0], 0.0, 0.0, v[1] if len(v) > 1 else v[0], 0.0, 0.0)
+        elif name == "rotate" and v:
+            cos_a, sin_a = math.cos(math.radians(v[0])), math.sin(math.radians(v[0]))
+            t = (cos_a, sin_a, -sin_a, cos_a, 0.0, 0.0)
+            if len(v) >= 3:
+                t = _compose(
+                    _compose((1.0, 0.0, 0.0, 1.0, v[1], v[2]), t),
+                    (1.0, 0.0, 0.0, 1.0, -v[1], -v[2]),
+                )
+        elif name == "skewX" and v:
+            t = (1.0, 0.0, math.tan(math.radians(v[0])), 1.0, 0.0, 0.0)
+        elif name == "skewY" and v:
+            t = (1.0, math.tan(math.radians(v[0])), 0.0, 1.0, 0.0, 0.0)
+        else:
+            continue
+        m = _compose(m, t)
+    return m
+
+
+def _apply(m: Matrix, flat: list[float]) -> list[float]:
+    """Transform a flat [x0, y0, x1, y1, ...] list by *m*."""
+    if m == IDENTITY:
+        return flat
+    a, b, c, d, e, f = m
+    out: list[float] = []
+    for i in range(0, len(flat), 2):
+        x, y = flat[i], flat[i + 1]
+        out += (a * x + c * y + e, b * x + d * y + f)
+    return out
+
+
+# ── path flattening ───────────────────────────────────────────────────────────
+
+
+def _arc_args(args: str) -> list[float]:
+    """Arc arguments; the two flags may be written without separators ("0 01 5 5")."""
+    values: list[float] = []
+    pos = 0
+    while True:
+        pattern = _ARC_FLAG_RE if len(values) % 7 in (3, 4) else _ARC_NUMBER_RE
+        match = pattern.match(args, pos)
+        if match is None:
+            return values
+        values.append(float(match.group(1)))
+        pos = match.end()
+
+
+def _arc_points(
+    x1: float,
+    y1: float,
+    rx: float,
+    ry: float,
+    phi: float,
+    large: bool,
+    sweep: bool,
+    x2: float,
+    y2: float,
+) -> list[tuple[float, float]]:
+    """Polyline (excluding the start point) approximating an SVG elliptical arc."""
+    if (x1, y1) == (x2, y2):
+        return []
+    rx, ry = abs(rx), abs(ry)
+    if rx == 0 or ry == 0:
+        return [(x2, y2)]
+    cos_p, sin_p = math.cos(math.radians(phi)), math.sin(math.radians(phi))
+    dx, dy = (x1 - x2) / 2, (y1 - y2) / 2
+    x1p = cos_p * dx + sin_p * dy
+    y1p = -sin_p * dx + cos_p * dy
+    lam = (x1p / rx) ** 2 + (y1p / ry) ** 2
+    if lam > 1:
+        rx, ry = rx * math.sqrt(lam), ry * math.sqrt(lam)
+    num = (rx * ry) ** 2 - (rx * y1p) ** 2 - (ry * x1p) ** 2
+    den = (rx * y1p) ** 2 + (ry * x1p) ** 2
+    coef = math.sqrt(max(0.0, num / den)) if den else 0.0
+    if large == sweep:
+        coef = -coef
+    cxp, cyp = coef * rx * y1p / ry, -coef * ry * x1p / rx
+    cx = cos_p * cxp - sin_p * cyp + (x1 + x2) / 2
+    cy = sin_p * cxp + cos_p * cyp + (y1 + y2) / 2
+    th1 = math.atan2((y1p - cyp) / ry, (x1p - cxp) / rx)
+    dth = math.atan2((-y1p - cyp) / ry, (-x1p - cxp) / rx) - th1
+    if sweep and dth < 0:
+        dth += 2 * math.pi
+    elif not sweep and dth > 0:
+        dth -= 2 * math.pi
+    n = max(2, math.ceil(abs(dth) / ARC_STEP_RADIANS))
+    pts = []
+    for k in range(1, n):
+        th = th1 + dth * k / n
+        ex, ey = rx * math.cos(th), ry * math.sin(th)
+        pts.append((cx + ex * cos_p - ey * sin_p, cy + ex * sin_p + ey * cos_p))
+    pts.append((x2, y2))
+    return pts
+
+
+def _scan_path(d: str, segs: list[float], ends: list[float]) -> None:
+    """Tokenise *d* once; append its flattened segments and open-end candidates.
+
+    Open ends are the start and end of each subpath that has no Z and
+    contains a straight command (L/H/V or an implicit lineto).  Subpaths
+    made only of curves are symbol bodies, not stubs.  Coordinates are local
+    to the path element.
+    """
+    x = y = sx = sy = 0.0
+    ctrl = (0.0, 0.0)  # last control point, for S/T reflection
+    prev = ""
+    start: tuple[float, float] | None = None
+    closed = has_line = False
+
+    def _line_to(nx: float, ny: float) -> None:
+        nonlocal x, y
+        segs.extend((x, y, nx, ny))
+        x, y = nx, ny
+
+    def _flush() -> None:
+        if start is not None and not closed and has_line:
+            ends.extend(start)
+            if (x, y) != start:
+                ends.extend((x, y))
+
+    for cmd, args in _PATH_TOKEN_RE.findall(d):
+        cu = cmd.upper()
+        if cu == "Z":
+            if (x, y) != (sx, sy):
+                _line_to(sx, sy)
+            closed = True
+            prev = "Z"
+            continue
+        nums = (
+            _arc_args(args)
+            if cu == "A"
+            else [float(n) for n in _NUMBER_RE.findall(args)]
+        )
+        n = _ARG_COUNT[cu]
+        for i in range(0, len(nums) - n + 1, n):
+            p = nums[i : i + n]
+            ox, oy = (x, y) if cmd.islower() else (0.0, 0.0)
+            kind = "L" if cu == "M" and i else cu
+            if kind == "M":
+                _flush()
+                x, y = sx, sy = ox + p[0], oy + p[1]
+                start = (x, y)
+                closed = has_line = False
+            elif kind == "L":
+                _line_to(ox + p[0], oy + p[1])
+                has_line = True
+            elif kind == "H":
+                _line_to(ox + p[0], y)
+                has_line = True
+            elif kind == "V":
+                _line_to(x, oy + p[0])
+                has_line = True
+            elif kind in ("C", "S"):
+                if kind == "C":
+                    c1 = (ox + p[0], oy + p[1])
+                    p = p[2:]
+                elif prev in ("C", "S"):
+                    c1 = (2 * x - ctrl[0], 2 * y - ctrl[1])
+                else:
+                    c1 = (x, y)
+                c2 = (ox + p[0], oy + p[1])
+                ex, ey = ox + p[2], oy + p[3]
+                x0, y0 = x, y
+                for b0, b1, b2, b3 in _CUBIC_BASIS:
+                    _line_to(
+                        b0 * x0 + b1 * c1[0] + b2 * c2[0] + b3 * ex,
+                        b0 * y0 + b1 * c1[1] + b2 * c2[1] + b3 * ey,
+                    )
+                ctrl = c2
+            elif kind in ("Q", "T"):
+                if kind == "Q":
+                    q = (ox + p[0], oy + p[1])
+                    p = p[2:]
+                elif prev in ("Q", "T"):
+                    q = (2 * x - ctrl[0], 2 * y - ctrl[1])
+                else:
+                    q = (x, y)
+                ex, ey = ox + p[0], oy + p[1]
+                x0, y0 = x, y
+                for b0, b1, b2 in _QUAD_BASIS:
+                    _line_to(
+                        b0 * x0 + b1 * q[0] + b2 * ex,
+                        b0 * y0 + b1 * q[1] + b2 * ey,
+                    )
+                ctrl = q
+            else:  # A
+                pts = _arc_points(
+                    x, y, p[0], p[1], p[2], p[3] != 0, p[4] != 0, ox + p[5], oy + p[6]
+                )
+                for px, py in pts:
+                    _line_to(px, py)
+            prev = kind
+    _flush()
+
+
+# ── element walk ──────────────────────────────────────────────────────────────
+
+
+def _port_point(elem, local: str, n_found: int, m: Matrix) -> dict | None:
+    """Snap point of an element whose id/class names it as a port, or None.
+
+    None also when a coordinate is not a plain number (e.g. "10px").
+    """
+    eid = (elem.get("id") or "").lower()
+    x = y = None
+    try:
+        if local in ("circle", "ellipse"):
+            x, y = float(elem.get("cx", 0)), float(elem.get("cy", 0))
+        elif local == "rect":
+            x = float(elem.get("x", 0)) + float(elem.get("width", 0)) / 2
+            y = float(elem.get("y", 0)) + float(elem.get("height", 0)) / 2
+        elif local == "line":
+            x = (float(elem.get("x1", 0)) + float(elem.get("x2", 0))) / 2
+            y = (float(elem.get("y1", 0)) + float(elem.get("y2", 0))) / 2
+    except ValueError:
+        return None
+    if x is None:
+        return None
+    x, y = _apply(m, [x, y])
+    return {"id": eid or f"p{n_found + 1}", "x": round(x, 2), "y": round(y, 2)}
+
+
+def _paint(elem, inherited: int) -> int:
+    """PAINT_* flags of *elem*: *inherited* updated by its fill / stroke-dasharray."""
+    props = {name: elem.get(name) for name in ("fill", "stroke-dasharray")}
+    style = elem.get("style")
+    if style:
+        props.update(_PAINT_STYLE_RE.findall(style))
+    paint = inherited
+    for name, flag, off in (
+        ("fill", PAINT_FILLED, ("none", "transparent")),
+        ("stroke-dasharray", PAINT_DASHED, ("none", "0", "")),
+    ):
+        value = props[name]
+        if value is None:
+            continue
+        value = value.strip().lower()
+        if value in off:
+            paint &= ~flag
+        elif value != "inherit":
+            paint |= flag
+    return paint
+
+
+class _Collector:
+    """Flat buffers filled by the element walk (all in root user space)."""
+
+    __slots__ = (
+        "root",
+        "ids",
+        "segs",
+        "ends",
+        "ellipses",
+        "ports",
+        "tags",
+        "texts",
+        "seg_paint",
+        "ell_paint",
+    )
+
+    def __init__(self, root) -> None:
+        self.root = root
+        self.ids: dict[str, Any] | None = None
+        self.segs: list[float] = []
+        self.ends: list[float] = []
+        self.ellipses: list[float] = []
+        self.ports: list[dict] = []
+        self.tags: dict[str, int] = {}
+        self.texts: list[str] = []
+        self.seg_paint: list[int] = []
+        self.ell_paint: list[int] = []
+
+    def lookup(self, href: str):
+        if not href.startswith("#"):
+            return None
+        if self.ids is None:
+            self.ids = {e.get("id"): e for e in self.root.iter() if e.get("id")}
+        return self.ids.get(href[1:])
+
+    def add_shape(self, elem, local: str, m: Matrix, paint: int) -> None:
+        local_segs: list[float] = []
+        local_ends: list[float] = []
+        if local == "path":
+            _scan_path(elem.get("d", ""), local_segs, local_ends)
+        elif local == "line":
+            try:
+                local_segs = [
+                    float(elem.get("x1", 0)),
+                    float(elem.get("y1", 0)),
+                    float(elem.get("x2", 0)),
+                    float(elem.get("y2", 0)),
+                ]
+            except ValueError:
+                return
+            local_ends = local_segs
+        elif local in ("polyline", "polygon"):
+            pts = [float(n) for n in _NUMBER_RE.findall(elem.get("points", ""))]
+            pts = pts[: len(pts) // 2 * 2]
+            if len(pts) < 4:
+                return
+            if local == "polygon":
+                pts += pts[:2]
+            else:
+                local_ends = pts[:2] + pts[-2:]
+            for i in range(0, len(pts) - 2, 2):
+                local_segs += pts[i : i + 4]
+        elif local == "rect":
+            try:
+                rx0, ry0 = float(elem.get("x", 0)), float(elem.get("y", 0))
+                rw, rh = float(elem.get("width", 0)), float(elem.get("height", 0))
+            except ValueError:
+                return
+            if rw <= 0 or rh <= 0:
+                return
+            corners = [rx0, ry0, rx0 + rw, ry0, rx0 + rw, ry0 + rh, rx0, ry0 + rh]
+            corners += corners[:2]
+            for i in range(0, 8, 2):
+                local_segs += corners[i : i + 4]
+        elif local in ("circle", "ellipse"):
+            try:
+                if local == "circle":
+                    rx = ry = float(elem.get("r", 0))
+                else:
+                    rx, ry = float(elem.get("rx", 0)), float(elem.get("ry", 0))
+                cx, cy = float(elem.get("cx", 0)), float(elem.get("cy", 0))
+            except ValueError:
+                return
+            a, b, c, d, _, _ = m
+            self.ellipses.extend(
+                (
+                    math.hypot(a * rx, c * ry),
+                    math.hypot(b * rx, d * ry),
+                    *_apply(m, [cx, cy]),
+                )
+            )
+            self.ell_paint.append(paint)
+            return
+        if local == "line":
+            paint &= ~PAINT_FILLED  # a line has no interior
+        self.seg_paint.extend([paint] * (len(local_segs) // 4))
+        self.segs.extend(_apply(m, local_segs))
+        self.ends.extend(_apply(m, local_ends))
+
+    def visit(
+        self,
+        elem,
+        parent: Matrix,
+        depth: int = 0,
+        referenced: bool = False,
+        paint: int = PAINT_FILLED,
+    ):
+        local = _local(elem.tag)
+        if local in _NON_RENDERED and not (referenced and local == "symbol"):
+            return
+        m = _compose(parent, parse_transform(elem.get("transform")))
+        self.tags[local] = self.tags.get(local, 0) + 1
+        paint = _paint(elem, paint)
+
+        eid = (elem.get("id") or "").lower()
+        ecl = (elem.get("class") or "").lower()
+        if any(kw in eid or kw in ecl for kw in PORT_KEYWORDS):
+            port = _port_point(elem, local, len(self.ports), m)
+            if port is not None:
+                self.ports.append(port)
+
+        if local == "use":
+            href = elem.get("href") or elem.get("{http://www.w3.org/1999/xlink}href")
+            ref = self.lookup(href or "")
+            if ref is not None and depth < _MAX_USE_DEPTH:
+                try:
+                    offset = (float(elem.get("x", 0)), float(elem.get("y", 0)))
+                except ValueError:
+                    offset = (0.0, 0.0)
+                self.visit(
+                    ref,
+                    _compose(m, (1.0, 0.0, 0.0, 1.0, *offset)),
+                    depth + 1,
+                    True,
+                    paint,
+                )
+            return
+        if local == "text":
+            self.texts.append(" ".join("".join(elem.itertext()).split()))
+
+        self.add_shape(elem, local, m, paint)
+        for child in elem:
+            if isinstance(child.tag, str):  # skip comments / processing instructions
+                self.visit(child, m, depth, paint=paint)
+
+
+def extract_geometry(root) -> SymbolGeometry:
+    """Walk *root* once and collect everything the snap-point strategies use."""
+    import numpy as np
+
+    out = _Collector(root)
+    out.visit(root, IDENTITY)
+
+    vb = [float(v) for v in _NUMBER_RE.findall(root.get("viewBox") or "")]
+
+    def _frozen(values: list[float], width: int, dtype=np.float64):
+        arr = np.array(values, dtype=dtype).reshape(-1, width)
+        arr.flags.writeable = False
+        return arr
+
+    return SymbolGeometry(
+        segments=_frozen(out.segs, 4),
+        endpoints=_frozen(out.ends, 2),
+        ellipses=_frozen(out.ellipses, 4),
+        segment_paint=_frozen(out.seg_paint, 1, np.uint8).reshape(-1),
+        ellipse_paint=_frozen(out.ell_paint, 1, np.uint8).reshape(-1),
+        ports=tuple(out.ports),
+        view_box=(vb[0], vb[1], vb[2], vb[3]) if len(vb) >= 4 else None,
+        tag_counts=MappingProxyType(out.tags),
+        texts=tuple(out.texts),
+    )
+
+
+_GEOMETRY_CACHE: OrderedDict[str, SymbolGeometry | None] = OrderedDict()
+
+
+def load_geometry(svg_path: Path) -> SymbolGeometry | None:
+    """Geometry of the SVG file at *svg_path*, or None if it is not valid XML.
+
+    Results are cached (LRU, GEOMETRY_CACHE_SIZE entries) by a hash of the
+    file content, so identical symbols are only parsed once per process.
+    """
+    data = Path(svg_path).read_bytes()
+    key = hashlib.blake2b(data, digest_size=16).hexdigest()
+    if key in _GEOMETRY_CACHE:
+        _GEOMETRY_CACHE.move_to_end(key)
+        return _GEOMETRY_CACHE[key]
+    try:
+        geom = extract_geometry(ET.fromstring(data))
+    except ET.ParseError:
+        geom = None
+    _GEOMETRY_CACHE[key] = geom
+    if len(_GEOMETRY_CACHE) > GEOMETRY_CACHE_SIZE:
+        _GEOMETRY_CACHE.popitem(last=False)
+    return geom
@@ -5,16 +5,27 @@ SVG parsing, minification, attribute extraction, and PNG rendering.
 """
 
 import re
+import sys
 import xml.etree.ElementTree as ET
 from pathlib import Path
+from typing import Any
 
 from .constants import _MINIFY_PATTERNS
 
+_ROOT_TAG_RE = re.compile(r"<svg\b[^>]*>", re.IGNORECASE)
+_CLOSE_TAG_RE = re.compile(r"</svg\s*>\s*$", re.IGNORECASE)
+_XMLNS_RE = re.compile(r'\sxmlns:\w+="[^"]*"')
+_ROOT_ATTR_RE = re.compile(r'\b(viewBox|width|height)\s*=\s*"([^"]*)"')
+_NUM_RE = re.compile(r"[-+]?\d*\.?\d+(?:[eE][-+]?\d+)?")
+_ID_DEF_RE = re.compile(r'\bid="([^"]+)"')
+_ID_REF_RE = re.compile(r'(url\(#|(?:xlink:)?href="#)([^)"]+)')
+
 
 def _minify_svg(content: str) -> str:
     """Strip XML declaration, DOCTYPE, and editor metadata bloat from SVG."""
-    for pattern, replacement in _MINIFY_PATTERNS:
-        content = pattern.sub(replacement, content)
+    for pattern, replacement, literals in _MINIFY_PATTERNS:
+        if any(literal in content for literal in literals):
+            content = pattern.sub(replacement, content)
     return content.strip()
 
 
@@ -47,6 +58,80 @@ def _parse_svg_size(svg_text: str) -> tuple[int, int] | None:
     return None
 
 
+def _prefix_ids(content: str, prefix: str) -> str:
+    """Prefix every id definition and #reference so embedded SVGs cannot collide."""
+    content = _ID_DEF_RE.sub(lambda m: f'id="{prefix}{m.group(1)}"', content)
+    return _ID_REF_RE.sub(lambda m: f"{m.group(1)}{prefix}{m.group(2)}", content)
+
+
+def _root_view_box(root_tag: str) -> tuple[float, float, float, float] | None:
+    """Return the root viewBox, falling back to (0, 0, width, height)."""
+    attrs = dict(_ROOT_ATTR_RE.findall(root_tag))
+    nums = [float(n) for n in _NUM_RE.findall(attrs.get("viewBox", ""))]
+    if len(nums) >= 4 and nums[2] > 0 and nums[3] > 0:
+        return nums[0], nums[1], nums[2], nums[3]
+    w = _NUM_RE.search(attrs.get("width", ""))
+    h = _NUM_RE.search(attrs.get("height", ""))
+    if w and h and float(w.group(0)) > 0 and float(h.group(0)) > 0:
+        return 0.0, 0.0, float(w.group(0)), float(h.group(0))
+    return None
+
+
+def _svg_embed_parts(
+    svg_text: str, id_prefix: str = ""
+) -> tuple[str, str, tuple[float, float, float, float]] | None:
+    """Split an SVG into (inner markup, xmlns:* declarations, viewBox) for nesting.
+
+    Returns None when the root tag or its size cannot be determined.
+    """
+    text = _minify_svg(svg_text)
+    if id_prefix:
+        text = _prefix_ids(text, id_prefix)
+    m = _ROOT_TAG_RE.search(text)
+    if not m:
+        return None
+    view_box = _root_view_box(m.group(0))
+    if view_box is None:
+        return None
+    body = _CLOSE_TAG_RE.sub("", text[m.end() :])
+    return body, "".join(_XMLNS_RE.findall(m.group(0))), view_box
+
+
+def _nested_svg(
+    body: str,
+    xmlns: str,
+    view_box: tuple[float, float, float, float],
+    rect: tuple[float, float, float, float],
+    aspect: str = "xMidYMid meet",
+    transform: str = "",
+) -> str:
+    """Return a nested <svg> element showing *body* inside rect (x, y, w, h)."""
+    x, y, w, h = rect
+    vb = " ".join(f"{v:g}" for v in view_box)
+    inner = (
+        f'<svg x="{x:.2f}" y="{y:.2f}" width="{w:.2f}" height="{h:.2f}" '
+        f'viewBox="{vb}" preserveAspectRatio="{aspect}"{xmlns}>{body}</svg>'
+    )
+    return f'<g transform="{transform}">{inner}</g>' if transform else inner
+
+
+def _render_size(svg_text: str, min_short_side: int = 0) -> tuple[int, int] | None:
+    """Return the output size for rendering *svg_text* in one pass.
+
+    The intrinsic size (see _parse_svg_size) is scaled up so its short side is
+    at least *min_short_side*, keeping the aspect ratio; None if unknown.
+    """
+    size = _parse_svg_size(svg_text)
+    if size is None or min_short_side <= 0:
+        return size
+    w, h = size
+    short = min(w, h)
+    if short >= min_short_side:
+        return size
+    scale = min_short_side / max(short, 1)
+    return max(1, int(round(w * scale))), max(1, int(round(h * scale)))
+
+
 def _render_svg_to_png(svg_path: Path) -> bytes:
     """Render an SVG file to PNG bytes at its intrinsic size."""
     import cairosvg
@@ -63,6 +148,77 @@ def _render_svg_to_png(svg_path: Path) -> bytes:
     return cairosvg.svg2png(bytestring=svg_text.encode("utf-8"), background_color="white")
 
 
+_array_surface_cls: Any = None
+
+
+def _array_surface_class():
+    """cairosvg PNGSurface drawing into a NumPy-owned ARGB32 buffer.
+
+    The buffer is exposed as ``surface.pixels`` (height x stride bytes); with
+    ``output=None`` finish() skips PNG encoding entirely.
+    """
+    global _array_surface_cls
+    if _array_surface_cls is None:
+        import numpy as np
+        from cairosvg.surface import PNGSurface, cairo
+
+        class _ArraySurface(PNGSurface):
+            def _create_surface(self, width, height):
+                width = max(1, int(round(width)))
+                height = max(1, int(round(height)))
+                stride = cairo.ImageSurface.format_stride_for_width(
+                    cairo.FORMAT_ARGB32, width
+                )
+                self.pixels = np.zeros((height, stride), dtype=np.uint8)
+                surface = cairo.ImageSurface(
+                    cairo.FORMAT_ARGB32, width, height, self.pixels, stride
+                )
+                return surface, width, height
+
+        _array_surface_cls = _ArraySurface
+    return _array_surface_cls
+
+
+def _rasterize_svg(svg_bytes: bytes, size: tuple[int, int] | None = None):
+    """Render SVG bytes on white and return a zero-copy (H, W, 3) RGB view.
+
+    Cairo draws straight into a NumPy buffer, so there is no PNG encode/decode.
+    The view is not C-contiguous (it reorders cairo's native-endian ARGB32
+    channels); call np.ascontiguousarray() if a consumer needs that.
+    """
+    from cairosvg.parser import Tree
+
+    kwargs: dict[str, Any] = {}
+    if size:
+        kwargs["output_width"], kwargs["output_height"] = size
+    surface = _array_surface_class()(
+        Tree(bytestring=svg_bytes), None, 96, background_color="white", **kwargs
+    )
+    surface.finish()
+    h, w = surface.height, surface.width
+    argb = surface.pixels[:, : w * 4].reshape(h, w, 4)
+    # ARGB32 is stored as B, G, R, A on little-endian and A, R, G, B on big-endian.
+    return argb[..., 2::-1] if sys.byteorder == "little" else argb[..., 1:]
+
+
+def _render_svg_to_array(
+    svg_path: Path, min_size: int = 0, size: tuple[int, int] | None = None
+):
+    """Render an SVG file to a contiguous RGB uint8 array in a single pass.
+
+    Renders at *size* if given, else at the intrinsic size scaled so the short
+    side is at least *min_size* (see _render_size) -- never render-then-resize.
+    """
+    import numpy as np
+
+    svg_text = svg_path.read_text(encoding="utf-8", errors="replace")
+    return np.ascontiguousarray(
+        _rasterize_svg(
+            svg_text.encode("utf-8"), size or _render_size(svg_text, min_size)
+        )
+    )
+
+
 def parse_svg_attributes(svg_path: Path) -> dict:
     """Extract dimensions, element count, text presence, creator from SVG."""
     result = {
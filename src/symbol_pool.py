@@ -0,0 +1,219 @@
+"""
+symbol_pool.py
+--------------------
+Rendered symbol pools shared between the YOLO exporter and its worker processes.
+
+A pool is a list of (img_arr, class_idx) entries.  Two backends are provided:
+
+  - SharedSymbolPool  packs every array into one multiprocessing.shared_memory
+                      block (fast; the whole pool lives in RAM).
+  - SpilledSymbolPool appends each raster to a spill file as it is rendered and
+                      exposes memory-mapped views, so the exporter never holds
+                      more than one raster and composites page symbols in lazily.
+
+Workers receive only the small, picklable PoolHandle and attach by name/path,
+so rendered rasters are never pickled or copied per task.
+"""
+
+from __future__ import annotations
+
+import os
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Literal, Sequence
+
+
+@dataclass(frozen=True, slots=True)
+class PoolHandle:
+    """Picklable description of a pool stored in shared memory or a spill file."""
+
+    name: str
+    shapes: tuple[tuple[int, ...], ...]
+    offsets: tuple[int, ...]
+    class_ids: tuple[int, ...]
+    backend: Literal["shm", "file"] = "shm"
+
+
+class SharedSymbolPool:
+    """Owner side of a shared-memory symbol pool.
+
+    The creating process must call close() (or use the pool as a context
+    manager) once all workers are done; that unlinks the block.
+    """
+
+    def __init__(self, entries: Sequence[tuple[Any, int]]) -> None:
+        import numpy as np
+        from multiprocessing import shared_memory
+
+        offsets: list[int] = []
+        total = 0
+        for arr, _ in entries:
+            offsets.append(total)
+            total += arr.nbytes
+
+        self._shm = shared_memory.SharedMemory(create=True, size=max(total, 1))
+        self.entries: list[tuple[Any, int]] = []
+        for (arr, class_idx), offset in zip(entries, offsets):
+            view = np.ndarray(
+                arr.shape, dtype=np.uint8, buffer=self._shm.buf, offset=offset
+            )
+            view[...] = arr
+            self.entries.append((view, class_idx))
+
+        self.handle = PoolHandle(
+            name=self._shm.name,
+            shapes=tuple(arr.shape for arr, _ in entries),
+            offsets=tuple(offsets),
+            class_ids=tuple(class_idx for _, class_idx in entries),
+        )
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def close(self) -> None:
+        """Release the views and unlink the shared-memory block."""
+        self.entries.clear()
+        self._shm.close()
+        self._shm.unlink()
+
+    def release(self) -> None:
+        """Hand the block over to another process, which must unlink it.
+
+        Releases this process's views and drops the block from this process's
+        resource tracker so it is not reported as leaked (or unlinked) at exit.
+        """
+        from multiprocessing import resource_tracker
+
+        self.entries.clear()
+        self._shm.close()
+        # Only POSIX blocks are tracked, under their "/"-prefixed OS name; the
+        # public .name strips that slash, so rebuild it the way SharedMemory
+        # does rather than reading the private _name.  (track=False would
+        # avoid registering at all, but needs Python 3.13.)
+        if os.name == "posix":
+            resource_tracker.unregister("/" + self._shm.name, "shared_memory")
+
+    def __enter__(self) -> "SharedSymbolPool":
+        return self
+
+    def __exit__(self, *_exc) -> None:
+        self.close()
+
+
+class SpilledSymbolPool:
+    """Symbol pool backed by a memory-mapped spill file.
+
+    Call append() for each rendered raster, then finalize() before reading
+    `entries` or passing `handle` to workers.  close() deletes the spill file.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._fh = open(self.path, "wb")
+        self._shapes: list[tuple[int, ...]] = []
+        self._offsets: list[int] = []
+        self._class_ids: list[int] = []
+        self._size = 0
+        self.entries: list[tuple[Any, int]] = []
+        self.handle: PoolHandle | None = None
+
+    def __len__(self) -> int:
+        return len(self._shapes)
+
+    def append(self, arr, class_idx: int) -> int:
+        """Write *arr* to the spill file and return its pool index."""
+        import numpy as np
+
+        data = np.ascontiguousarray(arr, dtype=np.uint8)
+        self._fh.write(data.tobytes())
+        self._shapes.append(data.shape)
+        self._offsets.append(self._size)
+        self._class_ids.append(class_idx)
+        self._size += data.nbytes
+        return len(self._shapes) - 1
+
+    def finalize(self) -> PoolHandle:
+        """Close the writer and map the file; returns the worker handle."""
+        self._fh.close()
+        self.handle = PoolHandle(
+            name=str(self.path),
+            shapes=tuple(self._shapes),
+            offsets=tuple(self._offsets),
+            class_ids=tuple(self._class_ids),
+            backend="file",
+        )
+        self.entries = _map_entries(self.handle)[1] if self._shapes else []
+        return self.handle
+
+    def close(self) -> None:
+        """Drop the mapped views and delete the spill file."""
+        self.entries = []
+        if not self._fh.closed:
+            self._fh.close()
+        self.path.unlink(missing_ok=True)
+
+    def __enter__(self) -> "SpilledSymbolPool":
+        return self
+
+    def __exit__(self, *_exc) -> None:
+        self.close()
+
+
+def _map_entries(handle: PoolHandle) -> tuple[Any, list[tuple[Any, int]]]:
+    """Open the storage behind *handle*; return (owner, entries)."""
+    import numpy as np
+
+    if handle.backend == "file":
+        # Copy-on-write: stray in-place writes never reach the spill file.
+        owner: Any = np.memmap(handle.name, dtype=np.uint8, mode="c")
+        entries = [
+            (
+                owner[offset : offset + int(np.prod(shape))].reshape(shape),
+                class_idx,
+            )
+            for shape, offset, class_idx in zip(
+                handle.shapes, handle.offsets, handle.class_ids
+            )
+        ]
+        return owner, entries
+
+    from multiprocessing import shared_memory
+
+    owner = shared_memory.SharedMemory(name=handle.name)
+    entries = [
+        (np.ndarray(shape, dtype=np.uint8, buffer=owner.buf, offset=offset), class_idx)
+        for shape, offset, class_idx in zip(
+            handle.shapes, handle.offsets, handle.class_ids
+        )
+    ]
+    return owner, entries
+
+
+# Worker side: at most one attached pool per process; a new handle replaces it.
+_attached: tuple[str, Any, list[tuple[Any, int]]] | None = None
+
+
+def attach_pool(handle: PoolHandle) -> list[tuple[Any, int]]:
+    """Return the (img_arr, class_idx) entries of a shared pool, attaching once."""
+    global _attached
+
+    if _attached is not None:
+        name, owner, entries = _attached
+        if name == handle.name:
+            return entries
+        entries.clear()
+        if hasattr(owner, "close"):
+            owner.close()
+        _attached = None
+
+    owner, entries = _map_entries(handle)
+    _attached = (handle.name, owner, entries)
+    return entries
+
+
+def resolve_pool(source: "PoolHandle | list[tuple[Any, int]]") -> list[tuple[Any, int]]:
+    """Return pool entries from either an in-process list or a PoolHandle."""
+    if isinstance(source, PoolHandle):
+        return attach_pool(source)
+    return source
@@ -73,52 +73,95 @@ def _source_slug_from_path(source_path: str) -> str:
     return _slugify(top) or "unknown_source"
 
 
-def _canonicalize_svg_ids(content: str) -> str:
-    """Replace all SVG id="…" values and their url(#…)/href="#…" references
-    with stable sequential names so that structurally identical SVGs that only
-    differ in randomly-generated IDs (e.g. from matplotlib/autocad exporters)
-    hash to the same value.
+# Canonical-hash patterns.  Each starts with a literal so `re` can skip ahead
+# to candidates; `i(?<!\wi)d="` is `\bid="` without a leading assertion.
+_CANON_ID_RE = re.compile(r'i(?<!\wi)d="([^"]+)"')
+_CANON_URL_RE = re.compile(r"url\(#([^)]+)\)")
+_CANON_HREF_RE = re.compile(r'href="#([^"]+)"')
+# Combined reference pattern of the two-pass fallback.
+_CANON_REF_RE = re.compile(
+    r"(?P<url>url\(#)(?P<id>[^)]+)(?P<close>\))"
+    r'|(?P<href>(?:xlink:)?href=")#(?P<hid>[^"]+)(?P<hclose>")'
+)
+
+
+def _canonicalize_two_pass(content: str) -> str:
+    """Reference implementation of _canonicalize_svg_ids (two regex passes).
+
+    Used when reference and id spans overlap, where the one-pass scan could
+    disagree with it.
     """
-    # Collect all id values in document order — keeps mapping stable regardless
-    # of how the exporter names them.
-    id_re  = re.compile(r'\bid="([^"]+)"')
-    ids    = list(dict.fromkeys(m.group(1) for m in id_re.finditer(content)))
+    ids = list(dict.fromkeys(m.group(1) for m in _CANON_ID_RE.finditer(content)))
     if not ids:
         return content
-
     mapping = {old: f"_cid{i}" for i, old in enumerate(ids)}
-
-    # Replace definitions: id="old" → id="_cidN"
-    def _repl_def(m: re.Match) -> str:
-        return f'id="{mapping[m.group(1)]}"'
-    content = id_re.sub(_repl_def, content)
-
-    # Replace all reference forms that point to an id:
-    #   url(#old)   href="#old"   xlink:href="#old"
-    ref_re = re.compile(
-        r'(?P<url>url\(#)(?P<id>[^)]+)(?P<close>\))'
-        r'|(?P<href>(?:xlink:)?href=")#(?P<hid>[^"]+)(?P<hclose>")'
-    )
+    content = _CANON_ID_RE.sub(lambda m: f'id="{mapping[m.group(1)]}"', content)
 
     def _repl_ref(m: re.Match) -> str:
         if m.group("url"):
             old = m.group("id")
-            new = mapping.get(old, old)
-            return f'{m.group("url")}{new}{m.group("close")}'
+            return f'{m.group("url")}{mapping.get(old, old)}{m.group("close")}'
         old = m.group("hid")
-        new = mapping.get(old, old)
-        return f'{m.group("href")}#{new}{m.group("hclose")}'
+        return f'{m.group("href")}#{mapping.get(old, old)}{m.group("hclose")}'
+
+    return _CANON_REF_RE.sub(_repl_ref, content)
+
 
-    return ref_re.sub(_repl_ref, content)
+def _iter_canonical_svg(content: str):
+    """Yield the canonical form of *content* (see _canonicalize_svg_ids) in pieces.
+
+    One scan per literal-prefixed pattern collects id definitions and
+    url(#…) / href="#…" references.  The pieces are then emitted in order
+    with the mapping applied -- no per-match callback and no second rewrite
+    pass over the whole document.
+    """
+    matches = [
+        (m.start(), m.end(), m.span(1), True) for m in _CANON_ID_RE.finditer(content)
+    ]
+    if not matches:
+        yield content
+        return
+    mapping: dict[str, str] = {}
+    for _, _, (start, end), _ in matches:
+        mapping.setdefault(content[start:end], f"_cid{len(mapping)}")
+    matches += [
+        (m.start(), m.end(), m.span(1), False)
+        for rx in (_CANON_URL_RE, _CANON_HREF_RE)
+        for m in rx.finditer(content)
+    ]
+    matches.sort()
+    if any(a[1] > b[0] for a, b in zip(matches, matches[1:])):
+        # Overlapping spans (e.g. an id value containing url(#…)): defer to
+        # the two-pass reference so the canonical text is unchanged.
+        yield _canonicalize_two_pass(content)
+        return
+    pos = 0
+    for _, _, (start, end), is_def in matches:
+        old = content[start:end]
+        yield content[pos:start]
+        yield mapping[old] if is_def else mapping.get(old, old)
+        pos = end
+    yield content[pos:]
+
+
+def _canonicalize_svg_ids(content: str) -> str:
+    """Replace all SVG id="…" values and their url(#…)/href="#…" references
+    with stable sequential names so that structurally identical SVGs that only
+    differ in randomly-generated IDs (e.g. from matplotlib/autocad exporters)
+    hash to the same value.
+    """
+    return "".join(_iter_canonical_svg(content))
 
 
 def _svg_sha256(content: str) -> str:
     """Return the SHA-256 hex digest of an SVG string, after canonicalizing
     internal IDs so that structurally identical SVGs with different random IDs
-    hash identically.
+    hash identically.  The canonical text is fed to the hasher piecewise.
     """
-    canonical = _canonicalize_svg_ids(content)
-    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+    h = hashlib.sha256()
+    for piece in _iter_canonical_svg(content):
+        h.update(piece.encode("utf-8"))
+    return h.hexdigest()
 
 
 def _metadata_quality(meta: dict) -> int:
@@ -0,0 +1,166 @@
+"""
+vector_augment.py
+--------------------
+Geometric augmentation applied in SVG space before rasterisation.
+
+Flips, 90° rotations, free rotation, scale and shift are composed into a single
+affine matrix which is applied as an SVG transform on the symbol; the result is
+rasterised once at the output size.  Bounding boxes are computed analytically
+by mapping the symbol's ink extents through the same matrix, so labels are
+exact and strokes are never blurred by a large raster resample.
+
+Matrices use SVG order (a, b, c, d, e, f):  x' = a·x + c·y + e,  y' = b·x + d·y + f,
+in base-raster pixel coordinates.
+
+Heavy dependencies (cairosvg, numpy) are imported lazily inside functions.
+"""
+
+from __future__ import annotations
+
+import math
+import random
+from typing import Any
+
+from .constants import WHITE_THRESHOLD
+from .svg_utils import _nested_svg, _rasterize_svg
+
+Affine = tuple[float, float, float, float, float, float]
+
+IDENTITY: Affine = (1.0, 0.0, 0.0, 1.0, 0.0, 0.0)
+
+# Bounding boxes keeping less than this fraction of their area on the canvas are
+# dropped (same threshold as the raster YOLO pipeline).
+MIN_VISIBILITY: float = 0.1
+
+
+def compose(outer: Affine, inner: Affine) -> Affine:
+    """Return the matrix applying *inner* first, then *outer*."""
+    a2, b2, c2, d2, e2, f2 = outer
+    a1, b1, c1, d1, e1, f1 = inner
+    return (
+        a2 * a1 + c2 * b1,
+        b2 * a1 + d2 * b1,
+        a2 * c1 + c2 * d1,
+        b2 * c1 + d2 * d1,
+        a2 * e1 + c2 * f1 + e2,
+        b2 * e1 + d2 * f1 + f2,
+    )
+
+
+def sample_affine(
+    rng: random.Random, width: int, height: int
+) -> tuple[Affine, int, int]:
+    """Sample the vector counterpart of the raster pipeline's geometric ops.
+
+    Mirrors HorizontalFlip / VerticalFlip / Transpose / RandomRotate90 (which
+    may swap the canvas sides), then Rotate and ShiftScaleRotate about the
+    canvas centre (which keep the canvas size and may clip).  Returns
+    (matrix, out_width, out_height).
+    """
+    m = IDENTITY
+    w, h = width, height
+
+    if rng.random() < 0.7:
+        m = compose((-1.0, 0.0, 0.0, 1.0, w, 0.0), m)
+    if rng.random() < 0.7:
+        m = compose((1.0, 0.0, 0.0, -1.0, 0.0, h), m)
+    if rng.random() < 0.5:
+        m = compose((0.0, 1.0, 1.0, 0.0, 0.0, 0.0), m)
+        w, h = h, w
+    if rng.random() < 0.8:
+        for _ in range(rng.randrange(4)):
+            m = compose((0.0, 1.0, -1.0, 0.0, h, 0.0), m)
+            w, h = h, w
+
+    angle = rng.uniform(-180.0, 180.0) if rng.random() < 0.8 else 0.0
+    scale, tx, ty = 1.0, 0.0, 0.0
+    if rng.random() < 0.5:
+        scale = 1.0 + rng.uniform(-0.15, 0.15)
+        tx = rng.uniform(-0.10, 0.10) * w
+        ty = rng.uniform(-0.10, 0.10) * h
+    if angle or scale != 1.0 or tx or ty:
+        cos = scale * math.cos(math.radians(angle))
+        sin = scale * math.sin(math.radians(angle))
+        cx, cy = w / 2, h / 2
+        m = compose((1.0, 0.0, 0.0, 1.0, -cx, -cy), m)
+        m = compose((cos, sin, -sin, cos, cx + tx, cy + ty), m)
+    return m, w, h
+
+
+def ink_outline(img_arr) -> Any | None:
+    """Return (N, 2) corner points of each row's outermost ink pixels, or None.
+
+    Under any affine map the extreme points of the ink (treated as unit pixel
+    squares) are attained at one of these corners, so mapping them gives the
+    exact box of the transformed ink without touching interior pixels.
+    """
+    import numpy as np
+
+    mask = img_arr.mean(axis=2) < WHITE_THRESHOLD
+    rows = np.flatnonzero(mask.any(axis=1))
+    if not rows.size:
+        return None
+    sub = mask[rows]
+    left = sub.argmax(axis=1).astype(np.float64)
+    right = (sub.shape[1] - sub[:, ::-1].argmax(axis=1)).astype(np.float64)
+    top = rows.astype(np.float64)
+    xs = np.concatenate([left, left, right, right])
+    ys = np.concatenate([top, top + 1, top, top + 1])
+    return np.stack([xs, ys], axis=1)
+
+
+def transformed_bbox(
+    outline, m: Affine, width: int, height: int
+) -> tuple[float, float, float, float] | None:
+    """Map *outline* through *m*; return the YOLO (cx, cy, w, h) box on the canvas.
+
+    The box is clipped to the canvas; None if too little of it remains visible.
+    """
+    a, b, c, d, e, f = m
+    xs = a * outline[:, 0] + c * outline[:, 1] + e
+    ys = b * outline[:, 0] + d * outline[:, 1] + f
+    x1, x2 = float(xs.min()), float(xs.max())
+    y1, y2 = float(ys.min()), float(ys.max())
+    area = (x2 - x1) * (y2 - y1)
+
+    cx1, cx2 = max(0.0, x1), min(float(width), x2)
+    cy1, cy2 = max(0.0, y1), min(float(height), y2)
+    if cx2 <= cx1 or cy2 <= cy1:
+        return None
+    if area > 0 and (cx2 - cx1) * (cy2 - cy1) / area < MIN_VISIBILITY:
+        return None
+    return (
+        (cx1 + cx2) / 2 / width,
+        (cy1 + cy2) / 2 / height,
+        (cx2 - cx1) / width,
+        (cy2 - cy1) / height,
+    )
+
+
+def render_affine(
+    parts: tuple[str, str, tuple[float, float, float, float]],
+    base_size: tuple[int, int],
+    m: Affine,
+    out_size: tuple[int, int],
+):
+    """Rasterise an embedded symbol under *m* onto a white out_size canvas.
+
+    *parts* comes from svg_utils._svg_embed_parts; *base_size* is the size of
+    the untransformed raster the matrix is expressed in.
+    """
+    import numpy as np
+
+    body, xmlns, view_box = parts
+    base_w, base_h = base_size
+    out_w, out_h = out_size
+    matrix = " ".join(f"{v:.6g}" for v in m)
+    svg = (
+        '<svg xmlns="http://www.w3.org/2000/svg" '
+        'xmlns:xlink="http://www.w3.org/1999/xlink" '
+        f'width="{out_w}" height="{out_h}" viewBox="0 0 {out_w} {out_h}">'
+        + _nested_svg(
+            body, xmlns, view_box, (0, 0, base_w, base_h), transform=f"matrix({matrix})"
+        )
+        + "</svg>"
+    )
+    return np.ascontiguousarray(_rasterize_svg(svg.encode("utf-8"), (out_w, out_h)))
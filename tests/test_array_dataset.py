@@ -0,0 +1,32 @@
+"""Tests for src.array_dataset."""
+
+import numpy as np
+import pytest
+
+from src.array_dataset import NO_CLASS, ArrayDatasetWriter, load_array_dataset
+
+
+class TestArrayDataset:
+    def test_round_trip_trims_to_count(self, tmp_path):
+        """Rows written come back memory-mapped; unused capacity is trimmed."""
+        with ArrayDatasetWriter(tmp_path, 4, 6, 5, classes=["a", "b"]) as arrays:
+            arrays.add(np.full((6, 5, 3), 7, np.uint8), 1, (0.5, 0.5, 0.2, 0.4))
+            arrays.add(np.full((6, 5, 3), 9, np.uint8), meta={"symbol": "x/y"})
+
+        images, labels, meta = load_array_dataset(tmp_path)
+        assert isinstance(images, np.memmap)
+        assert images.shape == (2, 6, 5, 3)
+        assert (images[0] == 7).all() and (images[1] == 9).all()
+        assert labels[0].tolist() == pytest.approx([1, 0.5, 0.5, 0.2, 0.4])
+        assert labels[1, 0] == NO_CLASS
+        assert meta["classes"] == ["a", "b"]
+        assert meta["samples"][1] == {"symbol": "x/y"}
+
+    def test_rejects_overflow_and_bad_shape(self, tmp_path):
+        """add() refuses frames of the wrong shape or past the capacity."""
+        with ArrayDatasetWriter(tmp_path, 1, 4, 4) as arrays:
+            with pytest.raises(ValueError):
+                arrays.add(np.zeros((4, 5, 3), np.uint8))
+            arrays.add(np.zeros((4, 4, 3), np.uint8))
+            with pytest.raises(ValueError):
+                arrays.add(np.zeros((4, 4, 3), np.uint8))
@@ -0,0 +1,300 @@
+"""Tests for src/augmentation module."""
+
+from __future__ import annotations
+
+import json
+import random
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+import src.symbol_pool as symbol_pool
+from src.augmentation import (
+    _YoloLayout,
+    _compose_symbols_image,
+    _run_tasks,
+    _split_is_val,
+    _tight_bbox_normalized,
+    _tight_bbox_pixels,
+    _yolo_composite_task,
+    _yolo_symbol_task,
+)
+from src.symbol_pool import SharedSymbolPool, SpilledSymbolPool, attach_pool
+
+
+def _symbol(h: int, w: int) -> np.ndarray:
+    arr = np.full((h, w, 3), 255, dtype=np.uint8)
+    arr[10 : h - 10, 20 : w - 20] = 0
+    return arr
+
+
+class TestTightBbox:
+    """Test cases for the tight bounding-box helpers."""
+
+    def test_pixels_exclusive_end(self) -> None:
+        assert _tight_bbox_pixels(_symbol(50, 80)) == (20, 10, 60, 40)
+
+    def test_blank_image(self) -> None:
+        blank = np.full((8, 8, 3), 255, dtype=np.uint8)
+        assert _tight_bbox_pixels(blank) is None
+        assert _tight_bbox_normalized(blank) is None
+
+    def test_normalized_matches_precomputed_box(self) -> None:
+        arr = _symbol(50, 80)
+        assert _tight_bbox_normalized(arr) == _tight_bbox_normalized(
+            arr, _tight_bbox_pixels(arr)
+        )
+
+
+class TestComposeSymbolsImage:
+    """Test cases for occupancy-grid composite placement."""
+
+    def test_dense_composite_labels_stay_on_canvas(self) -> None:
+        random.seed(0)
+        pool = [(_symbol(120, 100 + k), k) for k in range(40)]
+        canvas, labels = _compose_symbols_image(
+            pool, canvas_size=640, min_symbols=20, max_symbols=20
+        )
+        assert canvas.shape == (640, 640, 3)
+        assert len(labels) >= 15
+        for _, cx, cy, w, h in labels:
+            assert 0.0 <= cx - w / 2 and cx + w / 2 <= 1.0
+            assert 0.0 <= cy - h / 2 and cy + h / 2 <= 1.0
+
+    def test_blank_pool_entries_are_skipped(self) -> None:
+        blank = np.full((32, 32, 3), 255, dtype=np.uint8)
+        canvas, labels = _compose_symbols_image([(blank, 0)])
+        assert labels == []
+        assert canvas.min() == 255
+
+
+class TestSplitAssignment:
+    """Test cases for the hash-based train/val split."""
+
+    def test_fraction_and_stability(self) -> None:
+        keys = [f"iso/valve/sym{k}#{i}" for k in range(400) for i in range(5)]
+        flags = [_split_is_val(key) for key in keys]
+        assert 0.17 < sum(flags) / len(flags) < 0.23
+        assert flags == [_split_is_val(key) for key in reversed(keys)][::-1]
+
+    def test_group_split_keeps_symbol_together(self) -> None:
+        layout = _YoloLayout(
+            *(Path(name) for name in ("it", "iv", "lt", "lv")), group_split=True
+        )
+        for k in range(50):
+            assert len({layout.dirs_for(f"sym{k}", i) for i in range(8)}) == 1
+
+
+def _layout(root: Path) -> _YoloLayout:
+    return _YoloLayout(*(root / name for name in ("it", "iv", "lt", "lv")))
+
+
+def _pool() -> list[tuple[np.ndarray, int]]:
+    return [(_symbol(60 + 8 * k, 90 - 6 * k), k % 3) for k in range(5)]
+
+
+class TestSharedSymbolPool:
+    """Test cases for the shared-memory pool handed to worker processes."""
+
+    def test_attach_roundtrip(self, monkeypatch) -> None:
+        monkeypatch.setattr(symbol_pool, "_attached", None)
+        entries = _pool()
+        with SharedSymbolPool(entries) as shared:
+            attached = attach_pool(shared.handle)
+            assert attach_pool(shared.handle) is attached  # attached once
+            assert [c for _, c in attached] == [c for _, c in entries]
+            for (arr, _), (view, _) in zip(entries, attached):
+                assert view.shape == arr.shape and (view == arr).all()
+            _, owner, _ = symbol_pool._attached
+            attached.clear()
+            owner.close()
+
+
+class TestSpilledSymbolPool:
+    """Test cases for the memory-mapped spill-file pool used by stream=True."""
+
+    def test_memmap_roundtrip_and_cleanup(self, tmp_path: Path) -> None:
+        entries = _pool()
+        path = tmp_path / ".pool-isa.bin"
+        with SpilledSymbolPool(path) as spill:
+            for arr, class_idx in entries:
+                spill.append(arr, class_idx)
+            handle = spill.finalize()
+            assert handle.backend == "file" and len(spill) == len(entries)
+            for (arr, c), (view, vc) in zip(entries, spill.entries):
+                assert vc == c and (view == arr).all()
+            _, mapped = symbol_pool._map_entries(handle)
+            assert all((v == a).all() for (v, _), (a, _) in zip(mapped, entries))
+            del mapped
+        assert not path.exists()
+
+
+def _write_registry(root: Path, n: int = 4) -> Path:
+    symbols = []
+    for k in range(n):
+        svg = root / "processed" / f"v{k}.svg"
+        svg.parent.mkdir(parents=True, exist_ok=True)
+        svg.write_text(
+            f'<svg xmlns="http://www.w3.org/2000/svg" width="{60 + 10 * k}"'
+            f' height="{50 + 4 * k}"><rect id="r{k}"/></svg>'
+        )
+        symbols.append(
+            {
+                "id": f"isa/valve/v{k}",
+                "standard": "ISA",
+                "classification": {"confidence": "high"},
+                "svg_path": f"processed/v{k}.svg",
+            }
+        )
+    registry = root / "registry.json"
+    registry.write_text(json.dumps({"symbols": symbols}))
+    return registry
+
+
+def _fake_render(svg_bytes: bytes, size=None) -> np.ndarray:
+    w, h = size or (64, 64)
+    return _symbol(max(h, 30), max(w, 50))
+
+
+class TestExportYoloDatasets:
+    """End-to-end export with rendering replaced by synthetic rasters."""
+
+    def _export(self, root: Path, out: str, **kwargs) -> dict[str, bytes]:
+        from src.augmentation import export_yolo_datasets
+
+        export_yolo_datasets(
+            _write_registry(root),
+            root / out,
+            count=2,
+            dry_run=False,
+            min_size=0,
+            compose_count=3,
+            seed=11,
+            **kwargs,
+        )
+        return {
+            p.relative_to(root / out).as_posix(): p.read_bytes()
+            for p in sorted((root / out).rglob("*"))
+            if p.is_file() and p.name != "data.yaml"
+        }
+
+    @pytest.fixture(autouse=True)
+    def _fake_renderer(self, tmp_path: Path, monkeypatch) -> None:
+        import src.paths as paths
+        import src.render_pool as render_pool
+
+        monkeypatch.setattr(paths, "REPO_ROOT", tmp_path)
+        monkeypatch.setattr(render_pool, "render_job", _fake_render)
+
+    def test_rebuild_without_manifest_clears_outputs(self, tmp_path: Path) -> None:
+        """A dataset directory with no manifest is cleared, then rebuilt."""
+        dataset = tmp_path / "old" / "yolo-isa"
+        for rel in ("images/train/stale.png", "labels/val/stale.txt"):
+            (dataset / rel).parent.mkdir(parents=True, exist_ok=True)
+            (dataset / rel).write_bytes(b"old")
+        assert self._export(tmp_path, "old") == self._export(tmp_path, "clean")
+
+    def test_reexport_over_old_split_layout(self, tmp_path: Path) -> None:
+        """Old i % 5 split files never leave a sample in both splits."""
+        clean = self._export(tmp_path, "clean")
+        self._export(tmp_path, "out")
+        dataset = tmp_path / "out" / "yolo-isa"
+        for k in range(4):
+            for i in range(2):
+                split = "val" if i % 5 == 0 else "train"
+                name = f"isa_valve_v{k}_aug{i + 1}"
+                image = dataset / "images" / split / f"{name}.png"
+                if not image.exists():  # the hash split put it in the other one
+                    image.write_bytes(b"old")
+                    (dataset / "labels" / split / f"{name}.txt").write_text("0\n")
+        got = self._export(tmp_path, "out")
+        assert got == clean
+        for kind in ("images", "labels"):
+            train = {p.stem for p in (dataset / kind / "train").iterdir()}
+            val = {p.stem for p in (dataset / kind / "val").iterdir()}
+            assert not train & val
+
+    def test_stream_matches_in_memory(self, tmp_path: Path) -> None:
+        in_memory = self._export(tmp_path, "mem")
+        streamed = self._export(tmp_path, "stream", stream=True)
+        assert streamed == in_memory
+        assert any(name.startswith("yolo-isa/images/") for name in streamed)
+        assert not list((tmp_path / "stream").glob(".pool-*.bin"))
+
+
+class TestExportTasks:
+    """Test cases for seeded augmentation / composite tasks."""
+
+    def _composite_args(self, root: Path, pool_src) -> list[tuple]:
+        boxes = [_tight_bbox_pixels(arr) for arr, _ in _pool()]
+        jobs = [(i, 1000 + i) for i in range(6)]
+        return [
+            (pool_src, boxes, jobs[k : k + 2], "isa", _layout(root), True)
+            for k in range(0, len(jobs), 2)
+        ]
+
+    def test_labels_deterministic_and_rng_untouched(self, tmp_path: Path) -> None:
+        """Inline tasks repeat their labels and restore the global RNG states."""
+        random.seed(5)
+        np.random.seed(5)
+        py_state, np_state = random.getstate(), np.random.get_state()[1].copy()
+        runs = [
+            list(
+                _run_tasks(
+                    None, _yolo_composite_task, self._composite_args(tmp_path, _pool())
+                )
+            )
+            for _ in range(2)
+        ]
+        assert runs[0] == runs[1]
+        assert sum(len(labels) for labels, _ in runs[0]) == 6
+        assert random.getstate() == py_state
+        assert (np.random.get_state()[1] == np_state).all()
+
+    def test_run_tasks_streams_results(self) -> None:
+        """Pooled tasks are submitted a bounded window ahead of the consumer."""
+        from concurrent.futures import ThreadPoolExecutor
+
+        submitted = []
+
+        class _Counting(ThreadPoolExecutor):
+            def submit(self, fn, *args):
+                submitted.append(args)
+                return super().submit(fn, *args)
+
+        with _Counting(2) as executor:
+            out = []
+            for value in _run_tasks(executor, pow, [(k, 2) for k in range(50)], 4):
+                assert len(submitted) - len(out) - 1 <= 4
+                out.append(value)
+        assert out == [k * k for k in range(50)]
+
+    def test_seeded_output_independent_of_workers(self, tmp_path: Path) -> None:
+        """Pool workers attached by handle reproduce the in-process output."""
+        from concurrent.futures import ProcessPoolExecutor
+
+        def sym_args(pool_src) -> list[tuple]:
+            return [
+                (pool_src, k, f"sym{k}", _tight_bbox_normalized(arr), 3)
+                + (_layout(tmp_path), True, 42 + k)
+                for k, (arr, _) in enumerate(_pool())
+            ]
+
+        def run(executor, pool_src):
+            return (
+                list(_run_tasks(executor, _yolo_symbol_task, sym_args(pool_src))),
+                list(
+                    _run_tasks(
+                        executor,
+                        _yolo_composite_task,
+                        self._composite_args(tmp_path, pool_src),
+                    )
+                ),
+            )
+
+        inline = run(None, _pool())
+        with SharedSymbolPool(_pool()) as shared, ProcessPoolExecutor(2) as ex:
+            pooled = run(ex, shared.handle)
+        assert pooled == inline
+        assert any(labels for labels, _ in inline[0])
@@ -55,3 +55,84 @@ class TestClassifier:
         assert result.standard == "unknown"
         assert result.category == "unknown"
         assert result.confidence == "none"
+
+
+class TestCompiledRules:
+    """The compiled automaton and tries agree with plain linear scans."""
+
+    def test_keyword_automaton_matches_substring_scan(self) -> None:
+        """Test that every keyword occurrence is reported, overlaps included."""
+        import random
+
+        from src.classifier import _KeywordAutomaton
+
+        keywords = ["he", "she", "his", "hers", "valve", "val", "e"]
+        automaton = _KeywordAutomaton(keywords)
+        rng = random.Random(3)
+        for _ in range(500):
+            text = "".join(rng.choice("hersvalx_") for _ in range(rng.randint(0, 12)))
+            expected = {i for i, kw in enumerate(keywords) if kw in text}
+            assert automaton.matches(text) == expected, text
+
+    def test_prefix_trie_returns_earliest_listed_prefix(self) -> None:
+        """Test that list order wins over prefix length, like startswith()."""
+        from src.classifier import _PrefixTrie
+
+        trie = _PrefixTrie(["valve_", "v", "valve_ball_"])
+        assert trie.first_match("valve_ball_x") == 0
+        assert trie.first_match("vent") == 1
+        assert trie.first_match("pump") is None
+
+    def test_keyword_precedence(self, tmp_path: Path) -> None:
+        """Test that the keyword fallback prefers the longest keyword."""
+        from src.constants import KEYWORD_HEURISTICS
+
+        longest = max(KEYWORD_HEURISTICS, key=lambda kw: len(kw[0]))
+        result = classify(tmp_path / f"x_{longest[0]}_valve.svg")
+        assert result.method == "keyword_heuristic"
+        assert result.category == longest[1]
+
+
+class TestClassifyMany:
+    """Batch classification and its memoised results."""
+
+    def test_matches_classify(self, tmp_path: Path) -> None:
+        """Test that classify_many returns classify's results in input order."""
+        from src import paths
+        from src.classifier import classify_many, clear_classify_cache
+
+        folder = paths.INPUT_DIR / "pid-symbols-generator" / "generated"
+        files = [
+            folder / "valve_ball.svg",
+            tmp_path / "isa_things" / "pump_unit.svg",
+            folder / "nothing_here.svg",
+            folder / "valve_ball.svg",
+        ]
+        clear_classify_cache()
+        batch = classify_many(files)
+        clear_classify_cache()
+        assert batch == [classify(f) for f in files]
+        assert batch[0] is batch[3]
+        assert batch[1].standard == "ISA"
+
+    def test_summary_table(self) -> None:
+        """Test that summary rows are counted and sorted by frequency."""
+        from src.classifier import classification_summary, format_summary
+
+        a = ClassificationResult("ISA", "valve", "ball", "high", "m")
+        b = ClassificationResult("ISA", "pump", "x", "low", "k")
+        c = ClassificationResult("ISA", "valve", "gate", "high", "m")
+        rows = classification_summary([b, a, a, c])
+        assert rows == [
+            ("ISA", "valve", "high", "m", 3),
+            ("ISA", "pump", "low", "k", 1),
+        ]
+        lines = format_summary(rows).splitlines()
+        assert lines[0].split() == [
+            "standard",
+            "category",
+            "confidence",
+            "method",
+            "count",
+        ]
+        assert lines[2].split() == ["ISA", "valve", "high", "m", "3"]
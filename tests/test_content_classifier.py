@@ -0,0 +1,104 @@
+"""Tests for src/content_classifier module."""
+
+from __future__ import annotations
+
+from pathlib import Path
+
+import numpy as np
+
+from src.classifier import ClassificationResult
+from src.content_classifier import (
+    FEATURE_NAMES,
+    ContentIndex,
+    refine_with_content,
+    svg_features,
+)
+
+_PUMP = (
+    '<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 {w} 100">'
+    '<circle cx="50" cy="50" r="{r}"/><path d="M0 50 L{r} 50"/></svg>'
+)
+_VALVE = (
+    '<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 {w} 40">'
+    '<path d="M0 20 L30 20 M70 20 L100 20"/>'
+    '<path d="M30 5 L70 35 L70 5 L30 {r} Z"/></svg>'
+)
+
+
+def _result(category: str, confidence: str = "high") -> ClassificationResult:
+    return ClassificationResult(
+        standard="ISO" if confidence == "high" else "unknown",
+        category=category,
+        subcategory="x",
+        confidence=confidence,
+        method="test",
+    )
+
+
+class TestSvgFeatures:
+    """Feature extraction from parsed geometry."""
+
+    def test_vector_layout(self, tmp_path: Path) -> None:
+        svg = tmp_path / "pump.svg"
+        svg.write_text(_PUMP.format(w=100, r=40))
+        vec = svg_features(svg)
+        feats = dict(zip(FEATURE_NAMES, vec.tolist()))
+        assert vec.shape == (len(FEATURE_NAMES),)
+        assert feats["circle_ratio"] == 0.5
+        assert feats["aspect"] == 0.0
+        assert feats["horizontal"] == 1.0
+        assert np.isclose(feats["bubble_area"], np.pi * 0.16)
+
+    def test_unreadable_is_nan(self, tmp_path: Path) -> None:
+        svg = tmp_path / "bad.svg"
+        svg.write_text("<svg")
+        assert np.isnan(svg_features(svg)).all()
+        assert np.isnan(svg_features(tmp_path / "missing.svg")).all()
+
+
+class TestContentIndex:
+    """Vectorised kNN search and voting."""
+
+    def test_matches_bruteforce(self) -> None:
+        rng = np.random.default_rng(3)
+        ref = rng.normal(size=(200, 6))
+        labels = [("a", "b", "c")[i % 3] for i in range(200)]
+        queries = rng.normal(size=(50, 6))
+        index = ContentIndex(ref, labels)
+        z = (ref - ref.mean(0)) / ref.std(0)
+        q = (queries - ref.mean(0)) / ref.std(0)
+        for row, (label, share) in zip(q, index.query(queries, k=1)):
+            assert label == labels[int(np.linalg.norm(z - row, axis=1).argmin())]
+            assert share == 1.0
+
+    def test_non_finite_rows(self) -> None:
+        ref = np.array([[0.0, 0.0], [np.nan, 1.0], [1.0, 1.0]])
+        index = ContentIndex(ref, ["a", "b", "c"])
+        assert len(index) == 2
+        assert index.query(np.array([[np.inf, 0.0]])) == [None]
+
+
+class TestRefineWithContent:
+    """Unknowns are relabelled from the batch's confident results."""
+
+    def test_relabels_unknowns(self, tmp_path: Path) -> None:
+        files, results = [], []
+        for i in range(6):
+            for kind, template in (("pump", _PUMP), ("valve", _VALVE)):
+                svg = tmp_path / f"{kind}_{i}.svg"
+                svg.write_text(template.format(w=100 + i, r=30 + i))
+                files.append(svg)
+                results.append(_result(kind))
+        results[0] = _result("unknown", "none")
+        results[3] = _result("uncategorized", "high")
+        out = refine_with_content(files, results, k=3)
+        assert (out[0].category, out[0].standard) == ("pump", "ISO")
+        assert out[3].category == "valve"
+        assert out[0].confidence == "low" and out[0].method == "content_knn"
+        assert out[1:3] == results[1:3]
+
+    def test_no_references(self, tmp_path: Path) -> None:
+        svg = tmp_path / "a.svg"
+        svg.write_text(_PUMP.format(w=100, r=40))
+        results = [_result("unknown", "none")]
+        assert refine_with_content([svg], results) == results
@@ -0,0 +1,55 @@
+"""Tests for src.export_manifest."""
+
+from src.export_manifest import ExportManifest, fingerprint
+
+
+def _manifest_with_outputs(root):
+    (root / "images").mkdir()
+    out = root / "images" / "a.png"
+    out.write_bytes(b"x")
+    manifest = ExportManifest(root)
+    manifest.record("a", "hash", fingerprint({"count": 5}), 3, [out])
+    manifest.save()
+    return ExportManifest.load(root), out
+
+
+class TestExportManifest:
+    def test_current_only_when_inputs_match(self, tmp_path):
+        """Any change of content hash, params or seed makes an entry stale."""
+        manifest, _ = _manifest_with_outputs(tmp_path)
+        params = fingerprint({"count": 5})
+        assert manifest.is_current("a", "hash", params, 3)
+        assert not manifest.is_current("a", "other", params, 3)
+        assert not manifest.is_current("a", "hash", fingerprint({"count": 6}), 3)
+        assert not manifest.is_current("a", "hash", params, None)
+        assert not manifest.is_current("b", "hash", params, 3)
+
+    def test_unseeded_rerun_is_stale(self, tmp_path):
+        """An unseeded export is regenerated by an unseeded rerun."""
+        (tmp_path / "a.png").write_bytes(b"x")
+        manifest = ExportManifest(tmp_path)
+        params = fingerprint({"count": 5})
+        manifest.record("a", "hash", params, None, [tmp_path / "a.png"])
+        manifest.save()
+        assert not ExportManifest.load(tmp_path).is_current("a", "hash", params, None)
+
+    def test_missing_output_is_stale(self, tmp_path):
+        manifest, out = _manifest_with_outputs(tmp_path)
+        out.unlink()
+        assert not manifest.is_current("a", "hash", fingerprint({"count": 5}), 3)
+
+    def test_drop_deletes_outputs(self, tmp_path):
+        manifest, out = _manifest_with_outputs(tmp_path)
+        assert manifest.drop("a") == 1
+        assert not out.exists() and "a" not in manifest
+
+    def test_corrupt_manifest_loads_empty(self, tmp_path):
+        (tmp_path / "manifest.json").write_text("{not json")
+        assert ExportManifest.load(tmp_path).keys() == []
+
+    def test_prune_removes_unlisted_files(self, tmp_path):
+        manifest, out = _manifest_with_outputs(tmp_path)
+        stale = tmp_path / "images" / "b.png"
+        stale.write_bytes(b"y")
+        assert manifest.prune([tmp_path / "images", tmp_path / "missing"]) == 1
+        assert out.exists() and not stale.exists()
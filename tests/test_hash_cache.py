@@ -0,0 +1,73 @@
+"""Tests for src/hash_cache module."""
+
+from __future__ import annotations
+
+import os
+from pathlib import Path
+
+from src.hash_cache import HashCache, content_hashes, svg_file_hash
+from src.svg_utils import _minify_svg
+from src.utils import _svg_sha256
+
+_SVG = '<svg xmlns="http://www.w3.org/2000/svg"><path id="{id}" d="M0 0 L{n} 0"/></svg>'
+
+
+def _write(tmp_path: Path, name: str, n: int, id_: str = "a") -> Path:
+    svg = tmp_path / name
+    svg.write_text(_SVG.format(id=id_, n=n))
+    return svg
+
+
+class TestHashCache:
+    """Entries are reused only while size and mtime are unchanged."""
+
+    def test_round_trip_and_invalidation(self, tmp_path: Path) -> None:
+        svg = _write(tmp_path, "a.svg", 1)
+        cache = HashCache(tmp_path / "cache" / "hashes.json")
+        cache.put(svg, "h1")
+        cache.save()
+        loaded = HashCache.load(tmp_path / "cache" / "hashes.json")
+        assert loaded.get(svg) == "h1"
+
+        svg.write_text(_SVG.format(id="a", n=22))
+        assert loaded.get(svg) is None
+        assert loaded.get(tmp_path / "missing.svg") is None
+
+    def test_corrupt_file_gives_empty_cache(self, tmp_path: Path) -> None:
+        path = tmp_path / "hashes.json"
+        path.write_text("{not json")
+        assert len(HashCache.load(path)) == 0
+
+
+class TestContentHashes:
+    """Batch hashing serves cached files and records new ones."""
+
+    def test_hashes_match_registry_hash(self, tmp_path: Path) -> None:
+        files = [_write(tmp_path, f"s{i}.svg", i % 3, id_=f"x{i}") for i in range(7)]
+        files.append(tmp_path / "gone.svg")
+        cache = HashCache(tmp_path / "hashes.json")
+        got = dict(content_hashes(files, cache, workers=1, chunk_size=2))
+        assert got[7] is None
+        for i, svg in enumerate(files[:-1]):
+            expected = _svg_sha256(_minify_svg(svg.read_text()))
+            assert got[i] == svg_file_hash(svg) == expected
+        assert got[0] == got[3]  # ids are canonicalised
+        assert len(cache) == 7
+
+    def test_cached_entries_skip_hashing(self, tmp_path: Path, monkeypatch) -> None:
+        from src import hash_cache
+
+        svg = _write(tmp_path, "a.svg", 1)
+        cache = HashCache(tmp_path / "hashes.json")
+        cache.put(svg, "cached")
+        fresh = _write(tmp_path, "b.svg", 2)
+        os.utime(fresh, ns=(1, 1))
+        calls = []
+        real = hash_cache.svg_file_hash
+        monkeypatch.setattr(
+            hash_cache, "svg_file_hash", lambda p: calls.append(p) or real(p)
+        )
+        got = list(content_hashes([svg, fresh], cache, workers=1))
+        assert got[0] == (0, "cached")
+        assert calls == [fresh]
+        assert cache.get(fresh) == got[1][1]
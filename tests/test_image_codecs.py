@@ -0,0 +1,31 @@
+"""Tests for src.image_codecs."""
+
+import numpy as np
+import pytest
+
+from src.image_codecs import CODECS, decode_image, get_codec
+
+
+def _frame():
+    rng = np.random.default_rng(0)
+    return rng.integers(0, 256, (12, 9, 3), dtype=np.uint8)
+
+
+class TestImageCodecs:
+    @pytest.mark.parametrize("name", ["png", "webp", "npy"])
+    def test_lossless_round_trip(self, name):
+        """Every built-in codec decodes back to the exact frame."""
+        codec = get_codec(name)
+        for level in (0, 9):
+            data = codec.encode(_frame(), level)
+            assert (decode_image(data, codec.suffix) == _frame()).all()
+
+    def test_qoi_round_trip(self):
+        """QOI is optional; when installed it is lossless too."""
+        pytest.importorskip("qoi")
+        data = CODECS["qoi"].encode(_frame(), 6)
+        assert (decode_image(data, ".qoi") == _frame()).all()
+
+    def test_unknown_codec(self):
+        with pytest.raises(ValueError):
+            get_codec("bmp")
@@ -0,0 +1,49 @@
+"""Tests for src.image_writer."""
+
+import numpy as np
+from PIL import Image
+
+from src.image_writer import ImageWriterSpec
+
+
+class TestImageWriter:
+    def test_writes_all_frames(self, tmp_path):
+        """Every queued frame is on disk once the writer is closed."""
+        frames = [np.full((8, 8, 3), v, dtype=np.uint8) for v in range(20)]
+        with ImageWriterSpec(compress_level=1, max_pending=2).open() as writer:
+            for i, frame in enumerate(frames):
+                writer.save(frame, tmp_path / f"{i}.png")
+        assert writer.errors == 0
+        for i, frame in enumerate(frames):
+            assert (np.array(Image.open(tmp_path / f"{i}.png")) == frame).all()
+
+    def test_errors_are_counted(self, tmp_path):
+        """Failed writes are counted and re-raised by check()."""
+        with ImageWriterSpec().open() as writer:
+            writer.save(np.zeros((4, 4, 3), np.uint8), tmp_path / "missing" / "x.png")
+        assert writer.errors == 1
+        try:
+            writer.check()
+        except OSError:
+            pass
+        else:
+            raise AssertionError("check() did not raise")
+
+    def test_collect_returns_encoded_frames(self, tmp_path):
+        """Collect mode returns PNG bytes in save order instead of writing."""
+        frames = [np.full((4, 4, 3), v, dtype=np.uint8) for v in range(5)]
+        with ImageWriterSpec(collect=True).open() as writer:
+            for i, frame in enumerate(frames):
+                writer.save(frame, tmp_path / f"{i}.png")
+        taken = writer.take()
+        assert [p.name for p, _ in taken] == [f"{i}.png" for i in range(5)]
+        assert not list(tmp_path.iterdir())
+        assert taken[3][1].startswith(b"\x89PNG")
+
+    def test_codec_sets_suffix_and_format(self, tmp_path):
+        """The writer encodes with the configured codec."""
+        frame = np.full((4, 4, 3), 3, dtype=np.uint8)
+        with ImageWriterSpec(codec="webp").open() as writer:
+            writer.save(frame, tmp_path / f"x{writer.suffix}")
+        assert writer.suffix == ".webp"
+        assert (np.array(Image.open(tmp_path / "x.webp")) == frame).all()
@@ -0,0 +1,99 @@
+"""Tests for src/near_dup module."""
+
+from __future__ import annotations
+
+from pathlib import Path
+
+import numpy as np
+
+from src.near_dup import (
+    NearDupIndex,
+    fingerprint,
+    near_duplicate_groups,
+    phash,
+    similar,
+)
+
+_VALVE = (
+    '<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 100 40">'
+    '<path d="M0 20 L30 20 M70 20 L100 20" {attrs}/>'
+    '<path d="M30 5 L70 35 L70 5 L30 35 Z" fill="none"/>{extra}</svg>'
+)
+
+
+def _write(tmp_path: Path, name: str, attrs: str = "", extra: str = "") -> Path:
+    svg = tmp_path / name
+    svg.write_text(_VALVE.format(attrs=attrs, extra=extra))
+    return svg
+
+
+class TestSimilar:
+    """Exact near-duplicate confirmation."""
+
+    def test_precision_and_stroke_variants_match(self, tmp_path: Path) -> None:
+        a = fingerprint(_write(tmp_path, "a.svg", 'stroke-width="1"'))
+        (tmp_path / "b.svg").write_text(
+            '<svg viewBox="0 0 100 40" xmlns="http://www.w3.org/2000/svg">'
+            '<path stroke-width="2.5" d="M0.0004 20.0003 L30.0001 19.9998 '
+            'M70 20 L100 20"/>'
+            '<path fill="none" d="M30.0002 5 L70 35 L70 5 L30 35 Z"/></svg>'
+        )
+        b = fingerprint(tmp_path / "b.svg")
+        assert similar(a, b) and similar(b, a)
+
+    def test_extra_stroke_dash_and_label_differ(self, tmp_path: Path) -> None:
+        base = fingerprint(_write(tmp_path, "a.svg"))
+        extra = fingerprint(_write(tmp_path, "b.svg", extra='<path d="M50 20 L50 0"/>'))
+        dashed = fingerprint(_write(tmp_path, "c.svg", 'stroke-dasharray="4 2"'))
+        labelled = fingerprint(
+            _write(tmp_path, "d.svg", extra='<text x="40" y="10">FV</text>')
+        )
+        for other in (extra, dashed, labelled):
+            assert not similar(base, other)
+
+    def test_phash_distance(self) -> None:
+        rng = np.random.default_rng(1)
+        img = rng.integers(0, 256, (32, 32, 3)).astype(np.uint8)
+        assert phash(img) == phash(img.copy())
+        assert (phash(img) ^ phash(255 - img)).bit_count() > 32
+
+
+class TestNearDupIndex:
+    """LSH lookups find perturbed copies and only return representatives."""
+
+    def test_finds_perturbed_copies(self, tmp_path: Path) -> None:
+        rng = np.random.default_rng(5)
+        index = NearDupIndex()
+        shapes = []
+        for i in range(40):
+            pts = rng.uniform(0, 100, (6, 2))
+            shapes.append(pts)
+            d = "M" + " L".join(f"{x:.3f} {y:.3f}" for x, y in pts)
+            svg = tmp_path / f"s{i}.svg"
+            svg.write_text(
+                f'<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 100 100">'
+                f'<path d="{d}" fill="none"/></svg>'
+            )
+            assert index.add(i, fingerprint(svg)) is None
+        for i, pts in enumerate(shapes):
+            jitter = pts + rng.uniform(-0.05, 0.05, pts.shape)
+            d = "M" + " L".join(f"{x:.5f} {y:.5f}" for x, y in jitter)
+            svg = tmp_path / f"copy{i}.svg"
+            svg.write_text(
+                f'<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 100 100">'
+                f'<path fill="none" stroke-width="3" d="{d}"/></svg>'
+            )
+            assert index.match(fingerprint(svg)) == i
+        assert len(index) == 40
+
+
+class TestNearDuplicateGroups:
+    """Batch grouping over files."""
+
+    def test_groups(self, tmp_path: Path) -> None:
+        a = _write(tmp_path, "a.svg")
+        b = _write(tmp_path, "b.svg", 'stroke-width="3"')
+        c = _write(tmp_path, "c.svg", 'stroke-dasharray="4 2"')
+        (tmp_path / "bad.svg").write_text("<svg")
+        files = [a, b, c, tmp_path / "bad.svg"]
+        assert near_duplicate_groups(files, thumbnails=False) == [[a, b]]
@@ -0,0 +1,84 @@
+"""Tests for src/raster_snap module."""
+
+from __future__ import annotations
+
+import numpy as np
+
+from src.raster_snap import raster_snap_points, skeletonize_batch, stub_tips
+
+_VALVE_SVG = """<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 100 40">
+  <path d="M0 20 L30 20 M70 20 L100 20" stroke="#000"/>
+  <rect x="30" y="5" width="40" height="30" stroke="#000" fill="none"/>
+</svg>"""
+
+
+class _FakePool:
+    """Stands in for RenderPool: draws the valve above at the requested size."""
+
+    def __init__(self, fail: bool = False) -> None:
+        self.fail = fail
+        self.jobs = 0
+
+    def imap(self, jobs):
+        for _data, (w, h) in jobs:
+            self.jobs += 1
+            if self.fail:
+                yield None
+                continue
+            arr = np.full((h, w, 3), 255, dtype=np.uint8)
+            s = w / 100
+            y = round(20 * s)
+            x0, x1, y0, y1 = round(30 * s), round(70 * s), round(5 * s), round(35 * s)
+            arr[y - 1 : y + 1, :] = 0
+            arr[y0 : y0 + 2, x0:x1] = 0
+            arr[y1 - 2 : y1, x0:x1] = 0
+            arr[y0:y1, x0 : x0 + 2] = 0
+            arr[y0:y1, x1 - 2 : x1] = 0
+            yield arr
+
+
+class TestSkeleton:
+    """Vectorised thinning and stub tip extraction."""
+
+    def test_thick_bar_thins_to_one_pixel(self) -> None:
+        masks = np.zeros((2, 20, 40), dtype=bool)
+        masks[0, 8:13, 5:35] = True
+        skel = skeletonize_batch(masks)
+        assert skel[0].sum(axis=0)[8:32].max() == 1
+        assert not skel[1].any()
+
+    def test_tips_on_hull_only(self) -> None:
+        masks = np.zeros((1, 40, 40), dtype=bool)
+        masks[0, 19:21, 2:38] = True  # horizontal pipe
+        masks[0, 2:38, 30:32] = True  # vertical pipe
+        masks[0, 12:21, 10:12] = True  # stub ending inside the hull
+        tips = stub_tips(masks)[0].tolist()
+        assert len(tips) == 4
+        assert not any(abs(x - 10.5) < 3 and abs(y - 12) < 3 for x, y in tips)
+
+
+class TestRasterSnapPoints:
+    """Raster tips are confirmed against, and snapped onto, vector endpoints."""
+
+    def test_snaps_to_vector_endpoints(self, tmp_path) -> None:
+        svg = tmp_path / "valve.svg"
+        svg.write_text(_VALVE_SVG)
+        pool = _FakePool()
+        result = raster_snap_points([(svg, "gate_valve"), (svg, "equipment")], pool)
+        assert pool.jobs == 2
+        assert result[0] == [
+            {"id": "in", "x": 0.0, "y": 20.0},
+            {"id": "out", "x": 100.0, "y": 20.0},
+        ]
+
+    def test_failures_keep_vector_result(self, tmp_path) -> None:
+        svg = tmp_path / "valve.svg"
+        svg.write_text(_VALVE_SVG)
+        no_vb = tmp_path / "novb.svg"
+        no_vb.write_text('<svg xmlns="http://www.w3.org/2000/svg"/>')
+        pool = _FakePool(fail=True)
+        assert raster_snap_points([(svg, "gate_valve"), (no_vb, "x")], pool) == [
+            None,
+            None,
+        ]
+        assert pool.jobs == 1
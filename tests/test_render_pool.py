@@ -0,0 +1,74 @@
+"""Tests for src.render_pool."""
+
+import numpy as np
+
+import src.render_pool as render_pool
+
+
+def _fake_render(svg_bytes, size=None):
+    if not svg_bytes:
+        raise ValueError("empty job")
+    w, h = size
+    bgra = np.full((h, w, 4), len(svg_bytes), dtype=np.uint8)
+    return bgra[..., 2::-1]  # non-contiguous view, like the cairo buffer
+
+
+class TestRenderPool:
+    def test_chunk_roundtrip(self, monkeypatch):
+        """Rasters survive the shared-memory handoff; failures become None."""
+        monkeypatch.setattr(render_pool, "render_job", _fake_render)
+        handle, ok = render_pool._render_chunk([(b"abc", (4, 3)), (b"", None)])
+        out = render_pool._collect(handle, ok)
+        assert out[0].shape == (3, 4, 3) and (out[0] == 3).all()
+        assert out[1] is None
+
+    def test_inline_imap_keeps_order(self, monkeypatch):
+        """workers=1 renders in-process and yields results in job order."""
+        monkeypatch.setattr(render_pool, "render_job", _fake_render)
+        jobs = [(b"x" * n, (2, 2)) for n in (1, 2, 3)]
+        with render_pool.RenderPool(1) as pool:
+            out = pool.render(jobs)
+        assert [int(a[0, 0, 0]) for a in out] == [1, 2, 3]
+
+    def test_shared_pool_created_once_across_threads(self, monkeypatch):
+        """Concurrent first calls from server threads share one pool."""
+        from concurrent.futures import ThreadPoolExecutor
+
+        created = []
+
+        class _Pool:
+            def __init__(self, **kwargs):
+                created.append(kwargs)
+
+            def close(self):
+                pass
+
+        monkeypatch.setattr(render_pool, "_shared_pool", None)
+        monkeypatch.setattr(render_pool, "RenderPool", _Pool)
+        with ThreadPoolExecutor(8) as threads:
+            pools = list(
+                threads.map(lambda _: render_pool.get_render_pool(), range(32))
+            )
+        assert len({id(p) for p in pools}) == 1
+        assert created == [{"start_method": "spawn"}]
+
+    def test_ordered_map_bounds_in_flight_tasks(self):
+        """At most *window* tasks are submitted ahead of the consumer."""
+        from concurrent.futures import ThreadPoolExecutor
+
+        submitted = []
+
+        class _Counting(ThreadPoolExecutor):
+            def submit(self, fn, *args):
+                submitted.append(args)
+                return super().submit(fn, *args)
+
+        with _Counting(2) as executor:
+            out = []
+            for value in render_pool.ordered_map(
+                executor, lambda x: x * x, ((k,) for k in range(20)), 3
+            ):
+                # futures still pending besides the result being handed out
+                assert len(submitted) - len(out) - 1 <= 3
+                out.append(value)
+        assert out == [k * k for k in range(20)]
@@ -0,0 +1,57 @@
+"""Tests for src.shards."""
+
+import tarfile
+from pathlib import Path
+
+from src.shards import SHARD_DIRNAME, ShardWriter, iter_samples, unpack_shards
+
+
+def _write_dataset(dataset: Path, max_count: int = 2) -> None:
+    with ShardWriter(dataset / SHARD_DIRNAME, max_count=max_count) as shards:
+        for i in range(5):
+            split = "val" if i % 5 == 0 else "train"
+            label = f"0 0.5 0.5 0.{i} 0.1\n"
+            shards.add_outputs(
+                [(Path("images") / split / f"sym_aug{i}.png", bytes([i]) * (600 + i))],
+                [(Path("labels") / split / f"sym_aug{i}.txt", label)],
+            )
+    (dataset / "data.yaml").write_text("path: /old\ntrain: images/train\n")
+
+
+class TestShardWriter:
+    def test_shards_roll_over_per_split(self, tmp_path):
+        """Each split gets its own series, capped at max_count samples."""
+        _write_dataset(tmp_path)
+        names = sorted(p.name for p in (tmp_path / SHARD_DIRNAME).glob("*.tar"))
+        assert names == ["train-000000.tar", "train-000001.tar", "val-000000.tar"]
+
+    def test_members_are_webdataset_readable(self, tmp_path):
+        """Plain tarfile sees <key>.png / <key>.txt pairs."""
+        _write_dataset(tmp_path)
+        with tarfile.open(tmp_path / SHARD_DIRNAME / "train-000000.tar") as tar:
+            assert tar.getnames() == [
+                "sym_aug1.png",
+                "sym_aug1.txt",
+                "sym_aug2.png",
+                "sym_aug2.txt",
+            ]
+            assert tar.extractfile("sym_aug2.png").read() == bytes([2]) * 602
+
+    def test_index_offsets_round_trip(self, tmp_path):
+        """iter_samples reads every member back by offset, in write order."""
+        _write_dataset(tmp_path)
+        samples = list(iter_samples(tmp_path / SHARD_DIRNAME))
+        assert [key for _, key, _ in samples] == [f"sym_aug{i}" for i in range(5)]
+        for i, (split, _, files) in enumerate(samples):
+            assert split == ("val" if i == 0 else "train")
+            assert files["png"] == bytes([i]) * (600 + i)
+            assert files["txt"] == f"0 0.5 0.5 0.{i} 0.1\n".encode()
+
+    def test_unpack_restores_yolo_layout(self, tmp_path):
+        """unpack_shards writes images/, labels/ and a re-rooted data.yaml."""
+        _write_dataset(tmp_path / "ds")
+        out = tmp_path / "out"
+        assert unpack_shards(tmp_path / "ds", out) == 5
+        assert (out / "images" / "val" / "sym_aug0.png").read_bytes() == b"\0" * 600
+        assert (out / "labels" / "train" / "sym_aug3.txt").exists()
+        assert (out / "data.yaml").read_text().startswith(f"path: {out.resolve()}\n")
@@ -0,0 +1,45 @@
+"""Tests for src.sheet_synth."""
+
+import random
+
+from src.sheet_synth import build_sheet, prepare_symbol
+
+SVG = (
+    '<svg xmlns="http://www.w3.org/2000/svg" width="40" height="20" '
+    'viewBox="0 0 40 20"><defs><clipPath id="c"><rect/></clipPath></defs>'
+    '<path clip-path="url(#c)" d="M0 10 L40 10"/></svg>'
+)
+SYM = {
+    "id": "src/iso/valve/v",
+    "snap_points": [
+        {"id": "in", "x": 0, "y": 10},
+        {"id": "out", "x": 40, "y": 10},
+        {"id": "top", "zone": {"x": 18, "y": 0, "width": 4, "height": 2}},
+    ],
+}
+
+
+class TestPrepareSymbol:
+    def test_ids_prefixed_and_ports_parsed(self):
+        """Ids and references are namespaced; zone ports use their centre."""
+        sym = prepare_symbol(SYM, 0, 7, SVG)
+        assert 'id="s7_c"' in sym.body and "url(#s7_c)" in sym.body
+        assert sym.view_box == (0.0, 0.0, 40.0, 20.0)
+        assert sym.ports[2] == ("top", 20.0, 1.0)
+
+    def test_missing_size_rejected(self):
+        """SVGs without a viewBox or width/height cannot be placed."""
+        assert prepare_symbol(SYM, 0, 0, "<svg><path/></svg>") is None
+
+
+class TestBuildSheet:
+    def test_labels_and_pipes(self):
+        """Every symbol is labelled on-canvas and pipes are orthogonal."""
+        lib = [prepare_symbol(SYM, i, i, SVG) for i in range(2)]
+        _, rows, graph = build_sheet(random.Random(0), lib, 30, 2048, 1448)
+        assert len(rows) == len(graph["nodes"]) == 30
+        assert all(0 <= v <= 1 for row in rows for v in row[1:])
+        assert graph["edges"]
+        for edge in graph["edges"]:
+            pts = edge["points"]
+            assert all(a[0] == b[0] or a[1] == b[1] for a, b in zip(pts, pts[1:]))
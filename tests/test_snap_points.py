@@ -0,0 +1,212 @@
+"""Tests for src/snap_points module."""
+
+from __future__ import annotations
+
+import numpy as np
+import pytest
+
+from src.snap_points import _floating_mask, detect_snap_points
+
+_VALVE_SVG = """<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 100 40">
+  <path d="M0 20 L30 20 M70 20 L100 20"/>
+  <path d="M30 5 L70 35 L70 5 L30 35 Z"/>
+  <line x1="50" y1="20" x2="50" y2="0"/>
+  <line x1="40" y1="0" x2="60" y2="0"/>
+</svg>"""
+
+
+def _on_segment(px: float, py: float, s: tuple, e: tuple, tol: float = 1.5) -> bool:
+    """Scalar reference: True if (px, py) lies on segment s→e within tolerance."""
+    x1, y1, x2, y2 = s[0], s[1], e[0], e[1]
+    if not (
+        min(x1, x2) - tol <= px <= max(x1, x2) + tol
+        and min(y1, y2) - tol <= py <= max(y1, y2) + tol
+    ):
+        return False
+    dx, dy = x2 - x1, y2 - y1
+    len_sq = dx * dx + dy * dy
+    if len_sq < 1e-10:
+        return abs(px - x1) <= tol and abs(py - y1) <= tol
+    return abs(dy * px - dx * py + x2 * y1 - y2 * x1) / (len_sq**0.5) <= tol
+
+
+class TestFloatingMask:
+    """The grid-indexed filter must agree with the scalar `_on_segment` test."""
+
+    def test_matches_bruteforce(self) -> None:
+        rng = np.random.default_rng(7)
+        segs = rng.uniform(0, 200, (300, 4))
+        segs[::3, 3] = segs[::3, 1]  # horizontal segments
+        segs[1::3, 2] = segs[1::3, 0]  # vertical segments
+        segs[5] = (40, 40, 40, 40)  # degenerate
+        pts = np.vstack([np.round(segs[:, :2]), rng.integers(0, 200, (200, 2))])
+        expected = [
+            not any(
+                _on_segment(px, py, (x1, y1), (x2, y2))
+                for x1, y1, x2, y2 in segs
+                if (round(x1), round(y1)) != (px, py)
+                and (round(x2), round(y2)) != (px, py)
+            )
+            for px, py in pts.tolist()
+        ]
+        assert _floating_mask(pts.astype(float), segs).tolist() == expected
+
+    def test_empty_inputs(self) -> None:
+        assert _floating_mask(np.zeros((0, 2)), np.zeros((3, 4))).tolist() == []
+        assert _floating_mask(np.ones((2, 2)), np.zeros((0, 4))).tolist() == [
+            True,
+            True,
+        ]
+
+
+class TestDetectSnapPoints:
+    """End-to-end strategy checks on small synthetic symbols."""
+
+    def test_valve_stubs(self, tmp_path) -> None:
+        svg = tmp_path / "valve.svg"
+        svg.write_text(_VALVE_SVG)
+        pts = detect_snap_points(svg, "valve")
+        assert pts[:2] == [
+            {"id": "in", "x": 0.0, "y": 20.0},
+            {"id": "out", "x": 100.0, "y": 20.0},
+        ]
+
+
+class TestExtractGeometry:
+    """One walk yields segments, open ends, ellipses and ports."""
+
+    def test_valve_geometry(self) -> None:
+        import xml.etree.ElementTree as ET
+
+        from src.svg_geometry import extract_geometry
+
+        geom = extract_geometry(ET.fromstring(_VALVE_SVG))
+        assert geom.segments.shape == (8, 4)  # Z closes the body
+        assert geom.segments[0].tolist() == [0.0, 20.0, 30.0, 20.0]
+        # The closed body contributes segments but no open ends.
+        assert geom.endpoints.tolist() == [
+            [0.0, 20.0],
+            [30.0, 20.0],
+            [70.0, 20.0],
+            [100.0, 20.0],
+            [50.0, 20.0],
+            [50.0, 0.0],
+            [40.0, 0.0],
+            [60.0, 0.0],
+        ]
+        assert geom.ellipses.shape == (0, 4)
+        assert geom.ports == ()
+
+    def test_relative_commands_curves_and_ellipses(self) -> None:
+        import xml.etree.ElementTree as ET
+
+        from src.svg_geometry import CURVE_STEPS, extract_geometry
+
+        root = ET.fromstring(
+            '<svg xmlns="http://www.w3.org/2000/svg">'
+            '<path d="m10 10 h5 v5 c0 2 2 2 2 0"/>'
+            '<circle cx="5" cy="6" r="2"/><ellipse cx="1" cy="2" rx="3" ry="4"/>'
+            '<rect id="inlet" x="0" y="0" width="4" height="2"/>'
+            "</svg>"
+        )
+        geom = extract_geometry(root)
+        assert geom.segments[:2].tolist() == [[10, 10, 15, 10], [15, 10, 15, 15]]
+        assert len(geom.segments) == 2 + CURVE_STEPS + 4  # + rect outline
+        assert geom.segments[2 + CURVE_STEPS - 1, 2:].tolist() == [17, 15]
+        assert geom.endpoints.tolist() == [[10, 10], [17, 15]]
+        assert geom.ellipses.tolist() == [[2, 2, 5, 6], [3, 4, 1, 2]]
+        assert geom.ports == ({"id": "inlet", "x": 2.0, "y": 1.0},)
+
+    def test_transforms_and_use(self) -> None:
+        import xml.etree.ElementTree as ET
+
+        from src.svg_geometry import extract_geometry
+
+        root = ET.fromstring(
+            '<svg xmlns="http://www.w3.org/2000/svg" '
+            'xmlns:xlink="http://www.w3.org/1999/xlink" viewBox="0,0,100,100">'
+            '<defs><path id="stub" d="M0 0 L10 0"/></defs>'
+            '<g transform="translate(50 50)">'
+            '<use xlink:href="#stub" x="5"/>'
+            '<g transform="rotate(90)"><use href="#stub"/></g>'
+            '<circle id="port_a" cx="1" cy="0" r="2" transform="scale(2 3)"/>'
+            "</g></svg>"
+        )
+        geom = extract_geometry(root)
+        assert geom.view_box == (0, 0, 100, 100)
+        assert geom.segments.round(9).tolist() == [[55, 50, 65, 50], [50, 50, 50, 60]]
+        assert geom.ellipses.tolist() == [[4, 6, 52, 50]]
+        assert geom.ports == ({"id": "port_a", "x": 52.0, "y": 50.0},)
+
+    def test_unitised_port_coordinates_are_skipped(self) -> None:
+        """A port with a non-numeric coordinate is dropped, not raised."""
+        import xml.etree.ElementTree as ET
+
+        from src.svg_geometry import extract_geometry
+
+        root = ET.fromstring(
+            '<svg xmlns="http://www.w3.org/2000/svg">'
+            '<circle id="port_in" cx="10px" cy="5" r="1"/>'
+            '<rect id="port_out" x="2" y="2" width="4" height="4"/>'
+            '<line x1="0" y1="0" x2="8" y2="0"/></svg>'
+        )
+        geom = extract_geometry(root)
+        assert geom.ports == ({"id": "port_out", "x": 4.0, "y": 4.0},)
+        assert len(geom.segments) == 5
+
+    def test_paint_flags_and_texts(self) -> None:
+        import xml.etree.ElementTree as ET
+
+        from src.svg_geometry import PAINT_DASHED, PAINT_FILLED, extract_geometry
+
+        root = ET.fromstring(
+            '<svg xmlns="http://www.w3.org/2000/svg">'
+            '<g style="fill:none;stroke-dasharray:4 2">'
+            '<path d="M0 0 L1 0"/><path d="M0 1 L1 1" stroke-dasharray="none"/>'
+            '<circle cx="0" cy="0" r="1" fill="#000"/></g>'
+            '<line x1="0" y1="0" x2="1" y2="1"/>'
+            '<text x="0" y="0"> F <tspan>IC</tspan></text></svg>'
+        )
+        geom = extract_geometry(root)
+        assert geom.segment_paint.tolist() == [PAINT_DASHED, 0, 0]
+        assert geom.ellipse_paint.tolist() == [PAINT_FILLED | PAINT_DASHED]
+        assert geom.texts == ("F IC",)
+        assert geom.tag_counts["path"] == 2
+        with pytest.raises(TypeError):
+            geom.tag_counts["path"] = 0  # type: ignore[index]
+
+    def test_arc_flattening(self) -> None:
+        import math
+
+        from src.svg_geometry import _arc_args, _arc_points
+
+        assert _arc_args("5 5 0 0110 0") == [5, 5, 0, 0, 1, 10, 0]
+        pts = _arc_points(0, 0, 5, 5, 0, False, True, 10, 0)
+        assert pts[-1] == (10, 0)
+        assert all(math.isclose(math.hypot(x - 5, y), 5) for x, y in pts)
+        assert min(y for _, y in pts) == -5  # sweep=1 bulges towards -y
+
+
+class TestLoadGeometry:
+    """Geometry is parsed once per distinct file content."""
+
+    def test_cached_by_content(self, tmp_path, monkeypatch) -> None:
+        from collections import OrderedDict
+
+        from src import svg_geometry
+
+        calls = []
+        real = svg_geometry.extract_geometry
+        monkeypatch.setattr(
+            svg_geometry, "extract_geometry", lambda root: calls.append(1) or real(root)
+        )
+        monkeypatch.setattr(svg_geometry, "_GEOMETRY_CACHE", OrderedDict())
+        for name in ("a.svg", "b.svg"):
+            (tmp_path / name).write_text(_VALVE_SVG)
+        first = svg_geometry.load_geometry(tmp_path / "a.svg")
+        assert svg_geometry.load_geometry(tmp_path / "b.svg") is first
+        assert len(calls) == 1
+        assert not first.segments.flags.writeable
+
+        (tmp_path / "bad.svg").write_text("<svg")
+        assert svg_geometry.load_geometry(tmp_path / "bad.svg") is None
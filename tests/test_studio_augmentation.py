@@ -0,0 +1,72 @@
+"""Tests for src/studio/augmentation module."""
+
+from __future__ import annotations
+
+import numpy as np
+import pytest
+
+try:
+    import src.studio.augmentation as studio_aug
+except (ImportError, OSError):  # cairosvg or the libcairo it loads is missing
+    pytest.skip("cairosvg is not available", allow_module_level=True)
+
+from src.studio.constants import AUGMENT_WORKERS_DEFAULT, AUGMENT_WORKERS_MAX
+
+
+class TestResolveWorkers:
+    """Test cases for the "workers" request field."""
+
+    def test_clamped(self) -> None:
+        assert studio_aug._resolve_workers({"workers": "3"}) == min(
+            3, AUGMENT_WORKERS_MAX
+        )
+        assert studio_aug._resolve_workers({"workers": -2}) == 1
+        assert studio_aug._resolve_workers({"workers": 10**6}) == AUGMENT_WORKERS_MAX
+
+    def test_bad_input_falls_back_to_default(self) -> None:
+        for raw in (None, "", "0", "many", [2], {"n": 1}):
+            assert studio_aug._resolve_workers({"workers": raw}) == (
+                AUGMENT_WORKERS_DEFAULT
+            )
+
+
+class TestResolveWriterSpec:
+    """Test cases for the "codec" / "compress_level" request fields."""
+
+    def test_bad_level_falls_back_to_default(self) -> None:
+        default = studio_aug.ImageWriterSpec()
+        for raw in ("fast", [3], {"level": 1}):
+            spec = studio_aug._resolve_writer_spec({"compress_level": raw})
+            assert spec.compress_level == default.compress_level
+        assert (
+            studio_aug._resolve_writer_spec({"compress_level": "12"}).compress_level
+            == 9
+        )
+
+
+class TestResolveShardBytes:
+    """Test cases for the "shard_mb" request field."""
+
+    def test_sizes(self) -> None:
+        assert studio_aug._resolve_shard_bytes({"shard_mb": "1.5"}) == 3 * 2**19
+        for raw in (None, "", "0", -4, "-1", "big", "nan", "inf", [1]):
+            assert studio_aug._resolve_shard_bytes({"shard_mb": raw}) == 0
+
+
+class TestMapFrames:
+    """Test cases for the threaded frame loop."""
+
+    def test_threaded_matches_serial(self) -> None:
+        base = np.full((40, 60, 3), 255, dtype=np.uint8)
+        base[5:20, 10:50] = 0
+        plans = [({}, seed) for seed in range(12)]
+
+        def degrade(plan):
+            return studio_aug._degrade_frame(base, plan)
+
+        serial = list(studio_aug._map_frames(degrade, plans, 1))
+        threaded = list(studio_aug._map_frames(degrade, plans, 4))
+        assert len(threaded) == len(serial) == len(plans)
+        for (a, a_fx), (b, b_fx) in zip(serial, threaded):
+            assert a_fx == b_fx and a.shape == b.shape and (a == b).all()
+        assert len({a.shape for a, _ in serial}) == 2  # rotations happened
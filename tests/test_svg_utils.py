@@ -0,0 +1,25 @@
+"""Tests for src.svg_utils."""
+
+from src.svg_utils import _render_size
+
+SVG = '<svg xmlns="http://www.w3.org/2000/svg" width="40" height="20"/>'
+
+
+class TestRenderSize:
+    def test_intrinsic_when_large_enough(self):
+        """Symbols already above the minimum keep their intrinsic size."""
+        assert _render_size(SVG, 16) == (40, 20)
+        assert _render_size(SVG) == (40, 20)
+
+    def test_scaled_to_min_short_side(self):
+        """Small symbols are rendered with the short side at min size."""
+        assert _render_size(SVG, 256) == (512, 256)
+
+    def test_viewbox_only(self):
+        """A viewBox alone is enough to size the render."""
+        svg = '<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 10 30"/>'
+        assert _render_size(svg, 100) == (100, 300)
+
+    def test_unknown_size(self):
+        """Unsized SVGs fall back to cairosvg's default sizing."""
+        assert _render_size("<svg/>", 100) is None
@@ -2,13 +2,17 @@
 
 from __future__ import annotations
 
+import random
 
 from src.utils import (
+    _canonicalize_svg_ids,
+    _canonicalize_two_pass,
     _display_name_from_stem,
     _extract_standard_from_name,
     _safe_std_slug,
     _slugify,
     _source_slug_from_path,
+    _svg_sha256,
 )
 
 
@@ -81,3 +85,34 @@ class TestSourceSlugFromPath:
     def test_unknown_source(self) -> None:
         result = _source_slug_from_path("random/path.svg")
         assert result == "unknown_source"
+
+
+class TestCanonicalizeSvgIds:
+    """The one-pass canonicaliser must reproduce the two-pass reference."""
+
+    _SVG = (
+        '<svg><defs><clipPath id="p8f3a"><rect/></clipPath></defs>'
+        '<use xlink:href="#g1"/><path id="g1" clip-path="url(#p8f3a)"/>'
+        '<a href="#ext"/></svg>'
+    )
+
+    def test_sequential_ids_and_references(self) -> None:
+        assert _canonicalize_svg_ids(self._SVG) == (
+            '<svg><defs><clipPath id="_cid0"><rect/></clipPath></defs>'
+            '<use xlink:href="#_cid1"/><path id="_cid1" clip-path="url(#_cid0)"/>'
+            '<a href="#ext"/></svg>'
+        )
+
+    def test_registry_hash_is_stable(self) -> None:
+        assert _svg_sha256(self._SVG) == (
+            "76774f7df895b9ede603578dbe4ac83eef90aa206f1eebb780e15c6a73150d16"
+        )
+
+    def test_matches_two_pass_on_random_markup(self) -> None:
+        tokens = ['id="', "url(#", ")", '"', 'href="#', "xlink:", "a", "b", " "]
+        tokens += ["data-", "i", "d", "_cid0", "#"]
+        rng = random.Random(0)
+        for _ in range(20000):
+            text = "".join(rng.choice(tokens) for _ in range(rng.randint(1, 14)))
+            assert _canonicalize_svg_ids(text) == _canonicalize_two_pass(text)
+
@@ -0,0 +1,57 @@
+"""Tests for src.vector_augment."""
+
+import random
+
+import numpy as np
+
+from src.augmentation import _tight_bbox_pixels
+from src.vector_augment import (
+    IDENTITY,
+    compose,
+    ink_outline,
+    sample_affine,
+    transformed_bbox,
+)
+
+
+def _yolo(img):
+    x1, y1, x2, y2 = _tight_bbox_pixels(img)
+    h, w = img.shape[:2]
+    return ((x1 + x2) / 2 / w, (y1 + y2) / 2 / h, (x2 - x1) / w, (y2 - y1) / h)
+
+
+def _blob(h=40, w=60):
+    img = np.full((h, w, 3), 255, dtype=np.uint8)
+    img[10:20, 5:30] = 0
+    return img
+
+
+class TestTransformedBbox:
+    def test_identity_matches_pixel_box(self):
+        """With no transform the analytic box equals the raster tight box."""
+        img = _blob()
+        box = transformed_bbox(ink_outline(img), IDENTITY, 60, 40)
+        assert np.allclose(box, _yolo(img), atol=1e-9)
+
+    def test_flip_and_rotate90(self):
+        """Exact flips / quarter turns map the box like the raster would."""
+        img = _blob()
+        rot = (0.0, 1.0, -1.0, 0.0, 40.0, 0.0)  # 90° onto a 40x60 canvas
+        m = compose(rot, (-1.0, 0.0, 0.0, 1.0, 60.0, 0.0))
+        expected = np.rot90(img[:, ::-1], k=-1)
+        box = transformed_bbox(ink_outline(img), m, 40, 60)
+        assert np.allclose(box, _yolo(expected), atol=1e-9)
+
+    def test_offcanvas_dropped(self):
+        """Boxes pushed almost entirely off the canvas are dropped."""
+        m = (1.0, 0.0, 0.0, 1.0, -29.0, 0.0)
+        assert transformed_bbox(ink_outline(_blob()), m, 60, 40) is None
+
+
+class TestSampleAffine:
+    def test_canvas_sides(self):
+        """Output canvas keeps or swaps the input sides."""
+        rng = random.Random(0)
+        for _ in range(50):
+            _, w, h = sample_affine(rng, 60, 40)
+            assert (w, h) in ((60, 40), (40, 60))